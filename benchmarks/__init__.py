@@ -0,0 +1 @@
+"""Benchmarks for the path finding service on synthetic universes."""
@@ -0,0 +1,65 @@
+"""Compare the bulk loading of routes with the loading of a model per row.
+
+Run with `python -m benchmarks.db`.
+"""
+
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from falcon.db import DbService
+
+NB_NODES = 2047
+NB_ROUTES = [10**5, 10**6, 4 * 10**6]
+# Loading a model per row is too slow beyond.
+MAX_NB_ROUTES_PER_ROW = 10**6
+
+
+def generate_routes(routes_db: Path, nb_routes: int) -> None:
+    rng = np.random.default_rng(0)
+    ends = rng.integers(NB_NODES, size=(nb_routes, 2)).tolist()
+    travel_times = rng.integers(1, 64, size=nb_routes).tolist()
+    routes_db.unlink(missing_ok=True)
+    with sqlite3.connect(routes_db) as conn:
+        conn.execute("CREATE TABLE routes (origin TEXT, destination TEXT, travel_time UNSIGNED INTEGER)")
+        conn.executemany(
+            "INSERT INTO routes VALUES (?, ?, ?)",
+            (
+                (f"P{origin}", f"P{destination}", time)
+                for (origin, destination), time in zip(ends, travel_times, strict=True)
+            ),
+        )
+    conn.close()
+
+
+def load_per_row(routes_db: Path) -> int:
+    db_service = DbService(routes_db)
+    ids = {name: i for i, name in enumerate(sorted(db_service.get_nodes()))}
+    return len([(ids[route.origin], ids[route.destination], route.travel_time) for route in db_service.get_edges()])
+
+
+def main() -> int:
+    print(f"{'routes':>8} {'per row':>9} {'bulk':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        routes_db = Path(tmp) / "universe.db"
+        for nb_routes in NB_ROUTES:
+            generate_routes(routes_db, nb_routes)
+            start = time.perf_counter()
+            DbService(routes_db).get_routes()
+            bulk = time.perf_counter() - start
+            if nb_routes > MAX_NB_ROUTES_PER_ROW:
+                print(f"{nb_routes:>8} {'-':>9} {bulk:>8.2f}s {'-':>8}")
+                continue
+            start = time.perf_counter()
+            load_per_row(routes_db)
+            per_row = time.perf_counter() - start
+            print(f"{nb_routes:>8} {per_row:>8.2f}s {bulk:>8.2f}s {per_row / bulk:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Compare the speed of the path finding engines on synthetic universes.
+
+Run with `python -m benchmarks.engines`.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.universe import generate_universe
+from falcon.adapter import Job
+from falcon.core import ENGINES
+
+# (number of nodes, degree, autonomy, countdown)
+SCENARIOS = [
+    (64, 4, 8, 64),
+    (256, 4, 16, 128),
+    (1024, 6, 32, 256),
+    (2047, 8, 64, 512),
+]
+
+
+def main() -> int:
+    header = f"{'nodes':>6} {'degree':>6} {'autonomy':>8} {'countdown':>9}"
+    print(header, *(f"{name:>18}" for name in ENGINES))
+    with tempfile.TemporaryDirectory() as tmp:
+        for nb_nodes, degree, autonomy, countdown in SCENARIOS:
+            config, communication = generate_universe(
+                Path(tmp),
+                nb_nodes=nb_nodes,
+                degree=degree,
+                autonomy=autonomy,
+                countdown=countdown,
+            )
+            timings, results = {}, []
+            for name, engine in ENGINES.items():
+                job = Job.from_config(config)
+                graph = job.generate_graph()
+                costs = job.add_constraints(communication)
+                start = time.perf_counter()
+                results.append(engine(job, graph, costs).search_path())
+                timings[name] = time.perf_counter() - start
+            # Exact engines may only find safer paths than the reference one.
+            if any(result > results[0] for result in results):
+                print(f"Engines disagree on {config}: {results}", file=sys.stderr)
+                return 1
+            print(
+                f"{nb_nodes:>6} {degree:>6} {autonomy:>8} {countdown:>9}",
+                *(f"{timing:>9.3f}s ({timings['python'] / timing:>5.1f}x)" for timing in timings.values()),
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Check that a galaxy of 100k planets and 1M routes is loaded and searched within a latency budget.
+
+Run with `python -m benchmarks.galaxy`: it fails if a phase takes longer than its budget.
+Planets are only linked to close ones, as on a galaxy map, so that a search only touches a region of the galaxy.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.universe import generate_universe
+from falcon.adapter import Job
+from falcon.core import ENGINES
+
+# Budget of each phase, in seconds.
+BUDGET = {"load": 5.0, "snapshot": 0.5, "first_search": 2.0, "search": 1.0}
+
+
+def timed[T](durations: dict[str, float], phase: str, function: Callable[[], T]) -> T:
+    start = time.perf_counter()
+    result = function()
+    durations[phase] = time.perf_counter() - start
+    return result
+
+
+def measure(nb_nodes: int, nb_routes: int, engine_name: str, directory: Path) -> tuple[dict[str, float], int, int]:
+    """Return the duration of each phase, in seconds, with the estimated and traced peak memory of the search."""
+    config, communication = generate_universe(
+        directory,
+        nb_nodes=nb_nodes,
+        degree=2 * nb_routes // nb_nodes,
+        autonomy=8,
+        countdown=64,
+        hunter_density=0.05,
+        local=True,
+    )
+    job = Job.from_config(config)
+    durations: dict[str, float] = {}
+    graph = timed(durations, "load", job.generate_graph)
+    timed(durations, "snapshot", job.generate_graph)
+    costs = job.add_constraints(communication)
+    engine = ENGINES[engine_name]
+    # The first search of a job trims the graph and indexes the bounty hunters, next ones reuse the trimmed graph.
+    timed(durations, "first_search", lambda: engine(job, graph, costs, resume=False).search_path())
+    timed(durations, "search", lambda: engine(job, graph, costs, resume=False).search_path())
+    # Memory is traced apart, as tracing slows the search down.
+    tracemalloc.start()
+    engine(job, graph, costs, resume=False).search_path()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    estimate = job.estimate_memory(len(graph), graph.nb_edges, int(graph.travel_times.max(initial=0)))
+    return durations, estimate, peak
+
+
+def main(args: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the latency of a search on a galaxy against a budget.")
+    parser.add_argument("--nodes", type=int, default=100_000, help="Number of planets.")
+    parser.add_argument("--routes", type=int, default=1_000_000, help="Number of routes.")
+    parser.add_argument("--engine", choices=ENGINES, default="sparse", help="Engine to measure.")
+    opts = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        durations, estimate, peak = measure(opts.nodes, opts.routes, opts.engine, Path(tmp))
+    print(f"Galaxy of {opts.nodes} planets and {opts.routes} routes, {opts.engine} engine:")
+    over = [phase for phase, duration in durations.items() if duration > BUDGET[phase]]
+    for phase, duration in durations.items():
+        print(f"{phase:<13} {duration:>8.3f}s / {BUDGET[phase]:.1f}s{' OVER BUDGET' if phase in over else ''}")
+    print(f"{'memory':<13} {peak / 2**20:>8.1f}MiB traced during search, {estimate / 2**20:.1f}MiB estimated")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
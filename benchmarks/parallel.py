@@ -0,0 +1,71 @@
+"""Measure how batch throughput scales with the number of worker processes.
+
+Run with `python -m benchmarks.parallel`.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.universe import generate_universe
+from falcon.adapter import Job
+from falcon.core import ENGINES, odds_of_communications
+from falcon.models import Communication
+from falcon.parallel import BatchExecutor
+
+NB_NODES, DEGREE, AUTONOMY, COUNTDOWN = 512, 6, 32, 256
+NB_COMMUNICATIONS = 64
+
+
+def main() -> int:
+    engine = ENGINES[os.environ.get("MILLENIUM_FALCON_CHALLENGE__ENGINE", "python")]
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        config, communication = generate_universe(
+            Path(tmp),
+            nb_nodes=NB_NODES,
+            degree=DEGREE,
+            autonomy=AUTONOMY,
+            countdown=COUNTDOWN,
+        )
+        communications = [
+            Communication(
+                countdown=COUNTDOWN - rng.randrange(COUNTDOWN // 4),
+                bounty_hunters=rng.sample(communication.bounty_hunters, len(communication.bounty_hunters) // 2),
+            )
+            for _ in range(NB_COMMUNICATIONS)
+        ]
+        job = Job.from_config(config)
+        graph = job.generate_graph()
+
+        start = time.perf_counter()
+        expected = list(odds_of_communications(job, graph, communications, engine))
+        sequential = time.perf_counter() - start
+        print(f"{'workers':>7} {'duration':>9} {'throughput':>12} {'speedup':>8} {'efficiency':>10}")
+        print(f"{'-':>7} {sequential:>8.2f}s {NB_COMMUNICATIONS / sequential:>10.1f}/s {1:>7.1f}x {1:>10.0%}")
+
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            with BatchExecutor(job, graph, engine, workers) as executor:
+                # Warm up workers so that their start up is not measured.
+                list(executor.map(communications[:workers]))
+                start = time.perf_counter()
+                results = list(executor.map(communications, chunksize=max(1, NB_COMMUNICATIONS // (4 * workers))))
+                duration = time.perf_counter() - start
+            if results != expected:
+                print(f"Results differ with {workers} workers.", file=sys.stderr)
+                return 1
+            speedup = sequential / duration
+            print(
+                f"{workers:>7} {duration:>8.2f}s {NB_COMMUNICATIONS / duration:>10.1f}/s"
+                f" {speedup:>7.1f}x {speedup / workers:>10.0%}",
+            )
+            workers *= 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Measure the overhead of the Pareto-label engine over the single label one.
+
+Run with `python -m benchmarks.pareto`.
+"""
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.universe import generate_universe
+from falcon.adapter import Costs, Job
+from falcon.core import ParetoPathService, PathService, VectorizedPathService
+from falcon.graph import Graph
+
+# (number of nodes, degree, autonomy, countdown, hunter density)
+SCENARIOS = [
+    (256, 4, 16, 128, 0.01),
+    (256, 4, 16, 128, 0.2),
+    (1024, 6, 32, 256, 0.01),
+    (1024, 6, 32, 256, 0.2),
+    (2047, 8, 64, 512, 0.05),
+]
+
+
+def measure(engine: type[PathService], job: Job, graph: Graph, costs: Costs) -> tuple[float, int, float]:
+    """Return the duration, peak memory and cost of a search."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = engine(job, graph, costs).search_path()
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak, result.cost
+
+
+def main() -> int:
+    print(f"{'nodes':>6} {'degree':>6} {'autonomy':>8} {'countdown':>9} {'hunters':>7}", end=" ")
+    print(f"{'single label':>22} {'pareto':>22} {'overhead':>16} {'safer':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for nb_nodes, degree, autonomy, countdown, hunter_density in SCENARIOS:
+            config, communication = generate_universe(
+                Path(tmp),
+                nb_nodes=nb_nodes,
+                degree=degree,
+                autonomy=autonomy,
+                countdown=countdown,
+                hunter_density=hunter_density,
+            )
+            measures = []
+            for engine in (VectorizedPathService, ParetoPathService):
+                job = Job.from_config(config)
+                graph = job.generate_graph()
+                costs = job.add_constraints(communication)
+                measures.append(measure(engine, job, graph, costs))
+            (single_time, single_peak, single_cost), (pareto_time, pareto_peak, pareto_cost) = measures
+            print(
+                f"{nb_nodes:>6} {degree:>6} {autonomy:>8} {countdown:>9} {hunter_density:>7.0%}",
+                f"{single_time:>9.3f}s {single_peak / 2**20:>8.2f}MiB",
+                f"{pareto_time:>9.3f}s {pareto_peak / 2**20:>8.2f}MiB",
+                f"x{pareto_time / single_time:>5.1f} x{pareto_peak / single_peak:>5.1f}mem",
+                f"{'yes' if pareto_cost < single_cost else 'no':>5}",
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
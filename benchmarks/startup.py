@@ -0,0 +1,54 @@
+"""Compare the time to load a graph from its database and from its snapshot.
+
+Run with `python -m benchmarks.startup`.
+"""
+
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.universe import generate_universe
+from falcon.adapter import Job
+from falcon.snapshot import snapshot_path
+
+# (number of nodes, degree)
+SCENARIOS = [
+    (256, 4),
+    (1024, 8),
+    (2047, 32),
+]
+REPEAT = 5
+
+
+def measure(load: Callable[[], object]) -> float:
+    """Return the best duration of a graph loading."""
+    durations = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        load()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main() -> int:
+    print(f"{'nodes':>6} {'edges':>7} {'database':>10} {'snapshot':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for nb_nodes, degree in SCENARIOS:
+            config, _ = generate_universe(Path(tmp), nb_nodes=nb_nodes, degree=degree, autonomy=64, countdown=0)
+            job = Job.from_config(config)
+            snapshot_path(config.routes_db).unlink(missing_ok=True)
+            from_db = measure(job._load_graph)
+            # Writes the snapshot first.
+            graph = job.generate_graph()
+            from_snapshot = measure(job.generate_graph)
+            print(
+                f"{nb_nodes:>6} {graph.nb_edges:>7} {from_db * 1000:>8.1f}ms {from_snapshot * 1000:>8.1f}ms"
+                f" {from_db / from_snapshot:>7.1f}x",
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Record the duration and peak memory of searches on synthetic universes, and detect regressions.
+
+Run with `python -m benchmarks.suite --output results.json`, then compare a later run to it with
+`python -m benchmarks.suite --baseline results.json`: it fails if a scenario got slower beyond the threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from benchmarks.universe import generate_universe
+from falcon.adapter import Job
+from falcon.core import ENGINES
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    nb_nodes: int
+    degree: int
+    autonomy: int
+    countdown: int
+    hunter_density: float = 0.01
+    seed: int = 0
+
+
+SCENARIOS = [
+    Scenario("tiny", 64, 4, 8, 64),
+    Scenario("small", 256, 4, 16, 128),
+    Scenario("hunted", 256, 4, 16, 128, hunter_density=0.2),
+    Scenario("medium", 1024, 6, 32, 256),
+    Scenario("large", 2047, 8, 64, 512, hunter_density=0.05),
+]
+REPEAT = 3
+# Relative slow down of a scenario beyond which it is a regression.
+THRESHOLD = 0.25
+# Slow downs of fewer seconds are timer noise.
+NOISE = 0.005
+
+
+def measure(scenario: Scenario, engine_names: Iterable[str], directory: Path, repeat: int = REPEAT) -> dict[str, Any]:
+    """Return the best search duration, in seconds, and peak memory, in bytes, of each engine on the scenario."""
+    config, communication = generate_universe(
+        directory,
+        nb_nodes=scenario.nb_nodes,
+        degree=scenario.degree,
+        autonomy=scenario.autonomy,
+        countdown=scenario.countdown,
+        hunter_density=scenario.hunter_density,
+        seed=scenario.seed,
+    )
+    job = Job.from_config(config)
+    graph = job.generate_graph()
+    costs = job.add_constraints(communication)
+    results = {}
+    for name in engine_names:
+        engine = ENGINES[name]
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            # Searches would resume from the previous one.
+            engine(job, graph, costs, resume=False).search_path()
+            durations.append(time.perf_counter() - start)
+        # Memory is traced apart, as tracing slows the search down.
+        tracemalloc.start()
+        engine(job, graph, costs, resume=False).search_path()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[f"{scenario.name}/{name}"] = {"duration": min(durations), "peak_memory": peak}
+    return results
+
+
+def run(scenarios: Iterable[Scenario], engine_names: Iterable[str], repeat: int = REPEAT) -> dict[str, Any]:
+    """Return the measures of all scenarios, along with what they were run on."""
+    engine_names = list(engine_names)
+    report: dict[str, Any] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scenarios": {},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for scenario in scenarios:
+            report["scenarios"][scenario.name] = asdict(scenario)
+            for key, result in measure(scenario, engine_names, Path(tmp), repeat).items():
+                report["results"][key] = result
+                print(f"{key:<24} {result['duration']:>9.3f}s {result['peak_memory'] / 2**20:>8.2f}MiB")
+    return report
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], threshold: float = THRESHOLD) -> list[str]:
+    """Return the scenarios of the report slower than in the baseline beyond the relative threshold.
+
+    Scenarios missing from either are ignored, as are slow downs within the noise of the timer.
+    """
+    regressions = []
+    for key, result in report["results"].items():
+        if (reference := baseline["results"].get(key)) is None:
+            continue
+        ratio = result["duration"] / reference["duration"]
+        if ratio > 1 + threshold and result["duration"] - reference["duration"] > NOISE:
+            regressions.append(
+                f"{key}: {reference['duration']:.3f}s -> {result['duration']:.3f}s ({ratio - 1:+.0%})",
+            )
+    return regressions
+
+
+def main(args: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the path finding engines on synthetic universes.")
+    parser.add_argument("--output", type=Path, help="JSON file where measures are written.")
+    parser.add_argument("--baseline", type=Path, help="JSON file of previous measures to compare with.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Tolerated relative slow down.")
+    parser.add_argument("--engine", choices=ENGINES, action="append", help="Engine to measure, all by default.")
+    parser.add_argument("--scenario", choices=[scenario.name for scenario in SCENARIOS], action="append")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Number of searches, the fastest is kept.")
+    opts = parser.parse_args(args)
+
+    scenarios = [scenario for scenario in SCENARIOS if opts.scenario is None or scenario.name in opts.scenario]
+    report = run(scenarios, opts.engine or ENGINES, opts.repeat)
+    if opts.output:
+        opts.output.write_text(json.dumps(report, indent=2))
+    if opts.baseline:
+        regressions = compare(report, json.loads(opts.baseline.read_text()), opts.threshold)
+        for regression in regressions:
+            print(f"Regression of {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
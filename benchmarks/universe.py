@@ -0,0 +1,113 @@
+"""Generation of synthetic universes.
+
+Run with `python -m benchmarks.universe directory --nodes 1024` to write one in a folder, usable by the CLI.
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+from falcon.models import BountyHunter, Communication, Falcon
+
+
+def generate_universe(
+    directory: Path,
+    *,
+    nb_nodes: int,
+    degree: int,
+    autonomy: int,
+    countdown: int,
+    hunter_density: float = 0.01,
+    seed: int = 0,
+    local: bool = False,
+) -> tuple[Falcon, Communication]:
+    """Write a random connected universe in `directory` and return its configuration and a communication.
+
+    Parameters:
+        directory: Folder where `universe.db`, `millennium-falcon.json` and `empire.json` are written.
+        nb_nodes: Number of planets.
+        degree: Average number of routes leaving a planet.
+        autonomy: Autonomy of the Millennium Falcon, routes last up to this number of days.
+        countdown: Countdown of the communication.
+        hunter_density: Probability for a planet to be guarded by a bounty hunter on a given day.
+        seed: Seed of the random generator.
+        local: Whether routes only link planets close to each other on a ring, like on a galaxy map,
+            instead of any two planets.
+
+    Returns:
+        The configuration of the Millennium Falcon and the intercepted communication.
+    """
+    rng = random.Random(seed)
+    planets = [f"P{i}" for i in range(nb_nodes)]
+    routes = set()
+    if local:
+        # Neighbors on the ring are linked, then planets are linked to others up to 4 * degree planets away.
+        for i in range(nb_nodes):
+            routes.add((planets[i - 1], planets[i], rng.randint(1, autonomy)))
+        for _ in range(max(0, nb_nodes * degree // 2 - len(routes))):
+            i = rng.randrange(nb_nodes)
+            routes.add((planets[i], planets[(i + rng.randint(2, 4 * degree)) % nb_nodes], rng.randint(1, autonomy)))
+    else:
+        # A random spanning tree keeps the universe connected...
+        for i in range(1, nb_nodes):
+            routes.add((planets[rng.randrange(i)], planets[i], rng.randint(1, autonomy)))
+        # ...then random routes are added up to the requested degree.
+        for _ in range(max(0, nb_nodes * degree // 2 - len(routes))):
+            origin, destination = rng.sample(planets, 2)
+            routes.add((origin, destination, rng.randint(1, autonomy)))
+
+    routes_db = directory / "universe.db"
+    routes_db.unlink(missing_ok=True)
+    with sqlite3.connect(routes_db) as conn:
+        conn.execute("CREATE TABLE routes (origin TEXT, destination TEXT, travel_time UNSIGNED INTEGER)")
+        conn.executemany("INSERT INTO routes VALUES (?, ?, ?)", sorted(routes))
+    conn.close()
+
+    hunters = [
+        BountyHunter(planet=planet, day=day)
+        for day in range(countdown + 1)
+        for planet in planets
+        if rng.random() < hunter_density
+    ]
+    # On a ring, the last planet is next to the first one.
+    arrival = planets[min(32 * degree, nb_nodes - 1)] if local else planets[-1]
+    config = Falcon(autonomy=autonomy, departure=planets[0], arrival=arrival, routes_db=routes_db)
+    communication = Communication(countdown=countdown, bounty_hunters=hunters)
+    # The database is found next to the configuration file.
+    (directory / "millennium-falcon.json").write_text(
+        config.model_copy(update={"routes_db": Path(routes_db.name)}).model_dump_json(indent=2),
+    )
+    (directory / "empire.json").write_text(communication.model_dump_json(indent=2))
+    return config, communication
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic universe and communication in a folder.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--nodes", type=int, default=1024, help="Number of planets.")
+    parser.add_argument("--degree", type=int, default=6, help="Average number of routes leaving a planet.")
+    parser.add_argument("--autonomy", type=int, default=32, help="Autonomy of the Millennium Falcon.")
+    parser.add_argument("--countdown", type=int, default=256, help="Countdown of the communication.")
+    parser.add_argument("--hunter-density", type=float, default=0.01, help="Probability of a hunter by planet and day.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+    parser.add_argument("--local", action="store_true", help="Only link planets close to each other.")
+    args = parser.parse_args()
+    args.directory.mkdir(parents=True, exist_ok=True)
+    config, communication = generate_universe(
+        args.directory,
+        nb_nodes=args.nodes,
+        degree=args.degree,
+        autonomy=args.autonomy,
+        countdown=args.countdown,
+        hunter_density=args.hunter_density,
+        seed=args.seed,
+        local=args.local,
+    )
+    print(f"Universe of {args.nodes} planets with {len(communication.bounty_hunters)} hunters in {config.routes_db}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
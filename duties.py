@@ -18,7 +18,7 @@ if TYPE_CHECKING:
     from duty.context import Context
 
 
-PY_SRC_PATHS = (Path(_) for _ in ("src", "tests", "duties.py", "scripts"))
+PY_SRC_PATHS = (Path(_) for _ in ("src", "tests", "benchmarks", "duties.py", "scripts"))
 PY_SRC_LIST = tuple(str(_) for _ in PY_SRC_PATHS)
 PY_SRC = " ".join(PY_SRC_LIST)
 CI = os.environ.get("CI", "0") in {"1", "true", "yes", ""}
@@ -46,6 +46,31 @@ def material_insiders() -> Iterator[bool]:
         yield False
 
 
+@duty
+def bench(ctx: Context, output: str = "", baseline: str = "", threshold: float = 0.25) -> None:
+    """Benchmark the path finding engines on synthetic universes.
+
+    Parameters:
+        ctx: The context instance (passed automatically).
+        output: The JSON file where timings and peak memory of each scenario are written.
+        baseline: The JSON file of previous measures, failing if a scenario got slower.
+        threshold: The tolerated relative slow down of a scenario.
+    """
+    from benchmarks.suite import main as run_benchmarks
+
+    args = ["--threshold", str(threshold)]
+    if output:
+        args += ["--output", output]
+    if baseline:
+        args += ["--baseline", baseline]
+    ctx.run(
+        run_benchmarks,
+        args=[args],
+        title="Running benchmarks",
+        command=f"python -m benchmarks.suite {' '.join(args)}",
+    )
+
+
 @duty
 def changelog(ctx: Context) -> None:
     """Update the changelog in-place with latest commits.
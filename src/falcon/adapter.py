@@ -1,22 +1,107 @@
+import os
+import sys
 from collections import defaultdict
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
 from functools import total_ordering
 from logging import getLogger
 from math import inf
 from pathlib import Path as FilePath
-from typing import ClassVar, Self
+from typing import Any, ClassVar, Self
 
+import numpy as np
 from pydantic import BaseModel
 
 from falcon.db import DbService
-from falcon.models import Communication, Falcon, SafePath
+from falcon.graph import Graph
+from falcon.metrics import registry
+from falcon.models import Communication, Falcon, RouteUpdate, SafePath
+from falcon.snapshot import load_snapshot, save_snapshot
 
 logger = getLogger(__name__)
 
-# TODO: Use more lightweight structures such as array.array.
-Nodes = set[str]
-Weights = defaultdict[str, dict[str, int]]
-Costs = defaultdict[str, set[int]]
+
+class HunterIndex:
+    """Presence of bounty hunters by node id and day on a given graph, consulted by the engines.
+
+    It is stored sparsely so that memory is proportional to the number of bounty hunters, whatever the countdown:
+    - a set of (node, day) cells, to check if a node is guarded on a day in O(1),
+    - the sorted array of nodes guarded on each day, for vectorized lookups on whole day layers.
+    Bounty hunters on planets out of the graph are ignored.
+    """
+
+    EMPTY: ClassVar[np.ndarray] = np.array([], dtype=np.int64)
+
+    def __init__(self, graph: Graph, cells: np.ndarray):
+        """Cells are the sorted unique values of `day * len(graph) + node`."""
+        self.graph, self._size = graph, len(graph)
+        self._cells = frozenset(cells.tolist())
+        self._nodes: dict[int, np.ndarray] = {}
+        if len(cells):
+            days, nodes = np.divmod(cells, len(graph))
+            unique_days, starts = np.unique(days, return_index=True)
+            self._nodes = dict(zip(unique_days.tolist(), np.split(nodes, starts[1:]), strict=True))
+
+    @classmethod
+    def from_hunters(cls, graph: Graph, hunters: Iterable[tuple[str, int]]) -> Self:
+        """Build the index from (planet, day) pairs."""
+        cells = np.fromiter(
+            (day * len(graph) + graph.ids[planet] for planet, day in hunters if planet in graph.ids),
+            dtype=np.int64,
+        )
+        return cls(graph, np.unique(cells))
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self._cells) + sum(nodes.nbytes for nodes in self._nodes.values())
+
+    @property
+    def days(self) -> list[int]:
+        """Return the days at least one bounty hunter is present, in order."""
+        return list(self._nodes)
+
+    def encounter(self, node: int, day: int) -> int:
+        """Return 1 if a bounty hunter is on the node that day, else 0."""
+        return int(day * self._size + node in self._cells)
+
+    def nodes(self, day: int) -> np.ndarray:
+        """Return the sorted ids of nodes where a bounty hunter is present that day."""
+        return self._nodes.get(day, self.EMPTY)
+
+    def first_difference(self, other: "HunterIndex") -> int | None:
+        """Return the first day bounty hunters differ from the other index of the same graph, None if they don't."""
+        for day in sorted(self._nodes.keys() | other._nodes.keys()):
+            if not np.array_equal(self.nodes(day), other.nodes(day)):
+                return day
+        return None
+
+
+class Costs(defaultdict[str, set[int]]):
+    """Days of bounty hunters presence by planet.
+
+    The index of their presence on the searched graph is built once, then shared by every search.
+    Days being mutable sets, the index keeps a frozen copy of the days it was built from, to be rebuilt
+    if they changed since.
+    """
+
+    def __init__(self, costs: Mapping[str, Iterable[int]] | None = None):
+        super().__init__(set, {planet: set(days) for planet, days in (costs or {}).items()})
+        self._index: HunterIndex | None = None
+        self._indexed: dict[str, frozenset[int]] = {}
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (dict(self),)
+
+    def index(self, graph: Graph) -> HunterIndex:
+        """Return the presence index of bounty hunters on the given graph, building it if needed."""
+        if self._index is None or self._index.graph is not graph or self._indexed != self:
+            self._indexed = {planet: frozenset(days) for planet, days in self.items()}
+            hunters = ((planet, day) for planet, days in self._indexed.items() for day in days)
+            self._index = HunterIndex.from_hunters(graph, hunters)
+        return self._index
 
 
 @total_ordering
@@ -41,9 +126,13 @@ class Job(BaseModel):
     FAIL_CHANCE: ClassVar[float] = 0.1  # Taken from documentation
     SUCCESS_CHANCE: ClassVar[float] = 1 - FAIL_CHANCE
 
-    # Performance upper bounds
-    MAX_AUTONOMY: ClassVar[int] = 4096
-    MAX_NB_NODES: ClassVar[int] = 2048
+    # Performance soft limits: beyond them, a graph is only loaded if its search is estimated to fit in MAX_MEMORY.
+    MAX_AUTONOMY: ClassVar[int] = int(os.environ.get("MILLENIUM_FALCON_CHALLENGE__MAX_AUTONOMY", "4096"))
+    MAX_NB_NODES: ClassVar[int] = int(os.environ.get("MILLENIUM_FALCON_CHALLENGE__MAX_NB_NODES", "2048"))
+    MAX_MEMORY: ClassVar[int] = int(os.environ.get("MILLENIUM_FALCON_CHALLENGE__MAX_MEMORY", str(2**31)))
+    # Bytes by node for its name and id, and by edge for the arrays of a search, roughly.
+    NODE_BYTES: ClassVar[int] = 128
+    SEARCH_EDGE_BYTES: ClassVar[int] = 80
 
     max_available_weight: int
     max_total_weight: int = 0
@@ -54,8 +143,6 @@ class Job(BaseModel):
     routes_db: FilePath
     result: PathStats | None = None
 
-    # TODO: Add ID and status for API and GUI
-
     @classmethod
     def from_config(cls, config: Falcon) -> Self:
         """
@@ -66,9 +153,6 @@ class Job(BaseModel):
         arrival: destination of the path.
         routes_db: Path to the DB file.
         """
-        if config.autonomy >= cls.MAX_AUTONOMY:
-            raise ValueError(f"{config.autonomy=} must be less then {cls.MAX_AUTONOMY}.")
-
         logger.info(f"Parameters loaded: {config}")
 
         return cls(
@@ -78,41 +162,113 @@ class Job(BaseModel):
             routes_db=config.routes_db,
         )
 
-    def generate_graph(self) -> tuple[Nodes, Weights]:
-        db_service = DbService(self.routes_db)
+    @registry.timed("generate_graph")
+    def generate_graph(self) -> Graph:
+        """Load the graph from the snapshot of the DB if up to date, else from the DB and snapshot it."""
+        graph = load_snapshot(self.routes_db)
+        if graph is None:
+            graph = self._load_graph()
+            save_snapshot(graph, self.routes_db)
+        else:
+            self.check_limits(len(graph), graph.nb_edges, int(graph.travel_times.max(initial=0)))
 
-        nodes = db_service.get_nodes()
+        # A route longer than the autonomy can never be crossed.
+        if (graph.travel_times > self.max_available_weight).any():
+            graph = graph.subgraph(np.ones(len(graph), dtype=bool), self.max_available_weight)
+        logger.info(f"Graph of {len(graph)} nodes and {graph.nb_edges} usable edges.")
+        return graph
 
-        number_of_nodes = len(nodes)
-        if number_of_nodes >= self.MAX_NB_NODES:
-            raise ValueError(f"{number_of_nodes=} must be less than {self.MAX_NB_NODES}.")
+    def update_graph(self, graph: Graph, routes: Iterable[RouteUpdate]) -> Graph:
+        """Return the graph with routes added, retimed or removed, keeping what is cached on it if unaffected.
 
-        number_of_edges = 0
-        edges: Weights = defaultdict(dict)
+        Planets must already be in the graph: adding new ones needs the DB to be reloaded.
+        """
+        changes = self.route_changes(graph, routes)
+        graph = graph.with_routes(changes)
+        logger.info(f"{len(changes)} routes updated, graph of {len(graph)} nodes and {graph.nb_edges} usable edges.")
+        return graph
 
-        # Add an edge from a node to itself to handle waiting action
-        for node in nodes:
-            edges[node][node] = self.WAITING_ACTION_WEIGHT
+    def route_changes(self, graph: Graph, routes: Iterable[RouteUpdate]) -> dict[tuple[int, int], int | None]:
+        """Return the travel time routes are set to by pair of node ids, None if removed or too long to be crossed.
 
-        # Add edges from a node to another node
-        for route in db_service.get_edges():
-            number_of_edges += 1
-            # TODO: filter out edges with travel time > autonomy?
-            edges[route.origin][route.destination] = route.travel_time
-            edges[route.destination][route.origin] = route.travel_time
+        Raise ValueError if a planet is not in the graph.
+        """
+        changes: dict[tuple[int, int], int | None] = {}
+        for route in routes:
+            for planet in (route.origin, route.destination):
+                if planet not in graph:
+                    raise ValueError(f"{planet=} is not in the graph, add it to the DB to reload it.")
+            # A route longer than the autonomy can never be crossed.
+            usable = route.travel_time is not None and route.travel_time <= self.max_available_weight
+            changes[graph.index(route.origin), graph.index(route.destination)] = route.travel_time if usable else None
+        return changes
 
-        logger.info(f"Fetched {number_of_nodes} nodes and {number_of_edges} edges from db.")
-        return nodes, edges
+    def _load_graph(self) -> Graph:
+        names, origins, destinations, travel_times = DbService(self.routes_db).get_routes()
+
+        # Each route is stored both ways, along with a waiting edge by node.
+        self.check_limits(len(names), len(names) + 2 * len(origins), int(travel_times.max(initial=0)))
+        return Graph.from_edges(names, origins, destinations, travel_times, waiting_weight=self.WAITING_ACTION_WEIGHT)
+
+    def estimate_memory(self, nb_nodes: int, nb_edges: int, longest_edge: int) -> int:
+        """Return the bytes roughly needed to hold a graph of that size and search it, in the worst case.
+
+        Day by day engines keep a state by node for each day an edge can span, up to the autonomy,
+        and the vectorized one a few arrays by edge.
+        """
+        depth = min(longest_edge, self.max_available_weight) + 1
+        graph = 8 * (nb_nodes + 1) + 8 * nb_edges + self.NODE_BYTES * nb_nodes
+        return graph + 8 * depth * nb_nodes + self.SEARCH_EDGE_BYTES * nb_edges
 
-    def add_constraints(self, communication: Communication) -> Costs:
-        self.max_total_weight = communication.countdown
+    def check_limits(self, nb_nodes: int, nb_edges: int, longest_edge: int) -> None:
+        """Raise ValueError if a graph of that size is beyond the soft limits and estimated not to fit in memory."""
+        if nb_nodes < self.MAX_NB_NODES and min(longest_edge, self.max_available_weight) < self.MAX_AUTONOMY:
+            return
+        memory = self.estimate_memory(nb_nodes, nb_edges, longest_edge)
+        if memory > self.MAX_MEMORY:
+            raise ValueError(
+                f"number_of_nodes={nb_nodes} with autonomy={self.max_available_weight} needs about {memory >> 20} MiB, "
+                f"more than MAX_MEMORY={self.MAX_MEMORY >> 20} MiB.",
+            )
+        logger.warning(
+            f"Graph of {nb_nodes} nodes with autonomy {self.max_available_weight} is beyond soft limits of "
+            f"{self.MAX_NB_NODES} nodes and autonomy {self.MAX_AUTONOMY}: about {memory >> 20} MiB needed.",
+        )
 
-        costs = defaultdict(set)
+    @registry.timed("add_constraints")
+    def add_constraints(self, communication: Communication, graph: Graph | None = None) -> Costs:
+        """Add the countdown and bounty hunters of a communication, indexed on the graph if given."""
+        costs = Costs()
         for hunter in communication.bounty_hunters:
             costs[hunter.planet].add(hunter.day)
-        logger.info(f"{len(communication.bounty_hunters)} weights added.")
+        return self.set_constraints(communication.countdown, costs, graph)
+
+    def set_constraints(self, countdown: int, costs: Costs, graph: Graph | None = None) -> Costs:
+        """Set the countdown and the bounty hunters already gathered by planet, indexed on the graph if given."""
+        self.max_total_weight = countdown
+        if graph is not None:
+            costs.index(self.trim_graph(graph))
+        logger.info(f"{sum(map(len, costs.values()))} weights added.")
         return costs
 
+    def trim_graph(self, graph: Graph) -> Graph:
+        """Return the part of the graph usable for the job, once its countdown is known.
+
+        The graph is returned as is if origin or destination are not in it, to be reported by the search.
+        """
+        if self.origin not in graph or self.destination not in graph:
+            return graph
+        trimmed = graph.trim(
+            graph.index(self.origin),
+            graph.index(self.destination),
+            self.max_available_weight,
+            self.max_total_weight,
+        )
+        logger.info(
+            f"Graph trimmed to {len(trimmed)}/{len(graph)} nodes and {trimmed.nb_edges}/{graph.nb_edges} edges.",
+        )
+        return trimmed
+
     def get_odds(self) -> SafePath:
         """return the odds of success for a given path cost - aka. the number of wrong events.
 
@@ -123,4 +279,9 @@ class Job(BaseModel):
         """
         if self.result is None:
             raise ValueError("Result is null, please run path search.")
-        return SafePath(odds=self.SUCCESS_CHANCE**self.result.cost)
+        return self.odds(self.result)
+
+    @classmethod
+    def odds(cls, result: PathStats) -> SafePath:
+        """Return the odds of success of a path found."""
+        return SafePath(odds=cls.SUCCESS_CHANCE**result.cost)
@@ -1,18 +1,27 @@
+import asyncio
 import logging
 import os
-from collections.abc import AsyncGenerator
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
 from logging import getLogger
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from starlette.requests import Request
-from starlette.responses import HTMLResponse
+from starlette.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 
 from falcon import frontend
-from falcon.config import init
-from falcon.core import PathService
-from falcon.models import Communication, SafePath
-from falcon.store import MemoryStore, del_store, get_store, set_store
+from falcon.config import init, parse_communications
+from falcon.core import ENGINES, odds_of_communications
+from falcon.graph import Graph
+from falcon.jobs import JobManager
+from falcon.metrics import PROGRESS_INTERVAL, registry
+from falcon.models import Communication, GraphInfo, JobInfo, JobStatus, RouteUpdate, SafeItinerary, SafePath, SafeSearch
+from falcon.parallel import BatchExecutor
+from falcon.reload import GraphReloader
+from falcon.store import MemoryStore, ResultCache, del_store, get_store, set_store
 
 # Use level passed to uvicorn command as base level...
 logging.basicConfig(level=getLogger("uvicorn").level)
@@ -22,12 +31,44 @@ logger = getLogger(__name__)
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI) -> AsyncGenerator[None]:
-    job, nodes, weights, costs = init(
+async def lifespan(app_: FastAPI) -> AsyncGenerator[None]:
+    job, graph, costs = init(
         os.environ.get("MILLENIUM_FALCON_CHALLENGE__JSON_CFG_PATH", "placeholder"),
     )
-    set_store(MemoryStore(job, nodes, weights, costs))
+    engine = ENGINES[os.environ.get("MILLENIUM_FALCON_CHALLENGE__ENGINE", "python")]
+    workers = int(os.environ.get("MILLENIUM_FALCON_CHALLENGE__WORKERS", "1"))
+    # Searches run on processes, even a single one, as searches on a thread would hold the GIL and stall the event loop.
+    processes = os.environ.get("MILLENIUM_FALCON_CHALLENGE__EXECUTOR", "process")
+
+    def make_executor(graph: Graph) -> BatchExecutor:
+        # Searches of the app repeat, e.g. with a bounty hunter moved, so they resume from previous ones.
+        return BatchExecutor(job, graph, engine, workers, processes=processes == "process", resume=True)
+
+    executor = make_executor(graph)
+    cache = ResultCache(
+        max_bytes=int(os.environ.get("MILLENIUM_FALCON_CHALLENGE__CACHE_BYTES", str(2**20))),
+        ttl=float(os.environ.get("MILLENIUM_FALCON_CHALLENGE__CACHE_TTL", "3600")),
+    )
+    store = MemoryStore(job, graph, costs, engine, executor, cache=cache)
+    # Jobs reuse the results of identical searches, keyed on the graph of the store at the time.
+    jobs = store.jobs = JobManager(
+        executor,
+        ttl=float(os.environ.get("MILLENIUM_FALCON_CHALLENGE__JOB_TTL", "3600")),
+        cache=cache,
+        key=store.communication_key,
+    )
+    set_store(store)
+    # The routes DB is watched for changes unless the interval is 0.
+    reload_interval = float(os.environ.get("MILLENIUM_FALCON_CHALLENGE__RELOAD_INTERVAL", "5"))
+    reloader = app_.state.reloader = GraphReloader(store, reload_interval, make_executor)
+    if reload_interval > 0:
+        reloader.start()
     yield
+    reloader.stop()
+    del app_.state.reloader
+    jobs.close()
+    if store.executor is not None:
+        store.executor.close()
     del_store()
 
 
@@ -35,6 +76,24 @@ app = FastAPI(lifespan=lifespan)
 frontend.init(app)
 
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    if not registry.enabled:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Routes are labelled by their template, not their path, to keep a bounded number of series.
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    registry.observe(
+        "falcon_http_request_duration_seconds",
+        time.perf_counter() - start,
+        method=request.method,
+        route=route,
+        status=str(response.status_code),
+    )
+    return response
+
+
 HOME_RESPONSE_FMT = """<!doctype html>
 <html lang="en">
   <div>Click <a href="{0}/docs">here</a> for API docs.</div>
@@ -51,14 +110,153 @@ def read_root(request: Request) -> HTMLResponse:
 @app.post("/communication", status_code=201)
 def upload_communication(communication: Communication) -> Communication:
     store = get_store()
-    store.costs = store.job.add_constraints(communication)
+    store.costs = store.job.add_constraints(communication, store.graph)
     return communication
 
 
-# TODO: split /job/start and /job/status with BackgroundTask
+# Not async so that the search runs in a thread, out of the event loop.
 @app.post("/compute_odds", status_code=200)
-async def compute_odds() -> SafePath:
+def compute_odds(*, itinerary: bool = False) -> SafeSearch | SafeItinerary:
+    """Compute the odds of the stored communication, along with the steps of the safest path if asked.
+
+    The days of the search reused from a previous one are given too.
+    """
+    store = get_store()
+    if not itinerary:
+        store.job.result, days_reused = store.search_path(store.job, store.costs)
+        return SafeSearch(odds=store.job.get_odds().odds, days_reused=days_reused)
+    try:
+        store.job.result, steps, days_reused = store.search_itinerary(store.job, store.costs)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from error
+    return SafeItinerary(odds=store.job.get_odds().odds, itinerary=steps, days_reused=days_reused)
+
+
+@app.post(
+    "/compute_odds/batch",
+    status_code=200,
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Communication"}},
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        },
+    },
+)
+async def compute_odds_batch(request: Request) -> StreamingResponse:
+    """Compute the odds of many communications, given as a JSON array or JSON lines, without storing them.
+
+    Results are streamed back as JSON lines, in input order.
+    """
     store = get_store()
-    service = PathService(store.job, store.nodes, store.weights, store.costs)
-    store.job.result = service.search_path()
-    return store.job.get_odds()
+    try:
+        communications = list(parse_communications((await request.body()).decode().splitlines(keepends=True)))
+    except ValidationError as error:
+        raise RequestValidationError(error.errors()) from error
+    if store.executor is not None:
+        chunksize = max(1, len(communications) // (4 * store.executor.max_workers))
+        results = store.executor.map(communications, chunksize)
+    else:
+        results = odds_of_communications(store.job, store.graph, communications, store.engine)
+    return StreamingResponse(
+        (f"{odds.model_dump_json()}\n" for odds in results),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/graph", status_code=200)
+def graph_info() -> GraphInfo:
+    store = get_store()
+    graph, generation = store.graph, store.generation
+    return GraphInfo(generation=generation, fingerprint=graph.fingerprint, nb_nodes=len(graph), nb_edges=graph.nb_edges)
+
+
+@app.post("/graph/routes", status_code=200)
+def update_routes(routes: list[RouteUpdate], request: Request) -> GraphInfo:
+    """Add, retime or remove routes, without a travel time, between planets of the graph until the DB changes.
+
+    Cached results of searches the routes are out of reach of are kept.
+    """
+    reloader: GraphReloader | None = getattr(request.app.state, "reloader", None)
+    if reloader is None:
+        raise HTTPException(status_code=503, detail="Graph updates are not enabled.")
+    try:
+        reloader.update_routes(routes)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from error
+    return graph_info()
+
+
+def get_jobs() -> JobManager:
+    store = get_store()
+    if store.jobs is None:
+        raise HTTPException(status_code=503, detail="Jobs are not enabled.")
+    return store.jobs
+
+
+@app.post("/job/start", status_code=202)
+def start_job(communication: Communication) -> JobInfo:
+    """Queue the computation of the odds of a communication, without storing it."""
+    return get_jobs().start(communication)
+
+
+@app.get("/job/status/{job_id}", status_code=200)
+def job_status(job_id: str) -> JobInfo:
+    try:
+        return get_jobs().status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired.") from None
+
+
+@app.get("/job/result/{job_id}", status_code=200)
+def job_result(job_id: str) -> SafePath:
+    jobs = get_jobs()
+    try:
+        info, result = jobs.status(job_id), jobs.result(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired.") from None
+    if result is None:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {info.status}: {info.error or 'no result yet'}.")
+    return result
+
+
+@app.get("/job/progress/{job_id}", status_code=200, response_class=StreamingResponse)
+def job_progress(job_id: str) -> StreamingResponse:
+    """Stream the status of a job, with the progress of its search, as Server-Sent Events until it ends."""
+    jobs = get_jobs()
+    try:
+        jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired.") from None
+    return StreamingResponse(
+        job_events(jobs, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def job_events(jobs: JobManager, job_id: str) -> AsyncIterator[str]:
+    """Yield an event each time the status or progress of a job changes, checked as often as progress is reported."""
+    last = None
+    while True:
+        try:
+            info = jobs.status(job_id)
+        except KeyError:
+            return
+        if (info.status, info.progress) != last:
+            last = info.status, info.progress
+            yield f"data: {info.model_dump_json()}\n\n"
+        if info.status in (JobStatus.DONE, JobStatus.FAILED):
+            return
+        await asyncio.sleep(PROGRESS_INTERVAL)
+
+
+@app.get("/metrics", status_code=200, response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Expose phase durations, search counters and request latencies in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
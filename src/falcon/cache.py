@@ -0,0 +1,77 @@
+import sys
+from collections import OrderedDict
+from collections.abc import Hashable
+from itertools import chain
+from threading import Lock
+from typing import Any
+
+
+def nbytes(value: Any, seen: set[int] | None = None) -> int:
+    """Return roughly the bytes held by a value: its own count if it keeps one, else summed over its items.
+
+    Containers shared by several items, such as the layers of consecutive checkpoints, are only counted once.
+    """
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, tuple | list | dict):
+        seen = set() if seen is None else seen
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        items = chain(value, value.values()) if isinstance(value, dict) else value
+        return sys.getsizeof(value) + sum(nbytes(item, seen) for item in items)
+    return sys.getsizeof(value)
+
+
+class LruCache:
+    """Values by key, evicted when least recently used to fit in a byte budget.
+
+    A value bigger than the whole budget is not kept. It can be shared between threads.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nb_bytes = 0
+        self.evictions = 0
+        # Value and size in bytes, by key from least to most recently used.
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        size = nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value, size
+            self.nb_bytes += size
+            while self.nb_bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nb_bytes = 0
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """Return the entries from least to most recently used, without using them."""
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def _evict(self, key: Hashable) -> None:
+        self.nb_bytes -= self._entries.pop(key)[1]
@@ -14,13 +14,27 @@
 from __future__ import annotations
 
 import argparse
+import cProfile
+import json
 import logging
 import sys
+from functools import partial
+from pathlib import Path
 from typing import Any
 
-from falcon import debug
-from falcon.config import init
-from falcon.core import PathService
+from falcon import DB_DIR, debug
+from falcon.config import init, parse_communications, search_file
+from falcon.core import ENGINES, PathService, odds_of_communications
+from falcon.metrics import registry
+from falcon.parallel import BatchExecutor
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows.
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
 
 
 class _DebugInfo(argparse.Action):
@@ -41,6 +55,46 @@ def get_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="give-me-the-odds")
     parser.add_argument("-V", "--version", action="version", version=f"%(prog)s {debug.get_version()}")
     parser.add_argument("--debug-info", action=_DebugInfo, help="Print debug information.")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="python",
+        help="Path finding engine.",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Read many communications from input file, as a JSON array or JSON lines, and print the odds of each.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes computing the odds in batch mode.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        type=Path,
+        help="Profile the run into a pstats file, and print the duration of each phase on stderr.",
+    )
+    parser.add_argument(
+        "--stats",
+        choices=["json"],
+        help="Print the odds along with statistics of the search, such as states created and pruned.",
+    )
+    parser.add_argument(
+        "--itinerary",
+        action="store_true",
+        help="Print the odds as JSON along with the steps of the safest path, days waited and hunters met included.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Log progress, and details if repeated.",
+    )
     parser.add_argument("cfg_file", action="store", help="Configuration of the application (millennium-falcon.json)")
     parser.add_argument("input_file", action="store", help="Input file (empire.json)")
     return parser
@@ -57,11 +111,98 @@ def main(args: list[str] | None = None) -> int:
     Returns:
         An exit code.
     """
-    logging.basicConfig(level="DEBUG")
     parser = get_parser()
     opts = parser.parse_args(args=args)
-    job, nodes, weights, costs = init(opts.cfg_file, opts.input_file)
-    service = PathService(job, nodes, weights, costs)
+    logging.basicConfig(level=max(logging.DEBUG, logging.WARNING - 10 * opts.verbose))
+    if opts.batch and opts.stats:
+        parser.error("--stats is not available in batch mode.")
+    if opts.itinerary and (opts.batch or not ENGINES[opts.engine].TRACKS_PATH):
+        parser.error(f"--itinerary is not available in batch mode nor with {opts.engine} engine.")
+    if opts.profile or opts.stats:
+        # Only measures of this run are reported.
+        registry.enabled = True
+        registry.reset()
+
+    if opts.batch:
+        run = partial(_batch, opts.cfg_file, opts.input_file, opts.engine, opts.workers)
+    else:
+        run = partial(
+            _search,
+            opts.cfg_file,
+            opts.input_file,
+            opts.engine,
+            stats=opts.stats is not None,
+            itinerary=opts.itinerary,
+        )
+    if opts.profile is None:
+        return run()
+    with cProfile.Profile() as profiler:
+        code = run()
+    profiler.dump_stats(opts.profile)
+    print(f"{'phase':<16} {'runs':>5} {'duration':>10}", file=sys.stderr)
+    for phase, (count, duration) in registry.phase_durations().items():
+        print(f"{phase:<16} {count:>5} {duration:>9.3f}s", file=sys.stderr)
+    print(f"Profile written to {opts.profile}, read it with `python -m pstats {opts.profile}`.", file=sys.stderr)
+    return code
+
+
+def _search(cfg_file: str, input_file: str, engine: str, *, stats: bool = False, itinerary: bool = False) -> int:
+    job, graph, costs = init(cfg_file, input_file)
+    service = ENGINES[engine](job, graph, costs, track_path=itinerary)
     job.result = service.search_path()
-    print(job.get_odds().odds)
+    odds = job.get_odds().odds
+    if not stats and not itinerary:
+        print(odds)
+        return 0
+    output: dict[str, Any] = {"odds": odds}
+    if itinerary:
+        output["itinerary"] = [step.model_dump(mode="json") for step in service.get_itinerary()]
+    if stats:
+        output |= _search_stats(service, len(graph), graph.nb_edges)
+    print(json.dumps(output))
+    return 0
+
+
+def _search_stats(service: PathService, nb_nodes: int, nb_edges: int) -> dict[str, Any]:
+    counters = service.counters
+    # Largest resident memory of the process, in KiB on Linux but in bytes on macOS.
+    peak_memory = None
+    if resource is not None:
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "engine": type(service).__name__,
+        "nodes": nb_nodes,
+        "edges": nb_edges,
+        # The search only runs on the part of the graph usable in time.
+        "nodes_after_pruning": len(service.graph),
+        "edges_after_pruning": service.graph.nb_edges,
+        "days": counters.days,
+        "days_reused": counters.reused_days,
+        "states_created": counters.expanded,
+        "states_pruned": counters.pruned,
+        "peak_states": counters.peak_states,
+        # Memory of the itinerary tracking, 0 if not tracked.
+        "back_pointers_bytes": service.predecessors.nbytes if service.predecessors is not None else 0,
+        "peak_memory_bytes": peak_memory,
+        "phases": {phase: duration for phase, (_, duration) in registry.phase_durations().items()},
+    }
+
+
+def _batch(cfg_file: str, input_file: str, engine: str, workers: int) -> int:
+    # The universe is loaded once for all the communications.
+    job, graph, _ = init(cfg_file)
+    try:
+        input_path = search_file(Path(input_file), [Path(cfg_file).parent, DB_DIR])
+    except FileNotFoundError:
+        logger.warning(f"Input file not found: {input_file}.")
+        return 1
+    with input_path.open() as lines:
+        communications = parse_communications(lines)
+        if workers > 1:
+            with BatchExecutor(job, graph, ENGINES[engine], workers) as executor:
+                for odds in executor.map(communications, chunksize=16):
+                    print(odds.odds, flush=True)
+        else:
+            for odds in odds_of_communications(job, graph, communications, ENGINES[engine]):
+                print(odds.odds, flush=True)
     return 0
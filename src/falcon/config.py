@@ -1,13 +1,17 @@
-from collections import defaultdict
-from collections.abc import Sequence
+from collections.abc import Iterable, Iterator, Sequence
+from gzip import BadGzipFile
 from logging import getLogger
 from pathlib import Path
 from typing import TypeVar
+from zipfile import BadZipFile
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from falcon import DB_DIR, DB_PLACEHOLDER, PROJECT_DIR
-from falcon.adapter import Costs, Job, Nodes, Weights
+from falcon.adapter import Costs, Job
+from falcon.graph import Graph
+from falcon.ingest import ingest_communication
+from falcon.metrics import registry
 from falcon.models import Communication, Falcon
 
 logger = getLogger(__name__)
@@ -41,6 +45,23 @@ def parse_file(filepath: Path, model: type[M]) -> M | None:
     return inst
 
 
+def parse_communications(lines: Iterable[str]) -> Iterator[Communication]:
+    """Parse many communications given as a JSON array, or as JSON lines parsed one at a time.
+
+    Raise ValidationError on the first invalid communication.
+    """
+    lines = iter(lines)
+    for line in lines:
+        if not line.strip():
+            continue
+        if line.lstrip().startswith("["):
+            array = line + "".join(lines)
+            yield from TypeAdapter(list[Communication]).validate_json(array, context={"extra": "forbid"})
+            return
+        yield Communication.model_validate_json(line, context={"extra": "forbid"})
+
+
+@registry.timed("parse_config")
 def init_config(cfg_path: str | Path) -> Falcon:
     cfg_path = Path(cfg_path)
     try:
@@ -63,22 +84,23 @@ def init_config(cfg_path: str | Path) -> Falcon:
     return cfg
 
 
-def init(cfg_path: str | Path, input_file: str | Path | None = None) -> tuple[Job, Nodes, Weights, Costs]:
+def init(cfg_path: str | Path, input_file: str | Path | None = None) -> tuple[Job, Graph, Costs]:
     cfg_path = Path(cfg_path)
     config = init_config(cfg_path)
 
     job = Job.from_config(config)
-    nodes, edges = job.generate_graph()
-    costs: Costs = defaultdict(set)
+    graph = job.generate_graph()
+    costs = Costs()
 
     if input_file:
         try:
             input_file = Path(input_file)
             input_file = search_file(input_file, [cfg_path.parent, DB_DIR])
-            if input_ := parse_file(input_file, Communication):
-                costs = job.add_constraints(input_)
+            costs = ingest_communication(input_file, job, graph)
+        except (ValueError, BadZipFile, BadGzipFile) as error:
+            logger.warning(f"Didn't manage to read given file: {input_file}.\nUnexpected error: {error}")
         except FileNotFoundError:
             # TODO: Add placeholder for input file to demo the app?
             logger.warning(f"Input file not found: {input_file}.")
 
-    return job, nodes, edges, costs
+    return job, graph, costs
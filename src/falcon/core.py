@@ -1,46 +1,268 @@
-from dataclasses import replace
+import os
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, replace
+from heapq import heappop, heappush
 from logging import getLogger
 from math import inf
+from typing import Any, ClassVar
 
-from falcon.adapter import Costs, Job, Nodes, PathStats, Weights
+import numpy as np
+
+from falcon.adapter import Costs, HunterIndex, Job, PathStats
+from falcon.cache import LruCache, nbytes
+from falcon.graph import Graph
+from falcon.metrics import ProgressReporter, SearchCounters, registry
+from falcon.models import Communication, SafePath, SearchProgress, Step, StepAction
 
 logger = getLogger(__name__)
 
+# Bytes of the checkpoints kept for searches to resume from, least recently used ones being dropped first.
+CHECKPOINT_BYTES = int(os.environ.get("MILLENIUM_FALCON_CHALLENGE__CHECKPOINT_BYTES", str(2**26)))
+
+# Arrays of (node, cost, available weight)
+Labels = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class DayLayers:
+    """Destinations reachable on the last days of a search, in a ring buffer.
+
+    A layer can only be reached again through an edge, so only as many layers as the longest usable edge are kept:
+    memory doesn't depend on the countdown. Layers of days out of the buffer are empty.
+    """
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.nb_days = 0
+        # Number of destinations stored in the buffer.
+        self.nb_states = 0
+        self._layers: list[dict[int, PathStats]] = [{} for _ in range(depth)]
+        self._before: tuple[int, list[dict[int, PathStats]]] | None = None
+
+    def __len__(self) -> int:
+        return self.nb_days
+
+    def __getitem__(self, day: int) -> dict[int, PathStats]:
+        if max(0, self.nb_days - self.depth) <= day < self.nb_days:
+            return self._layers[day % self.depth]
+        return {}
+
+    def append(self, layer: dict[int, PathStats]) -> None:
+        self.nb_states += len(layer) - len(self._layers[self.nb_days % self.depth])
+        self._layers[self.nb_days % self.depth] = layer
+        self.nb_days += 1
+        self._before = None
+
+    def before(self, day: int) -> list[dict[int, PathStats]]:
+        """Return the layers of the days before the given one: the i-th one is i days before it."""
+        if self._before is None or self._before[0] != day:
+            self._before = day, [self[day - i] for i in range(self.depth)]
+        return self._before[1]
+
+    def snapshot(self) -> tuple[int, list[dict[int, PathStats]]]:
+        """Return the layers in the buffer, which are never modified once appended so they can be shared."""
+        return self.nb_days, list(self._layers)
+
+    def restore(self, snapshot: tuple[int, list[dict[int, PathStats]]]) -> None:
+        self.nb_days, layers = snapshot
+        self._layers = list(layers)
+        self.nb_states = sum(map(len, layers))
+        self._before = None
+
+
+class BackPointers:
+    """Node each state kept by a search comes from, and the day it left it, in compact integer arrays by day.
+
+    A state takes 12 bytes - its node, the previous node and the departure day as int32 - instead of a few hundred
+    in a dict of tuples, so the memory is bounded by 12 bytes times the states kept, at most the planets of the
+    trimmed graph times the countdown. Arrays of a day are never modified once added, so checkpoints share them.
+    """
+
+    def __init__(self, days: dict[int, np.ndarray] | None = None):
+        # (nodes, previous nodes, departure days) rows sorted by node, by arrival day.
+        self._days: dict[int, np.ndarray] = days or {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(pointers.nbytes for pointers in self._days.values())
+
+    def add(
+        self,
+        day: int,
+        nodes: Sequence[int] | np.ndarray,
+        origins: Sequence[int] | np.ndarray,
+        departures: Sequence[int] | np.ndarray,
+    ) -> None:
+        """Add where the states kept on a day come from."""
+        if len(nodes):
+            pointers = np.array([nodes, origins, departures], dtype=np.int32)
+            self._days[day] = pointers[:, np.argsort(pointers[0], kind="stable")]
+
+    def get(self, day: int, node: int) -> tuple[int, int]:
+        """Return the node the state of the node on that day comes from, and the day it left it."""
+        nodes, origins, departures = self._days[day]
+        i = int(np.searchsorted(nodes, node))
+        if i == len(nodes) or nodes[i] != node:
+            raise KeyError((day, node))
+        return int(origins[i]), int(departures[i])
+
+    def until(self, day: int) -> "BackPointers":
+        """Return the pointers of the states kept up to the given day, sharing their arrays."""
+        return BackPointers({arrival: pointers for arrival, pointers in self._days.items() if arrival <= day})
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """States of a search saved every few days, for a next search of the same job to resume from.
+
+    Layers before the first day bounty hunters differ are the same, as well as the best path found before it,
+    so a search can restart from the last state saved before that day.
+    """
+
+    hunters: HunterIndex
+    # (day, state of the engine at the end of that day) by increasing day.
+    states: list[tuple[int, Any]]
+    predecessors: BackPointers | None
+
+    @property
+    def nbytes(self) -> int:
+        predecessors = self.predecessors.nbytes if self.predecessors is not None else 0
+        return self.hunters.nbytes + nbytes(self.states) + predecessors
+
+
+# Last checkpoint of each job by engine, for searches on graphs of the same fingerprint.
+checkpoints = LruCache(CHECKPOINT_BYTES)
+
 
 class PathService:
-    def __init__(self, job: Job, nodes: Nodes, weights: Weights, costs: Costs):
-        # TODO: use weakref logic to resolve weights and costs with less impact on memory.
-        self.job, self.nodes, self.weights, self.costs = job, nodes, weights, costs
+    # Number of states saved along a search, whatever the countdown, to bound the memory of checkpoints.
+    CHECKPOINTS: ClassVar[int] = 16
+    # Whether the engine can track the path it finds.
+    TRACKS_PATH: ClassVar[bool] = True
+
+    def __init__(
+        self,
+        job: Job,
+        graph: Graph,
+        costs: Costs,
+        *,
+        track_path: bool = False,
+        resume: bool = False,
+        progress: Callable[[SearchProgress], None] | None = None,
+    ):
+        if track_path and not self.TRACKS_PATH:
+            raise ValueError(f"Path is not tracked by {type(self).__name__}, please use another engine.")
+        # TODO: use weakref logic to resolve graph and costs with less impact on memory.
+        # Search only on the part of the graph usable for the job.
+        graph = job.trim_graph(graph)
+        self.job, self.graph, self.costs = job, graph, costs
+        self.hunters = costs.index(graph)
+        # Views iterating over python integers without copying the graph arrays.
+        self._offsets = graph.offsets.tolist()
+        self._neighbors, self._travel_times = graph.neighbors.data, graph.travel_times.data
 
         # Represents the best result for the current search.
         self.least_expensive_travel = PathStats()
-        # For each day, stores the destinations reachable and the associated stats.
-        self.least_expensive_destinations: list[dict[str, PathStats]] = []
+        # For each of the last days, stores the destinations reachable by node id and the associated stats.
+        # An edge longer than the autonomy can never be crossed, so it doesn't need older layers.
+        longest_edge = min(int(graph.travel_times.max(initial=0)), job.max_available_weight)
+        self.least_expensive_destinations = DayLayers(max(longest_edge, job.WAITING_ACTION_WEIGHT) + 1)
+        # When tracking path, stores the predecessor and departure day of each (arrival day, node) state kept.
+        self.predecessors = BackPointers() if track_path else None
+        # Pointers of the day being searched, gathered before being stored at once.
+        self._pointers: tuple[list[int], list[int], list[int]] = [], [], []
+        # What the last search did.
+        self.counters = SearchCounters()
+        # Called back with the progress of the search every few tenths of a second, if given.
+        self.reporter = ProgressReporter(progress, job.max_total_weight) if progress is not None else None
+        # States saved along the search if resuming, e.g. in the app where searches repeat, then kept as a checkpoint
+        # for next searches to resume from.
+        self.resume = resume
+        self._states: list[tuple[int, Any]] = []
+        self._interval = max(1, job.max_total_weight // self.CHECKPOINTS)
 
     def _validate_params(self) -> None:
-        if self.job.origin not in self.nodes:
+        if self.job.origin not in self.graph:
             raise ValueError(f"{self.job.origin=} if not is the given graph.")
-        if self.job.destination not in self.nodes:
+        if self.job.destination not in self.graph:
             raise ValueError(f"{self.job.destination=} if not is the given graph.")
 
-    def get_cost_to_reach(self, destination: str, at: int) -> PathStats | None:
-        best_stats = PathStats()
-        for origin, weight in self.weights[destination].items():
-            if at - weight >= 0 and origin in self.least_expensive_destinations[at - weight]:
-                stats = self.least_expensive_destinations[at - weight][origin]
+    def _deadlines(self) -> np.ndarray:
+        """Return the last day each node can be reached on, to still reach the destination before the countdown.
+
+        States beyond it can be pruned without changing the result, as well as all the states they lead to.
+        """
+        destination = self.graph.index(self.job.destination)
+        deadlines = self.job.max_total_weight - self.graph.travel_days_to(destination, self.job.max_available_weight)
+        logger.info(f"{np.count_nonzero(deadlines >= 0)}/{len(self.graph)} nodes can reach destination in time.")
+        return deadlines
+
+    def _checkpoint_key(self) -> Hashable:
+        job = self.job
+        return (
+            self.graph.fingerprint,
+            type(self).__name__,
+            job.origin,
+            job.destination,
+            job.max_available_weight,
+            job.max_total_weight,
+        )
+
+    def _resume(self) -> tuple[int, Any]:
+        """Return the last state saved by a previous search of the job before bounty hunters differ, and its day.
+
+        Day 0 and no state are returned if there is none to resume from.
+        """
+        checkpoint: Checkpoint | None = checkpoints.get(self._checkpoint_key()) if self.resume else None
+        if checkpoint is None or (self.predecessors is not None and checkpoint.predecessors is None):
+            return 0, None
+        changed = self.hunters.first_difference(checkpoint.hunters)
+        self._states = [(day, state) for day, state in checkpoint.states if changed is None or day < changed]
+        if not self._states:
+            return 0, None
+        day, state = self._states[-1]
+        if self.predecessors is not None and checkpoint.predecessors is not None:
+            self.predecessors = checkpoint.predecessors.until(day)
+        self.counters.reused_days = day
+        logger.info(f"Search resumed on day {day}/{self.job.max_total_weight} from a previous one.")
+        return day, state
+
+    def _is_checkpoint_day(self, day: int) -> bool:
+        """Return whether the state of the search at the end of the day is to be saved."""
+        return self.resume and (day % self._interval == 0 or day == self.job.max_total_weight)
+
+    def _store_checkpoint(self) -> None:
+        # Replaces the previous one, only the last search of a job is kept.
+        if self.resume:
+            checkpoints[self._checkpoint_key()] = Checkpoint(self.hunters, self._states, self.predecessors)
+
+    def get_cost_to_reach(self, destination: int, at: int) -> PathStats | None:
+        best_stats, best_origin, best_departure = PathStats(), destination, at
+        layers = self.least_expensive_destinations.before(at)
+        start, end = self._offsets[destination], self._offsets[destination + 1]
+        for origin, weight in zip(self._neighbors[start:end], self._travel_times[start:end], strict=True):
+            # Layers of days before departure or out of the buffer are empty.
+            if weight < len(layers) and origin in layers[weight]:
+                stats = layers[weight][origin]
                 if origin == destination:  # Waiting action
                     stats = replace(stats, available_weight=self.job.max_available_weight)
                 if stats.available_weight >= weight:
                     new_stats = PathStats(
-                        cost=stats.cost + int(at in self.costs.get(destination, {})),
+                        cost=stats.cost + self.hunters.encounter(destination, at),
                         total_weight=stats.total_weight + weight,
                         available_weight=stats.available_weight - weight,
                     )
-                    best_stats = min(best_stats, new_stats)
+                    if new_stats < best_stats:
+                        best_stats, best_origin, best_departure = new_stats, origin, at - weight
         # Return only if reaching this destination with given weight is possible
         # Prune if leading to a worse solution
-        return best_stats if best_stats.cost < inf and best_stats < self.least_expensive_travel else None
+        if best_stats.cost == inf or not best_stats < self.least_expensive_travel:
+            return None
+        if self.predecessors is not None:
+            for pointers, value in zip(self._pointers, (destination, best_origin, best_departure), strict=True):
+                pointers.append(value)
+        return best_stats
 
+    @registry.timed("search_path")
     def search_path(self) -> PathStats:
         """
         Search for a path with the following criteria:
@@ -55,24 +277,473 @@ class PathService:
 
         logger.info(f"Searching for path from {self.job.origin} to {self.job.destination}...")
 
-        self.least_expensive_destinations.append(
-            {
-                self.job.origin: PathStats(
-                    cost=int(0 in self.costs[self.job.origin]),
-                    total_weight=0,
-                    available_weight=self.job.max_available_weight,
-                ),
-            },
-        )
+        origin, destination = self.graph.index(self.job.origin), self.graph.index(self.job.destination)
+        counters = self.counters = SearchCounters(peak_states=1)
+        reporter = self.reporter
+        resumed, state = self._resume()
+        if state is None:
+            self.least_expensive_destinations.append(
+                {
+                    origin: PathStats(
+                        cost=self.hunters.encounter(origin, 0),
+                        total_weight=0,
+                        available_weight=self.job.max_available_weight,
+                    ),
+                },
+            )
+        else:
+            self.least_expensive_destinations.restore(state[0])
+            self.least_expensive_travel = state[1]
+        counters.days = self.job.max_total_weight - resumed
 
-        # TODO: Use vectorized arrays of numpy to boost performance of this algorithm.
-        for day in range(1, self.job.max_total_weight + 1):
-            destinations = {}
-            for node in self.nodes:
-                if cost := self.get_cost_to_reach(node, day):
-                    destinations[node] = cost
+        deadlines = self._deadlines()
+        nodes = np.flatnonzero(deadlines >= 1).tolist()
+        deadlines = deadlines.tolist()
+        for day in range(resumed + 1, self.job.max_total_weight + 1):
+            destinations, evaluated = {}, 0
+            for node in nodes:
+                if day <= deadlines[node]:
+                    evaluated += 1
+                    if cost := self.get_cost_to_reach(node, day):
+                        destinations[node] = cost
             self.least_expensive_destinations.append(destinations)
-            if self.job.destination in destinations:
-                self.least_expensive_travel = min(self.least_expensive_travel, destinations[self.job.destination])
+            if self.predecessors is not None:
+                self.predecessors.add(day, *self._pointers)
+                self._pointers = [], [], []
+            counters.expanded += evaluated
+            counters.pruned += evaluated - len(destinations)
+            counters.peak_states = max(counters.peak_states, self.least_expensive_destinations.nb_states)
+            if destination in destinations:
+                self.least_expensive_travel = min(self.least_expensive_travel, destinations[destination])
+            if self._is_checkpoint_day(day):
+                self._states.append((day, (self.least_expensive_destinations.snapshot(), self.least_expensive_travel)))
+            if reporter is not None and reporter.due():
+                reporter.report(day, self.least_expensive_destinations.nb_states, self.least_expensive_travel.cost)
+        self._store_checkpoint()
+        registry.record_search(type(self).__name__, counters)
+        if reporter is not None:
+            reporter.done(self.least_expensive_travel.cost)
         logger.info(f"Safest solution found: {self.least_expensive_travel}")
         return self.least_expensive_travel
+
+    def get_itinerary(self) -> list[Step]:
+        """Return the steps of the safest path found from departure to arrival, with days waited and hunters met."""
+        if self.predecessors is None:
+            raise ValueError("Path is not tracked, please enable track_path.")
+        if self.least_expensive_travel.cost == inf:
+            return []
+        day, node = int(self.least_expensive_travel.total_weight), self.graph.index(self.job.destination)
+        steps = [(day, node)]
+        while day > 0:
+            node, day = self.predecessors.get(day, node)
+            steps.append((day, node))
+        steps.reverse()
+        return [
+            Step(
+                day=day,
+                planet=self.graph.name(node),
+                action=StepAction.DEPART
+                if i == 0
+                else StepAction.WAIT
+                if node == steps[i - 1][1]
+                else StepAction.TRAVEL,
+                hunted=bool(self.hunters.encounter(node, day)),
+            )
+            for i, (day, node) in enumerate(steps)
+        ]
+
+
+class VectorizedPathService(PathService):
+    """Same search as PathService, each day layer being computed at once with NumPy.
+
+    The stats of a node on a given day are encoded in a single integer key, ordered like PathStats for a given day:
+    `cost * (autonomy + 1) + autonomy - available_weight`. Keys of a layer are stored in an array indexed by node id,
+    inside a ring buffer only as deep as the longest usable edge: older layers can't be reached anymore.
+    Candidates coming through every edge are then reduced per destination.
+    """
+
+    # Key of a node which can't be reached on a given day, far enough from int64 limit to add weights to it.
+    UNREACHED: ClassVar[int] = np.iinfo(np.int64).max // 2
+
+    def _edge_arrays(self, deadlines: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return (origin, destination, weight) arrays sorted by destination with their offsets, for usable edges."""
+        # An edge longer than the autonomy can never be crossed, nor an edge between nodes too far from destination.
+        destinations = self.graph.sources()
+        usable = (
+            (self.graph.travel_times <= self.job.max_available_weight)
+            & (deadlines[destinations] >= 1)
+            & (deadlines[self.graph.neighbors] >= 0)
+        )
+        destinations = destinations[usable]
+        offsets = np.zeros(len(self.graph) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(destinations, minlength=len(self.graph)), out=offsets[1:])
+        return self.graph.neighbors[usable], destinations, self.graph.travel_times[usable].astype(np.int64), offsets
+
+    @registry.timed("search_path")
+    def search_path(self) -> PathStats:
+        self._validate_params()
+
+        logger.info(f"Searching for path from {self.job.origin} to {self.job.destination}...")
+
+        deadlines = self._deadlines()
+        origins, destinations, weights, offsets = self._edge_arrays(deadlines)
+        is_waiting = origins == destinations
+        base = self.job.max_available_weight + 1
+
+        # Rows are days modulo the ring depth.
+        depth = int(weights.max(initial=0)) + 1
+        keys = np.full((depth, len(self.graph)), self.UNREACHED, dtype=np.int64)
+        origin = self.graph.index(self.job.origin)
+        keys[0, origin] = self.hunters.encounter(origin, 0) * base
+        counters = self.counters = SearchCounters(peak_states=1)
+        destination, best = self.graph.index(self.job.destination), self.UNREACHED
+        resumed, state = self._resume()
+        if state is not None:
+            keys = np.full((depth, len(self.graph)), self.UNREACHED, dtype=np.int64)
+            keys.flat[state[0]] = state[1]
+            best, self.least_expensive_travel = state[2], state[3]
+        counters.days = self.job.max_total_weight - resumed
+
+        # Empty destinations are handled by reducing on a trailing unreached candidate.
+        starts, empty = offsets[:-1], offsets[:-1] == offsets[1:]
+        encounters = np.zeros(len(self.graph), dtype=np.int64)
+        # States stored in each row of the ring, only counted if recorded as it costs a pass over the arrays each day.
+        stored = np.count_nonzero(keys != self.UNREACHED, axis=1)
+        for day in range(resumed + 1, self.job.max_total_weight + 1):
+            # Layers of days before departure are never written, so they stay unreached.
+            previous = keys[(day - weights) % depth, origins]
+            spent = previous % base
+            reachable = (previous != self.UNREACHED) & (is_waiting | (spent + weights < base))
+
+            encounters[:] = 0
+            encounters[self.hunters.nodes(day)] = base
+            # Waiting refuels before the waiting weight is spent.
+            candidates = np.where(is_waiting, previous - spent, previous) + weights + encounters[destinations]
+            candidates = np.append(np.where(reachable, candidates, self.UNREACHED), self.UNREACHED)
+            layer = np.where(empty, self.UNREACHED, np.minimum.reduceat(candidates, starts))
+            # Prune if leading to a worse solution or too late to reach destination
+            pruned = (layer // base >= best // base) | (day > deadlines)
+            if registry.enabled:
+                counters.expanded += int(np.count_nonzero(layer != self.UNREACHED))
+                counters.pruned += int(np.count_nonzero(pruned & (layer != self.UNREACHED)))
+            layer[pruned] = self.UNREACHED
+            keys[day % depth] = layer
+            if self.predecessors is not None:
+                # The first edge bringing the best candidate, as the reference engine keeps the first best one.
+                # Edges not bringing it get a trailing id, also reduced on for empty destinations.
+                nodes = np.flatnonzero(layer != self.UNREACHED)
+                best_edges = candidates[:-1] == np.repeat(layer, np.diff(offsets))
+                edge_ids = np.append(np.where(best_edges, np.arange(len(origins)), len(origins)), len(origins))
+                edges = np.minimum.reduceat(edge_ids, starts)[nodes]
+                self.predecessors.add(day, nodes, origins[edges], day - weights[edges])
+            if registry.enabled:
+                stored[day % depth] = np.count_nonzero(layer != self.UNREACHED)
+                counters.peak_states = max(counters.peak_states, int(stored.sum()))
+
+            if (best_key := layer[destination]) != self.UNREACHED:
+                best = best_key
+                self.least_expensive_travel = PathStats(
+                    cost=int(best // base),
+                    total_weight=day,
+                    available_weight=int(base - 1 - best % base),
+                )
+            if self._is_checkpoint_day(day):
+                # Only the states next days still read: the row of the oldest day is overwritten next.
+                saved = keys != self.UNREACHED
+                saved[(day + 1) % depth] = False
+                cells = np.flatnonzero(saved)
+                self._states.append((day, (cells, keys.flat[cells], best, self.least_expensive_travel)))
+            if self.reporter is not None and self.reporter.due():
+                frontier = int(np.count_nonzero(keys != self.UNREACHED))
+                self.reporter.report(day, frontier, self.least_expensive_travel.cost)
+        self._store_checkpoint()
+        registry.record_search(type(self).__name__, counters)
+        if self.reporter is not None:
+            self.reporter.done(self.least_expensive_travel.cost)
+        logger.info(f"Safest solution found: {self.least_expensive_travel}")
+        return self.least_expensive_travel
+
+
+class SparsePathService(PathService):
+    """Same search as PathService, pushing the states of each day through their edges instead of pulling every node.
+
+    Only the nodes reached on a day are visited, so a search costs the edges of the states it reaches rather than
+    the nodes of the graph times the days of the countdown. States are encoded in integer keys as in
+    VectorizedPathService, and wait for their day in a ring buffer of dicts only as deep as the longest usable edge.
+    """
+
+    UNREACHED: ClassVar[int] = VectorizedPathService.UNREACHED
+
+    @registry.timed("search_path")
+    def search_path(self) -> PathStats:
+        self._validate_params()
+
+        logger.info(f"Searching for path from {self.job.origin} to {self.job.destination}...")
+
+        origin, destination = self.graph.index(self.job.origin), self.graph.index(self.job.destination)
+        autonomy, base = self.job.max_available_weight, self.job.max_available_weight + 1
+        offsets, neighbors, travel_times = self._offsets, self._neighbors, self._travel_times
+        deadlines = self._deadlines().tolist()
+        depth = self.least_expensive_destinations.depth
+        # Keys of the states arriving on each of the next days by node, and where they come from when tracking path.
+        pending: list[dict[int, int]] = [{} for _ in range(depth)]
+        sources: list[dict[int, tuple[int, int]]] = [{} for _ in range(depth)]
+        pending[0][origin] = self.hunters.encounter(origin, 0) * base
+        counters = self.counters = SearchCounters(peak_states=1)
+        start, state = self._resume()
+        if state is not None:
+            pending, sources = [dict(keys) for keys in state[0]], [dict(origins) for origins in state[1]]
+            self.least_expensive_travel = state[2]
+            start += 1
+        stored, predecessors, reporter = sum(map(len, pending)), self.predecessors, self.reporter
+
+        for day in range(start, self.job.max_total_weight + 1):
+            # No state left to push: next days are empty.
+            if not stored:
+                break
+            arrived, origins = pending[day % depth], sources[day % depth]
+            pending[day % depth], sources[day % depth] = {}, {}
+            stored -= len(arrived)
+            layer = {}
+            if day == 0:
+                layer = arrived
+            else:
+                counters.days += 1
+                best = self.least_expensive_travel.cost
+                for node, key in arrived.items():
+                    stats_key = key + self.hunters.encounter(node, day) * base
+                    # Prune if leading to a worse solution
+                    if stats_key // base < best:
+                        layer[node] = stats_key
+                counters.expanded += len(arrived)
+                counters.pruned += len(arrived) - len(layer)
+                if predecessors is not None and layer:
+                    predecessors.add(day, list(layer), *zip(*(origins[node] for node in layer), strict=True))
+                if (best_key := layer.get(destination)) is not None:
+                    self.least_expensive_travel = PathStats(best_key // base, day, autonomy - best_key % base)
+
+            for node, key in layer.items():
+                cost_key, available_weight = key - key % base, autonomy - key % base
+                for neighbor, weight in zip(
+                    neighbors[offsets[node] : offsets[node + 1]],
+                    travel_times[offsets[node] : offsets[node + 1]],
+                    strict=True,
+                ):
+                    # Waiting action refuels before the waiting weight is spent.
+                    remaining = (autonomy if neighbor == node else available_weight) - weight
+                    # Too late to reach destination
+                    if remaining < 0 or day + weight > deadlines[neighbor]:
+                        continue
+                    candidate, next_day = cost_key + autonomy - remaining, pending[(day + weight) % depth]
+                    previous = next_day.get(neighbor, self.UNREACHED)
+                    if candidate < previous:
+                        stored += previous == self.UNREACHED
+                        next_day[neighbor] = candidate
+                        if predecessors is not None:
+                            sources[(day + weight) % depth][neighbor] = node, day
+            counters.peak_states = max(counters.peak_states, stored + len(layer))
+            if day > 0 and self._is_checkpoint_day(day):
+                snapshot = [dict(keys) for keys in pending], [dict(origins) for origins in sources]
+                self._states.append((day, (*snapshot, self.least_expensive_travel)))
+            if reporter is not None and reporter.due():
+                reporter.report(day, stored + len(layer), self.least_expensive_travel.cost)
+        self._store_checkpoint()
+        registry.record_search(type(self).__name__, counters)
+        if reporter is not None:
+            reporter.done(self.least_expensive_travel.cost)
+        logger.info(f"Safest solution found: {self.least_expensive_travel}")
+        return self.least_expensive_travel
+
+
+class LabelSettingPathService(PathService):
+    """Dijkstra-like search over (node, day, available_weight) states, with early termination.
+
+    States are expanded by increasing (cost, total_weight, -available_weight), as PathStats are ordered: the first
+    state popped on the destination is the safest path, so the search stops there. It only explores the states
+    cheaper than the solution instead of sweeping every day of the countdown.
+    Unlike the day-by-day engines, several states are kept for a node on a given day - as long as they are not
+    dominated by a cheaper one with more available weight - so it may find safer paths than they do.
+    """
+
+    TRACKS_PATH: ClassVar[bool] = False
+
+    @registry.timed("search_path")
+    def search_path(self) -> PathStats:
+        self._validate_params()
+
+        logger.info(f"Searching for path from {self.job.origin} to {self.job.destination}...")
+
+        origin, destination = self.graph.index(self.job.origin), self.graph.index(self.job.destination)
+        autonomy, deadlines = self.job.max_available_weight, self._deadlines().tolist()
+        # Largest available weight left on a node at a given day by an expanded state, thus as cheap or cheaper.
+        expanded: dict[tuple[int, int], int] = {}
+        # Available weight is negated to pop the state maximizing it first.
+        queue = [(self.hunters.encounter(origin, 0), 0, -autonomy, origin)]
+        counters, reporter = SearchCounters(peak_states=1), self.reporter
+        self.counters = counters
+        while queue:
+            cost, day, available_weight, node = heappop(queue)
+            available_weight = -available_weight
+            if expanded.get((node, day), -1) >= available_weight:
+                counters.pruned += 1
+                continue
+            expanded[node, day] = available_weight
+            counters.days = max(counters.days, day)
+            # Like other engines, the destination only counts once the travel has started.
+            if node == destination and day > 0:
+                self.least_expensive_travel = PathStats(cost, day, available_weight)
+                break
+
+            start, end = self._offsets[node], self._offsets[node + 1]
+            for neighbor, weight in zip(self._neighbors[start:end], self._travel_times[start:end], strict=True):
+                # Waiting action refuels before the waiting weight is spent.
+                remaining = (autonomy if neighbor == node else available_weight) - weight
+                if remaining < 0 or day + weight > deadlines[neighbor]:
+                    continue
+                arrival = day + weight
+                heappush(queue, (cost + self.hunters.encounter(neighbor, arrival), arrival, -remaining, neighbor))
+            counters.peak_states = max(counters.peak_states, len(expanded) + len(queue))
+            # States are popped by cost, so no path is known before the end.
+            if reporter is not None and reporter.due():
+                reporter.report(day, len(queue), inf)
+        counters.expanded = len(expanded) + counters.pruned
+        registry.record_search(type(self).__name__, counters)
+        if reporter is not None:
+            reporter.done(self.least_expensive_travel.cost)
+        logger.info(f"Safest solution found: {self.least_expensive_travel} after {len(expanded)} states expanded.")
+        return self.least_expensive_travel
+
+
+class ParetoPathService(PathService):
+    """Day-by-day search keeping every non-dominated (cost, available_weight) label of a node on a given day.
+
+    A label is dominated by another label of the same node and day which is as cheap, with as much available weight.
+    As available weights are bounded by the autonomy, a node has at most autonomy + 1 labels on a given day.
+    Labels are stored in flat arrays of (node, cost, available weight) sorted by node. Each day layer is pushed
+    through the edges of its nodes to the day they arrive at, where pending labels are reduced to their Pareto front.
+    The search is exact, like the label-setting engine, where the single label engines may miss the safest path.
+    """
+
+    TRACKS_PATH: ClassVar[bool] = False
+
+    @staticmethod
+    def _pareto_front(labels: Labels, autonomy: int) -> Labels:
+        """Sort labels by node and keep only the non-dominated ones."""
+        nodes, costs, available_weights = labels
+        order = np.lexsort((-available_weights, costs, nodes))
+        nodes, costs, available_weights = nodes[order], costs[order], available_weights[order]
+        # A label is kept if it has more available weight than the cheaper labels of its node, sorted before it.
+        # Offsetting the available weights by node makes the running maximum restart on each node.
+        keys = nodes * (autonomy + 2) + available_weights
+        kept = keys > np.concatenate([[-1], np.maximum.accumulate(keys)[:-1]])
+        return nodes[kept], costs[kept], available_weights[kept]
+
+    def _push(self, labels: Labels, day: int, pending: dict[int, Labels]) -> None:
+        """Move labels of a day through every edge of their nodes, towards the days they arrive at."""
+        nodes, costs, available_weights = labels
+        starts, counts = self.graph.offsets[nodes], np.diff(self.graph.offsets)[nodes]
+        sources = np.repeat(np.arange(len(nodes)), counts)
+        edges = np.arange(counts.sum()) + np.repeat(starts - np.cumsum(counts) + counts, counts)
+        targets, weights = self.graph.neighbors[edges].astype(np.int64), self.graph.travel_times[edges]
+        # Waiting action refuels before the waiting weight is spent.
+        waiting = targets == nodes[sources]
+        remaining = np.where(waiting, self.job.max_available_weight, available_weights[sources]) - weights
+        usable = (remaining >= 0) & (day + weights <= self.deadlines[targets])
+        targets, weights, remaining, costs = targets[usable], weights[usable], remaining[usable], costs[sources[usable]]
+
+        for weight in np.unique(weights).tolist():
+            arriving = weights == weight
+            new_labels = targets[arriving], costs[arriving], remaining[arriving]
+            if day + weight in pending:
+                new_labels = (
+                    np.concatenate([pending[day + weight][0], new_labels[0]]),
+                    np.concatenate([pending[day + weight][1], new_labels[1]]),
+                    np.concatenate([pending[day + weight][2], new_labels[2]]),
+                )
+            # Encounters are added on arrival to every label of a node, it doesn't change their dominance.
+            pending[day + weight] = self._pareto_front(new_labels, self.job.max_available_weight)
+
+    @registry.timed("search_path")
+    def search_path(self) -> PathStats:
+        self._validate_params()
+
+        logger.info(f"Searching for path from {self.job.origin} to {self.job.destination}...")
+
+        origin, destination = self.graph.index(self.job.origin), self.graph.index(self.job.destination)
+        self.deadlines = self._deadlines()
+        cost = self.hunters.encounter(origin, 0)
+        labels = np.array([origin]), np.array([cost]), np.array([self.job.max_available_weight])
+        pending: dict[int, Labels] = {}
+        best_cost, counters = inf, SearchCounters(peak_states=1)
+        self.counters = counters
+        self._push(labels, 0, pending)
+        for day in range(1, self.job.max_total_weight + 1):
+            if day not in pending:
+                continue
+            nodes, costs, available_weights = pending.pop(day)
+            costs = costs + np.isin(nodes, self.hunters.nodes(day))
+            # Prune if leading to a worse solution
+            cheaper = costs < best_cost
+            labels = nodes[cheaper], costs[cheaper], available_weights[cheaper]
+            stored = len(labels[0]) + sum(len(pending_labels[0]) for pending_labels in pending.values())
+            counters.days += 1
+            counters.expanded += len(nodes)
+            counters.pruned += len(nodes) - len(labels[0])
+            counters.peak_states = max(counters.peak_states, stored)
+
+            # Labels of a node are sorted by cost then decreasing available weight: the first one is the best.
+            if len(arrived := np.flatnonzero(labels[0] == destination)):
+                best_cost = int(labels[1][arrived[0]])
+                self.least_expensive_travel = PathStats(best_cost, day, int(labels[2][arrived[0]]))
+            self._push(labels, day, pending)
+            if self.reporter is not None and self.reporter.due():
+                self.reporter.report(day, stored, best_cost)
+        registry.record_search(type(self).__name__, counters)
+        if self.reporter is not None:
+            self.reporter.done(best_cost)
+        logger.info(
+            f"Safest solution found: {self.least_expensive_travel} with at most {counters.peak_states} labels stored.",
+        )
+        return self.least_expensive_travel
+
+
+ENGINES: dict[str, type[PathService]] = {
+    "python": PathService,
+    "numpy": VectorizedPathService,
+    "sparse": SparsePathService,
+    "dijkstra": LabelSettingPathService,
+    "pareto": ParetoPathService,
+}
+
+
+def odds_of_communications(
+    job: Job,
+    graph: Graph,
+    communications: Iterable[Communication],
+    engine: type[PathService] = PathService,
+    progress: Callable[[SearchProgress], None] | None = None,
+) -> Iterator[SafePath]:
+    """Yield the odds of each communication in order, sharing the graph and what is cached on it between searches.
+
+    The progress of each search is reported to the callback if given.
+    """
+    return map(Job.odds, safest_paths(job, graph, communications, engine, progress))
+
+
+def safest_paths(
+    job: Job,
+    graph: Graph,
+    communications: Iterable[Communication],
+    engine: type[PathService] = PathService,
+    progress: Callable[[SearchProgress], None] | None = None,
+    *,
+    resume: bool = False,
+) -> Iterator[PathStats]:
+    """Yield the safest path found for each communication in order, as `odds_of_communications` does for its odds.
+
+    Searches resume from the checkpoint of a previous one if asked.
+    """
+    for communication in communications:
+        communication_job = job.model_copy()
+        costs = communication_job.add_constraints(communication, graph)
+        yield engine(communication_job, graph, costs, progress=progress, resume=resume).search_path()
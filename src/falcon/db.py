@@ -1,16 +1,25 @@
 import sqlite3
 from collections.abc import Generator
 from logging import getLogger
+from operator import itemgetter
 from pathlib import Path
 
+import numpy as np
+
 from falcon.models import Route
 
 logger = getLogger(__name__)
 
 
 class DbService:
+    # Number of rows fetched at once by bulk loading.
+    CHUNK_SIZE = 2**16
+    # Size of the memory map used by SQLite to read the DB.
+    MMAP_SIZE = 2**30
+
     def __init__(self, routes_db: Path):
-        self.connection = sqlite3.connect(routes_db)
+        self.connection = sqlite3.connect(f"{Path(routes_db).resolve().as_uri()}?mode=ro", uri=True)
+        self.connection.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
 
     def get_nodes(self) -> set[str]:
         with self.connection as conn:
@@ -32,3 +41,41 @@ class DbService:
             fields = [column[0] for column in cur.description]
             cur.row_factory = lambda cursor, row: Route(**dict(zip(fields, row, strict=False)))
             yield from cur
+
+    def get_routes(self) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Load all the routes in one pass, without building a model per row.
+
+        Return the sorted planet names, and the origin id, destination id and travel time of each route.
+        Raise ValueError if any route is invalid, as checked by Route model, on the interned planets and the arrays.
+        """
+        ids: dict[str, int] = {}
+        origins: list[np.ndarray] = []
+        destinations: list[np.ndarray] = []
+        travel_times: list[np.ndarray] = []
+        with self.connection as conn:
+            cur = conn.execute("select origin, destination, travel_time from routes")
+            while rows := cur.fetchmany(self.CHUNK_SIZE):
+                for ends, column in ((origins, 0), (destinations, 1)):
+                    planets = map(itemgetter(column), rows)
+                    ends.append(np.fromiter((ids.setdefault(name, len(ids)) for name in planets), np.int32, len(rows)))
+                try:
+                    travel_times.append(np.fromiter(map(itemgetter(2), rows), np.float64, len(rows)))
+                except (TypeError, ValueError):
+                    raise ValueError("Routes with non numeric travel time.") from None
+
+        if not all(isinstance(name, str) and name for name in ids):
+            raise ValueError("Routes with empty planet.")
+        travel_time = np.concatenate([np.empty(0), *travel_times])
+        if not np.all((travel_time > 0) & (travel_time == np.floor(travel_time))):
+            raise ValueError("Routes with non positive integer travel time.")
+
+        # Planets are interned in order of appearance: renumber them in name order.
+        names = sorted(ids)
+        ranks = np.empty(len(names), dtype=np.int32)
+        ranks[[ids[name] for name in names]] = np.arange(len(names), dtype=np.int32)
+        origin = ranks[np.concatenate([np.empty(0, dtype=np.int32), *origins])]
+        destination = ranks[np.concatenate([np.empty(0, dtype=np.int32), *destinations])]
+        # Routes longer than what int32 holds can't be crossed anyway.
+        travel_time = np.minimum(travel_time, np.iinfo(np.int32).max).astype(np.int32)
+        logger.info(f"{len(names)} nodes and {len(origin)} routes fetched from database.")
+        return names, origin, destination, travel_time
@@ -1,21 +1,20 @@
 import json
-from collections import defaultdict
 from enum import StrEnum
 from logging import getLogger
 
 import pydantic
 from fastapi import FastAPI
-from fastapi.encoders import jsonable_encoder
-from nicegui import app, events, ui
+from nicegui import app, events, run, ui
 from nicegui.events import ClickEventArguments
 
-from falcon.adapter import Job
-from falcon.core import PathService
-from falcon.models import Communication
+from falcon.models import Communication, JobInfo, JobStatus, SafePath
 from falcon.store import get_store
 
 logger = getLogger(__name__)
 
+# Seconds between two checks of the status of a running search.
+POLL_INTERVAL = 0.2
+
 
 class FilePickerStatus(StrEnum):
     info = "Upload the intercepted communication."
@@ -27,6 +26,8 @@ class FilePickerStatus(StrEnum):
 class FilePicker:
     def __init__(self):
         self.status = None
+        # Kept on the server for this tab only, until a search is started with it.
+        self.communication: Communication | None = None
         self.upload_element = (
             ui.upload(
                 # TODO: use run_io_bound to keep GUI responsive
@@ -54,25 +55,34 @@ class FilePicker:
         self.set_status(FilePickerStatus.info)
         self.upload_element.reset()
         self.file_preview.set_content("")
+        self.communication = None
 
     def upload_handler(self, event: events.UploadEventArguments) -> None:
         text = event.content.read().decode("utf-8", errors="replace")
         try:
-            communication = Communication.model_validate_json(text)
-            formatted = json.dumps(communication.model_dump(), indent=4)
+            self.communication = Communication.model_validate_json(text)
+            formatted = json.dumps(self.communication.model_dump(), indent=4)
             self.file_preview.set_content(formatted)
             self.set_status(FilePickerStatus.positive)
-
-            store = get_store()
-            user_job = store.job.copy()
-            app.storage.user["costs"] = jsonable_encoder(user_job.add_constraints(communication))
-            app.storage.user["job"] = jsonable_encoder(user_job.model_dump())
         except (json.decoder.JSONDecodeError, pydantic.ValidationError):
             logger.warning("Didn't manage to parse given file")
             self.file_preview.set_content(text)
             self.set_status(FilePickerStatus.warning)
 
 
+def job_text(info: JobInfo, result: SafePath | None) -> str:
+    """Return what to show of a search job: its odds once done, else its progress."""
+    if result is not None:
+        return f"{result.odds:.1%}"
+    if info.status == JobStatus.PENDING:
+        return f"Waiting, {info.queue_position} searches ahead..."
+    if info.status == JobStatus.RUNNING and info.progress is not None:
+        return f"Searching, day {info.progress.day}/{info.progress.countdown}..."
+    if info.status == JobStatus.RUNNING:
+        return "Searching..."
+    return f"Search failed: {info.error}"
+
+
 def header() -> None:
     with ui.header().classes("items-center justify-between"):
         ui.label("Millenium Falcon Challenge")
@@ -99,18 +109,46 @@ def init(fastapi_app: FastAPI) -> None:
             file_picker = FilePicker()
 
             with ui.row().classes("w-full col-span-2 lg:col-span-2 place-content-evenly"):
+                # Job of the search shown in this tab. Only its id is stored for the user, to show it again on reload.
+                job_id: str | None = None
 
-                def start_on_click(_: ClickEventArguments) -> None:
+                def watch(new_job_id: str) -> None:
+                    nonlocal job_id
+                    job_id = new_job_id
                     start_button.set_visibility(False)
                     result_element.set_visibility(True)
-                    store = get_store()
-                    job = Job.model_validate(app.storage.user["job"])
-                    costs = defaultdict(set, app.storage.user["costs"])
-                    service = PathService(job, store.nodes, store.weights, costs)
-                    # TODO: Use run_cpu_bound for asynchronous processing
-                    job.result = service.search_path()
-                    result_label.set_text(f"{job.get_odds().odds:.1%}")
-                    app.storage.user["job"] = jsonable_encoder(job.model_dump())
+                    poll()
+                    timer.activate()
+
+                def poll() -> None:
+                    jobs = get_store().jobs
+                    if job_id is None or jobs is None:
+                        timer.deactivate()
+                        return
+                    try:
+                        info, result = jobs.status(job_id), jobs.result(job_id)
+                    except KeyError:
+                        result_label.set_text("Search expired.")
+                        timer.deactivate()
+                        return
+                    result_label.set_text(job_text(info, result))
+                    progress = info.progress
+                    progress_bar.set_value(0 if progress is None else progress.day / max(progress.countdown, 1))
+                    progress_bar.set_visibility(info.status == JobStatus.RUNNING)
+                    if info.status in (JobStatus.DONE, JobStatus.FAILED):
+                        timer.deactivate()
+
+                async def start_on_click(_: ClickEventArguments) -> None:
+                    if (jobs := get_store().jobs) is None:
+                        ui.notify("Searches are not enabled.", type="negative")
+                        return
+                    if file_picker.communication is None:
+                        return
+                    # Searches run on the workers of the app, and the key of their result in cache, which trims the
+                    # graph, is computed on a thread: neither holds the event loop.
+                    info = await run.io_bound(jobs.start, file_picker.communication)
+                    app.storage.user["job_id"] = info.id
+                    watch(info.id)
 
                 start_button = ui.button("Start").props('size="xl" padding="xl" glossy')
                 start_button.bind_enabled_from(
@@ -119,19 +157,26 @@ def init(fastapi_app: FastAPI) -> None:
                     backward=lambda status: status == FilePickerStatus.positive,
                 ).on_click(start_on_click)
 
-                # TODO: Add a progress bar using multiprocessing.Queue for safe communication
-
                 def reset_on_click(_: ClickEventArguments) -> None:
+                    nonlocal job_id
+                    job_id = None
+                    app.storage.user.pop("job_id", None)
+                    timer.deactivate()
                     file_picker.reset()
-                    # TODO: bind visibility on PathService status.
                     result_element.set_visibility(False)
                     start_button.set_visibility(True)
 
                 with ui.column().classes("items-center") as result_element:
                     ui.label("Your chance to reach destination safely is:")
                     result_label = ui.label("--.-%").props('size="xl"')
+                    progress_bar = ui.linear_progress(value=0, show_value=False).classes("w-64")
+                    progress_bar.set_visibility(False)
                     ui.button("Reset").on_click(reset_on_click)
                     result_element.set_visibility(False)
+                timer = ui.timer(POLL_INTERVAL, poll, active=False)
+
+                if (stored_job_id := app.storage.user.get("job_id")) is not None:
+                    watch(stored_job_id)
 
     ui.run_with(
         fastapi_app,
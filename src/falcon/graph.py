@@ -0,0 +1,280 @@
+import os
+import sys
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from heapq import heappop, heappush
+from math import inf
+from typing import Self
+
+import numpy as np
+
+from falcon.cache import LruCache
+
+# Bytes of the structures derived from a graph kept along with it, least recently used ones being dropped first.
+CACHE_BYTES = int(os.environ.get("MILLENIUM_FALCON_CHALLENGE__GRAPH_CACHE_BYTES", str(2**28)))
+
+
+@dataclass(frozen=True, eq=False)
+class Graph:
+    """Graph of the universe, shared read-only by the path finding engines.
+
+    Planets are interned as dense integer ids, sorted by name.
+    Edges are stored as compressed sparse rows: neighbors of node `i` are `neighbors[offsets[i]:offsets[i + 1]]`,
+    reached in `travel_times[offsets[i]:offsets[i + 1]]` days.
+    Each route is stored in both directions and each node has an edge to itself to handle waiting action.
+    Structures derived from the graph, such as distances, are cached along with it within a byte budget.
+    """
+
+    names: Sequence[str]
+    offsets: np.ndarray = field(repr=False)
+    neighbors: np.ndarray = field(repr=False)
+    travel_times: np.ndarray = field(repr=False)
+    ids: dict[str, int] = field(init=False, repr=False)
+    cache: LruCache = field(init=False, repr=False, default_factory=lambda: LruCache(CACHE_BYTES))
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "ids", {name: i for i, name in enumerate(self.names)})
+        for array in (self.offsets, self.neighbors, self.travel_times):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_edges(
+        cls,
+        names: Sequence[str],
+        origins: np.ndarray,
+        destinations: np.ndarray,
+        travel_times: np.ndarray,
+        waiting_weight: int,
+    ) -> Self:
+        """Build the graph from routes given as arrays of node ids.
+
+        When several routes link the same nodes, the shortest one is kept.
+        """
+        nb_nodes, nb_routes = len(names), len(origins)
+        nodes = np.arange(nb_nodes)
+        sources = np.concatenate([nodes, origins, destinations]).astype(np.int64)
+        targets = np.concatenate([nodes, destinations, origins]).astype(np.int64)
+        weights = np.concatenate([np.full(nb_nodes, waiting_weight), travel_times, travel_times])
+        # Waiting edges come first so that they are kept over a route from a node to itself as long.
+        routes = np.concatenate([np.zeros(nb_nodes, dtype=bool), np.ones(2 * nb_routes, dtype=bool)])
+
+        keys = sources * nb_nodes + targets
+        sort = np.lexsort((routes, weights, keys))
+        first = np.insert(keys[sort][1:] != keys[sort][:-1], 0, True)
+        kept = sort[first]
+
+        offsets = np.zeros(nb_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources[kept], minlength=nb_nodes), out=offsets[1:])
+        return cls(
+            names=tuple(names),
+            offsets=offsets,
+            neighbors=targets[kept].astype(np.int32),
+            travel_times=weights[kept].astype(np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.ids
+
+    @property
+    def nb_edges(self) -> int:
+        return len(self.neighbors)
+
+    @property
+    def nbytes(self) -> int:
+        """Return roughly the bytes held by the graph, names being shared with the graph it is derived from."""
+        arrays = self.offsets.nbytes + self.neighbors.nbytes + self.travel_times.nbytes
+        return arrays + sys.getsizeof(self.names) + sys.getsizeof(self.ids)
+
+    @property
+    def fingerprint(self) -> str:
+        """Return a digest of the graph content, the same for graphs loaded from the same routes."""
+        if (fingerprint := self.cache.get("fingerprint")) is None:
+            digest = blake2b("\0".join(self.names).encode())
+            for array in (self.offsets, self.neighbors, self.travel_times):
+                digest.update(array.tobytes())
+            fingerprint = self.cache["fingerprint"] = digest.hexdigest()
+        return fingerprint
+
+    def index(self, name: str) -> int:
+        """Return the id of a planet."""
+        return self.ids[name]
+
+    def name(self, node: int) -> str:
+        """Return the name of a planet."""
+        return self.names[node]
+
+    def edges(self, node: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the neighbors of a node and the travel times to reach them."""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return self.neighbors[start:end], self.travel_times[start:end]
+
+    def sources(self) -> np.ndarray:
+        """Return the node each edge is stored for, aligned with neighbors."""
+        return np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+
+    def trim(self, origin: int, destination: int, autonomy: int, countdown: int) -> Self:
+        """Return the subgraph usable to go from origin to destination before the countdown, cached by parameters.
+
+        Routes longer than the autonomy are removed, as well as planets that can't be reached from the origin and
+        left to the destination before the countdown. Origin and destination are always kept.
+        """
+        key = ("trim", origin, destination, autonomy, countdown)
+        if (trimmed := self.cache.get(key)) is None:
+            trimmed = self.subgraph(self._trip_planets(origin, destination, autonomy, countdown), autonomy)
+            self.cache[key] = trimmed
+        return trimmed
+
+    def _trip_planets(self, origin: int, destination: int, autonomy: int, countdown: int) -> np.ndarray:
+        """Return the mask of the planets a trip can go through, visiting only the ones around its ends."""
+        to_origin, to_destination = (self.travel_days_to(end, autonomy, countdown) for end in (origin, destination))
+        kept = to_origin + to_destination <= countdown
+        kept[[origin, destination]] = True
+        return kept
+
+    def subgraph(self, kept: np.ndarray, autonomy: int) -> Self:
+        """Return the graph restricted to the kept nodes and to the edges not longer than the autonomy.
+
+        Only the edges of the kept nodes are gathered, so a small subgraph of a big graph is cheap to build.
+        """
+        ids = np.cumsum(kept) - 1
+        nodes = np.flatnonzero(kept)
+        starts, counts = self.offsets[nodes], self.offsets[nodes + 1] - self.offsets[nodes]
+        sources = np.repeat(np.arange(len(nodes)), counts)
+        edges = np.arange(counts.sum()) + np.repeat(starts - np.cumsum(counts) + counts, counts)
+        neighbors, travel_times = self.neighbors[edges], self.travel_times[edges]
+        usable = kept[neighbors] & (travel_times <= autonomy)
+        # Ids keep the same order, so do edges.
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources[usable], minlength=len(nodes)), out=offsets[1:])
+        return type(self)(
+            names=tuple(self.names[node] for node in nodes.tolist()),
+            offsets=offsets,
+            neighbors=ids[neighbors[usable]].astype(np.int32),
+            travel_times=travel_times[usable],
+        )
+
+    def travel_time(self, origin: int, destination: int) -> float:
+        """Return the travel time of the route between two nodes, infinite if there is none."""
+        neighbors, travel_times = self.edges(origin)
+        i = int(np.searchsorted(neighbors, destination))
+        return int(travel_times[i]) if i < len(neighbors) and neighbors[i] == destination else inf
+
+    def with_routes(self, routes: Mapping[tuple[int, int], int | None]) -> Self:
+        """Return the graph with the routes between pairs of distinct nodes set to a travel time, or removed if None.
+
+        Graphs are shared read-only, so a new one is built, the same as if loaded with these routes, and what is
+        cached on this one is carried over to it as far as the changes can't affect it.
+        """
+        if any(origin == destination for origin, destination in routes):
+            raise ValueError("Routes from a planet to itself can't be changed, they are waiting edges.")
+        # Routes go both ways, the last change of a pair wins.
+        routes = {(min(pair), max(pair)): time for pair, time in routes.items()}
+        nb_nodes = len(self)
+        sources, targets, travel_times = self.sources().astype(np.int64), self.neighbors, self.travel_times
+        keys = sources * nb_nodes + targets
+        pairs = np.array([*routes, *(pair[::-1] for pair in routes)], dtype=np.int64).reshape(-1, 2)
+        kept = ~np.isin(keys, pairs[:, 0] * nb_nodes + pairs[:, 1])
+        added = np.array(
+            [(origin, destination, time) for (origin, destination), time in routes.items() if time is not None],
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        keys = np.concatenate([keys[kept], added[:, 0] * nb_nodes + added[:, 1], added[:, 1] * nb_nodes + added[:, 0]])
+        times = np.concatenate([travel_times[kept], added[:, 2], added[:, 2]])
+        order = np.argsort(keys, kind="stable")
+        offsets = np.zeros(nb_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // nb_nodes, minlength=nb_nodes), out=offsets[1:])
+        graph = type(self)(
+            names=self.names,
+            offsets=offsets,
+            neighbors=(keys[order] % nb_nodes).astype(np.int32),
+            travel_times=times[order].astype(np.int32),
+        )
+        self.carry_cache(graph, routes)
+        return graph
+
+    def carry_cache(self, graph: "Graph", routes: Mapping[tuple[int, int], int | None]) -> None:
+        """Cache on the graph of these routes changed what is cached on this one that the changes provably can't affect.
+
+        These are distances no changed route can shorten or was part of, and subgraphs of a trip whose planets those
+        distances keep the same, if no changed route links them.
+        """
+        routes = {(min(pair), max(pair)): time for pair, time in routes.items()}
+        changes = {pair: (self.travel_time(*pair), inf if time is None else time) for pair, time in routes.items()}
+        entries = self.cache.items()
+        for key, value in entries:
+            if isinstance(key, tuple) and key[0] == "travel_days" and _same_distances(value[1], key[2], changes):
+                graph.cache[key] = value
+        for key, value in entries:
+            if isinstance(key, tuple) and key[0] == "trim":
+                _, origin, destination, autonomy, countdown = key
+                if all(
+                    graph.cache.get(("travel_days", node, autonomy), (-inf,))[0] >= countdown
+                    for node in (origin, destination)
+                ):
+                    # Planets kept are the same, so is the subgraph if no route between them changed.
+                    inside = self._trip_planets(origin, destination, autonomy, countdown)
+                    if not any(
+                        inside[list(pair)].all() and old != new and min(old, new) <= autonomy
+                        for pair, (old, new) in changes.items()
+                    ):
+                        graph.cache[key] = value
+
+    def travel_days_to(self, destination: int, autonomy: int, within: float = inf) -> np.ndarray:
+        """Return the minimum number of travel days from every node to the destination, cached by parameters.
+
+        Only edges not longer than the autonomy can be crossed and waiting is not counted, so it is a lower bound of
+        the days needed: nodes at an infinite distance can't reach the destination at all.
+        Nodes farther than `within` days may be left at an infinite distance, so that only the nodes around are
+        visited. Distances are cached for the largest bound asked, and reused for smaller ones.
+        """
+        key = ("travel_days", destination, autonomy)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] >= within:
+            return cached[1]
+        distances = self._shortest_paths(destination, autonomy, within)
+        self.cache[key] = within, distances
+        return distances
+
+    def _shortest_paths(self, source: int, autonomy: int, within: float) -> np.ndarray:
+        """Dijkstra algorithm from a source, as routes go both ways."""
+        days = [inf] * len(self)
+        days[source] = 0
+        offsets, neighbors, travel_times = self.offsets.data, self.neighbors.data, self.travel_times.data
+        queue = [(0, source)]
+        while queue:
+            day, node = heappop(queue)
+            if day > days[node]:
+                continue
+            start, end = offsets[node], offsets[node + 1]
+            for neighbor, weight in zip(neighbors[start:end], travel_times[start:end], strict=True):
+                if weight <= autonomy and day + weight < days[neighbor] and day + weight <= within:
+                    days[neighbor] = day + weight
+                    heappush(queue, (day + weight, neighbor))
+        distances = np.array(days, dtype=np.float64)
+        distances.flags.writeable = False
+        return distances
+
+
+def _same_distances(days: np.ndarray, autonomy: int, changes: Mapping[tuple[int, int], tuple[float, float]]) -> bool:
+    """Return whether shortest distances stay the same when routes change from a travel time to another.
+
+    They do if no new or shortened route is a shortcut, and if no removed or lengthened route was on a shortest path:
+    the shortest paths tree stays valid and optimal. It holds for distances bounded to a number of days too: a route
+    between nodes out of the bound can't bring a node within it.
+    """
+    for (origin, destination), times in changes.items():
+        # Routes longer than the autonomy can't be crossed.
+        old, new = (time if time <= autonomy else inf for time in times)
+        if days[origin] == days[destination] == inf:
+            # Both stay unreachable.
+            continue
+        gap = abs(days[origin] - days[destination])
+        if new < old and gap > new:
+            return False
+        if old < new and gap == old:
+            return False
+    return True
@@ -0,0 +1,130 @@
+import gzip
+import io
+import json
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, TextIO
+
+from falcon.adapter import Costs, Job
+from falcon.graph import Graph
+from falcon.metrics import registry
+from falcon.models import BountyHunter, Communication
+
+WHITESPACES = " \t\n\r"
+
+
+class CommunicationReader:
+    """Parse a communication from a text stream, yielding its bounty hunters one at a time.
+
+    Only a chunk of the stream and one bounty hunter are held in memory at once.
+    The countdown is known once the bounty hunters are consumed, as it may come after them.
+    Keys are case insensitive and extra ones are forbidden, as for Communication model.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = 2**16):
+        self.file, self.chunk_size = file, chunk_size
+        self.countdown = 0
+        self._buffer, self._position = "", 0
+        self._decoder = json.JSONDecoder()
+
+    def __iter__(self) -> Iterator[BountyHunter]:
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+        else:
+            while True:
+                key = self._value()
+                self._expect(":")
+                if str(key).lower() == "bounty_hunters":
+                    yield from self._bounty_hunters()
+                elif str(key).lower() == "countdown":
+                    self.countdown = Communication(countdown=self._value()).countdown
+                else:
+                    raise ValueError(f"Unexpected field in communication: {key!r}.")
+                if self._next() == "}":
+                    break
+        if self._peek():
+            raise ValueError("Unexpected data after communication.")
+
+    def _bounty_hunters(self) -> Iterator[BountyHunter]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield BountyHunter.model_validate(self._value())
+            if self._next("]") == "]":
+                return
+
+    def _fill(self) -> bool:
+        """Read next chunk, dropping what was parsed, and return False at the end of the stream."""
+        chunk = self.file.read(self.chunk_size)
+        self._buffer, self._position = self._buffer[self._position :] + chunk, 0
+        return bool(chunk)
+
+    def _peek(self) -> str:
+        """Return the next character which is not a whitespace, or an empty string at the end of the stream."""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in WHITESPACES:
+                self._position += 1
+            if self._position < len(self._buffer) or not self._fill():
+                return self._buffer[self._position : self._position + 1]
+
+    def _expect(self, char: str) -> None:
+        if (found := self._peek()) != char:
+            raise ValueError(f"Expected {char!r}, got {found!r}.")
+        self._position += 1
+
+    def _next(self, end: str = "}") -> str:
+        """Consume the separator after a value: a comma or the given end of its container."""
+        if (found := self._peek()) not in (",", end):
+            raise ValueError(f"Expected ',' or {end!r}, got {found!r}.")
+        self._position += 1
+        return found
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                # The value may be cut by the end of the chunk.
+                if self._fill():
+                    continue
+                raise
+            # A number may be cut too, while still valid.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+
+@contextmanager
+def open_text(path: Path) -> Iterator[TextIO]:
+    """Open a text file, decompressing it on the fly if it is a `.gz` file or a `.zip` archive of one file."""
+    if path.suffix == ".gz":
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            yield file
+    elif path.suffix == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            members = [member for member in archive.namelist() if not member.endswith("/")]
+            if len(members) != 1:
+                raise ValueError(f"Expected one file in {path}, got {len(members)}.")
+            with archive.open(members[0]) as file:
+                yield io.TextIOWrapper(file, encoding="utf-8")
+    else:
+        with path.open(encoding="utf-8") as file:
+            yield file
+
+
+@registry.timed("add_constraints")
+def ingest_communication(path: Path, job: Job, graph: Graph | None = None) -> Costs:
+    """Add the constraints of a communication file to the job, streaming its bounty hunters into the costs."""
+    costs = Costs()
+    with open_text(path) as file:
+        reader = CommunicationReader(file)
+        for hunter in reader:
+            costs[hunter.planet].add(hunter.day)
+    return job.set_constraints(reader.countdown, costs, graph)
@@ -0,0 +1,205 @@
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import partial
+from logging import getLogger
+from threading import RLock
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from falcon.adapter import Job, PathStats
+from falcon.models import Communication, JobInfo, JobStatus, SafePath, SearchProgress
+from falcon.parallel import BatchExecutor
+
+if TYPE_CHECKING:
+    from falcon.store import ResultCache
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    communication: Communication
+    status: JobStatus = JobStatus.PENDING
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: SafePath | None = None
+    error: str | None = None
+    progress: SearchProgress | None = None
+    # Key of its result in the cache, if any.
+    key: str | None = None
+    # Executor generation it was started on: its result is only cached if the graph didn't change meanwhile.
+    generation: int = 0
+    # Jobs of the same key started while it was searching, getting its result.
+    followers: list[str] = field(default_factory=list)
+    # Job searching the result of this one, if it follows one.
+    leader: str | None = None
+
+
+class JobManager:
+    """Run path searches in the background and keep their results until they expire.
+
+    Jobs are queued here and only handed to the executor when one of its workers is free, so that their status,
+    position in queue and running time are known. Finished jobs are dropped `ttl` seconds after they end.
+    The last progress reported by the search of a job is kept along with its status.
+
+    Given a result cache and the key of a communication in it, a job whose result is cached is done at once, and one
+    of the same key as a job not finished yet follows it instead of searching again. Results found are cached.
+    """
+
+    def __init__(
+        self,
+        executor: BatchExecutor,
+        ttl: float = 3600,
+        cache: "ResultCache | None" = None,
+        key: Callable[[Communication], str] | None = None,
+    ):
+        self.executor, self.ttl = executor, ttl
+        self.cache, self.key = cache, key
+        self._jobs: dict[str, _Entry] = {}
+        self._queue: deque[str] = deque()
+        # Job searching each key.
+        self._searching: dict[str, str] = {}
+        # Incremented on each executor change, as the graph may have changed along.
+        self._generation = 0
+        self._nb_running = 0
+        # Reentrant as a job may finish, and call back, while being submitted.
+        self._lock = RLock()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self, communication: Communication) -> JobInfo:
+        """Queue the search of the odds of a communication, unless its result is cached or being searched."""
+        job_id, entry = uuid4().hex, _Entry(communication, generation=self._generation)
+        if self.cache is not None and self.key is not None:
+            entry.key = self.key(communication)
+            if (cached := self.cache.get(entry.key)) is not None:
+                entry.status, entry.result = JobStatus.DONE, Job.odds(cached)
+                entry.started_at = entry.finished_at = time.monotonic()
+        with self._lock:
+            self._purge()
+            self._jobs[job_id] = entry
+            if entry.status == JobStatus.DONE:
+                logger.info(f"Job {job_id} done from cache.")
+            elif entry.key in self._searching and entry.generation == self._generation:
+                entry.leader = self._searching[entry.key]
+                self._jobs[entry.leader].followers.append(job_id)
+                logger.info(f"Job {job_id} follows job {entry.leader} of the same search.")
+            else:
+                if entry.key is not None:
+                    self._searching[entry.key] = job_id
+                self._queue.append(job_id)
+                self._dispatch()
+                logger.info(f"Job {job_id} queued, {self.queue_depth} jobs waiting.")
+            return self.status(job_id)
+
+    def status(self, job_id: str) -> JobInfo:
+        """Return the status of a job, raising KeyError if it is unknown or expired."""
+        with self._lock:
+            self._purge()
+            entry, now = self._jobs[job_id], time.monotonic()
+            # A job following another one is where the other one is.
+            queued_id = entry.leader if entry.leader is not None and entry.finished_at is None else job_id
+            entry = self._jobs[queued_id]
+            info = JobInfo(
+                id=job_id,
+                status=entry.status,
+                queue_depth=self.queue_depth,
+                error=entry.error,
+                progress=entry.progress,
+            )
+            if entry.status == JobStatus.PENDING:
+                info.queue_position = self._queue.index(queued_id)
+            if entry.started_at is not None:
+                info.running_time = (entry.finished_at or now) - entry.started_at
+            if entry.finished_at is not None:
+                info.expires_in = entry.finished_at + self.ttl - now
+            return info
+
+    def result(self, job_id: str) -> SafePath | None:
+        """Return the odds found by a job, or None if not done, raising KeyError if it is unknown or expired."""
+        with self._lock:
+            self._purge()
+            return self._jobs[job_id].result
+
+    def set_executor(self, executor: BatchExecutor) -> None:
+        """Hand next jobs to another executor, running ones finish on the previous one."""
+        with self._lock:
+            self.executor = executor
+            self._generation += 1
+            self._searching.clear()
+
+    def close(self) -> None:
+        """Fail the jobs still waiting, so that none is handed to the executor once it is shut down."""
+        with self._lock:
+            while self._queue:
+                job_id = self._queue.popleft()
+                entry = self._jobs[job_id]
+                entry.status, entry.error, entry.finished_at = JobStatus.FAILED, "Job cancelled.", time.monotonic()
+                self._settle(job_id)
+
+    def _dispatch(self) -> None:
+        while self._queue and self._nb_running < self.executor.max_workers:
+            job_id = self._queue.popleft()
+            entry = self._jobs[job_id]
+            entry.status, entry.started_at = JobStatus.RUNNING, time.monotonic()
+            self._nb_running += 1
+            try:
+                future = self.executor.search(entry.communication, partial(self._report, entry))
+            except RuntimeError as error:
+                # The executor is shut down, or its workers keep dying: other jobs may run on a next one.
+                entry.status, entry.error = JobStatus.FAILED, f"{type(error).__name__}: {error}"
+                entry.finished_at = time.monotonic()
+                self._nb_running -= 1
+                self._settle(job_id)
+                logger.warning(f"Job {job_id} could not be started: {entry.error}")
+                continue
+            future.add_done_callback(partial(self._finish, job_id))
+
+    @staticmethod
+    def _report(entry: _Entry, progress: SearchProgress) -> None:
+        # Replacing a reference is atomic, no need to lock.
+        entry.progress = progress
+
+    def _finish(self, job_id: str, future: Future[PathStats]) -> None:
+        with self._lock:
+            entry = self._jobs[job_id]
+            entry.finished_at = time.monotonic()
+            if future.cancelled():
+                entry.status, entry.error = JobStatus.FAILED, "Job cancelled."
+            elif (error := future.exception()) is not None:
+                entry.status, entry.error = JobStatus.FAILED, f"{type(error).__name__}: {error}"
+                logger.warning(f"Job {job_id} failed: {entry.error}")
+            else:
+                entry.status, entry.result = JobStatus.DONE, Job.odds(future.result())
+                if self.cache is not None and entry.key is not None and entry.generation == self._generation:
+                    self.cache.put(entry.key, future.result())
+            self._nb_running -= 1
+            self._settle(job_id)
+            self._dispatch()
+
+    def _settle(self, job_id: str) -> None:
+        """End the jobs following a finished one as it did."""
+        entry = self._jobs[job_id]
+        if entry.key is not None and self._searching.get(entry.key) == job_id:
+            del self._searching[entry.key]
+        for follower_id in entry.followers:
+            if (follower := self._jobs.get(follower_id)) is not None:
+                follower.status, follower.result, follower.error = entry.status, entry.result, entry.error
+                follower.started_at, follower.finished_at = entry.started_at, entry.finished_at
+                follower.progress = entry.progress
+        entry.followers.clear()
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id
+            for job_id, entry in self._jobs.items()
+            if entry.finished_at is not None and entry.finished_at + self.ttl <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,243 @@
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from math import inf
+from threading import Lock
+from typing import ParamSpec, TypeVar
+
+from falcon.models import SearchProgress
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Upper bounds of histogram buckets, in seconds.
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+# Seconds between two progress reports of a search.
+PROGRESS_INTERVAL = 0.1
+
+HELP = {
+    "falcon_phase_duration_seconds": "Duration of each phase of a computation of the odds.",
+    "falcon_http_request_duration_seconds": "Duration of HTTP requests by route.",
+    "falcon_search_states_expanded_total": "States evaluated by path searches.",
+    "falcon_search_states_pruned_total": "States evaluated by path searches then dropped, as unreachable or useless.",
+    "falcon_search_days_total": "Days processed by path searches.",
+    "falcon_search_days_reused_total": "Days of path searches restored from a previous search.",
+    "falcon_search_peak_states": "Largest number of states stored at once by a path search.",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...] = BUCKETS
+    counts: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+    sum: float = 0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts, strict=True)]
+        self.sum += other.sum
+        self.count += other.count
+
+
+@dataclass
+class Metrics:
+    """Metrics recorded by a worker process since its last task, sent along with the result of the task."""
+
+    counters: dict[str, dict[Labels, float]] = field(default_factory=dict)
+    gauges: dict[str, dict[Labels, float]] = field(default_factory=dict)
+    histograms: dict[str, dict[Labels, Histogram]] = field(default_factory=dict)
+
+
+@dataclass
+class SearchCounters:
+    """What a path search did, counted in local variables and recorded once done."""
+
+    expanded: int = 0
+    pruned: int = 0
+    days: int = 0
+    peak_states: int = 0
+    # Days restored from the checkpoint of a previous search instead of being processed.
+    reused_days: int = 0
+
+
+class ProgressReporter:
+    """Report the progress of a search to a callback, at most once per interval.
+
+    Searches check `due` once per day, which only reads the clock, and compute what they report only when it is:
+    the overhead stays negligible whatever the length of a day.
+    """
+
+    def __init__(self, callback: Callable[[SearchProgress], None], countdown: int, interval: float = PROGRESS_INTERVAL):
+        self.callback, self.countdown, self.interval = callback, countdown, interval
+        # The first check reports, to tell the search started.
+        self._next = 0.0
+
+    def due(self) -> bool:
+        return time.monotonic() >= self._next
+
+    def report(self, day: int, frontier: int, best_cost: float) -> None:
+        self._next = time.monotonic() + self.interval
+        cost = None if best_cost == inf else int(best_cost)
+        self.callback(SearchProgress(day=day, countdown=self.countdown, frontier=frontier, best_cost=cost))
+
+    def done(self, best_cost: float) -> None:
+        """Report the end of the search, whatever the interval."""
+        self.report(self.countdown, 0, best_cost)
+
+
+class MetricsRegistry:
+    """Counters, peak gauges and histograms by name and labels, rendered in Prometheus text format.
+
+    Metrics are recorded once per phase, never in the inner loops of a search, and not at all when disabled.
+    Worker processes drain theirs after each task, to be merged in the registry of the process serving them.
+    """
+
+    def __init__(self, *, enabled: bool = True):
+        self.enabled = enabled
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._gauges: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._lock = Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._counters.setdefault(name, {})
+            values[key] = values.get(key, 0) + value
+
+    def set_max(self, name: str, value: float, **labels: str) -> None:
+        """Keep the largest value ever set."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._gauges.setdefault(name, {})
+            values[key] = max(values.get(key, value), value)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._histograms.setdefault(name, {}).setdefault(key, Histogram()).observe(value)
+
+    @contextmanager
+    def timer(self, phase: str, **labels: str) -> Iterator[None]:
+        """Record the duration of the enclosed phase, even if it fails."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("falcon_phase_duration_seconds", time.perf_counter() - start, phase=phase, **labels)
+
+    def timed(self, phase: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+        """Decorate a function to record its duration as the given phase."""
+
+        def decorator(function: Callable[P, R]) -> Callable[P, R]:
+            @wraps(function)
+            def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                with self.timer(phase):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record_search(self, engine: str, counters: SearchCounters) -> None:
+        self.inc("falcon_search_states_expanded_total", counters.expanded, engine=engine)
+        self.inc("falcon_search_states_pruned_total", counters.pruned, engine=engine)
+        self.inc("falcon_search_days_total", counters.days, engine=engine)
+        self.inc("falcon_search_days_reused_total", counters.reused_days, engine=engine)
+        self.set_max("falcon_search_peak_states", counters.peak_states, engine=engine)
+
+    def phase_durations(self) -> dict[str, tuple[int, float]]:
+        """Return the number of runs and total duration, in seconds, of each phase."""
+        with self._lock:
+            histograms = self._histograms.get("falcon_phase_duration_seconds", {})
+            totals: dict[str, tuple[int, float]] = {}
+            for key, histogram in histograms.items():
+                phase = dict(key)["phase"]
+                count, duration = totals.get(phase, (0, 0))
+                totals[phase] = count + histogram.count, duration + histogram.sum
+            return totals
+
+    def drain(self) -> Metrics:
+        """Return the metrics recorded since the last drain, and forget them."""
+        with self._lock:
+            metrics = Metrics(self._counters, self._gauges, self._histograms)
+            self._counters, self._gauges, self._histograms = {}, {}, {}
+            return metrics
+
+    def merge(self, metrics: Metrics) -> None:
+        """Add the metrics drained from another registry to these ones."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, values in metrics.counters.items():
+                counters = self._counters.setdefault(name, {})
+                for key, value in values.items():
+                    counters[key] = counters.get(key, 0) + value
+            for name, values in metrics.gauges.items():
+                gauges = self._gauges.setdefault(name, {})
+                for key, value in values.items():
+                    gauges[key] = max(gauges.get(key, value), value)
+            for name, histograms in metrics.histograms.items():
+                merged = self._histograms.setdefault(name, {})
+                for key, histogram in histograms.items():
+                    merged.setdefault(key, Histogram(histogram.buckets, [0] * len(histogram.counts))).merge(histogram)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Return every metric in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, values in sorted(metrics.items()):
+                    lines += _header(name, kind)
+                    lines += [f"{name}{_labels(key)} {value}" for key, value in sorted(values.items())]
+            for name, histograms in sorted(self._histograms.items()):
+                lines += _header(name, "histogram")
+                for key, histogram in sorted(histograms.items()):
+                    cumulated = 0
+                    for bound, count in zip([*histogram.buckets, "+Inf"], histogram.counts, strict=True):
+                        cumulated += count
+                        lines.append(f"{name}_bucket{_labels((*key, ('le', str(bound))))} {cumulated}")
+                    lines.append(f"{name}_sum{_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "".join(f"{line}\n" for line in lines)
+
+
+def _header(name: str, kind: str) -> list[str]:
+    return [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} {kind}"]
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped, strict=True)) + "}"
+
+
+# Metrics of the process, disabled with MILLENIUM_FALCON_CHALLENGE__METRICS=0.
+registry = MetricsRegistry(enabled=os.environ.get("MILLENIUM_FALCON_CHALLENGE__METRICS", "1") != "0")
@@ -1,3 +1,4 @@
+from enum import StrEnum
 from pathlib import Path
 from typing import Any
 
@@ -36,6 +37,13 @@ class Route(ForbidExtraFieldsModel):
     travel_time: PositiveInt
 
 
+class RouteUpdate(ForbidExtraFieldsModel):
+    origin: StrictStr = Field(min_length=1)
+    destination: StrictStr = Field(min_length=1)
+    # Removes the route if not given.
+    travel_time: PositiveInt | None = None
+
+
 class BountyHunter(ForbidExtraFieldsModel):
     planet: StrictStr = Field(min_length=1)
     day: NonNegativeInt
@@ -48,3 +56,67 @@ class Communication(ForbidExtraFieldsModel):
 
 class SafePath(ForbidExtraFieldsModel):
     odds: StrictFloat
+
+
+class SafeSearch(SafePath):
+    # Days restored from a previous search instead of being searched again, all of them if the result was cached.
+    days_reused: NonNegativeInt = 0
+
+
+class StepAction(StrEnum):
+    DEPART = "depart"
+    TRAVEL = "travel"
+    # Waiting a day on a planet refuels the Millennium Falcon.
+    WAIT = "wait"
+
+
+class Step(ForbidExtraFieldsModel):
+    day: NonNegativeInt
+    planet: StrictStr
+    action: StepAction
+    # Whether bounty hunters are on the planet that day.
+    hunted: bool = False
+
+
+class SafeItinerary(SafeSearch):
+    itinerary: list[Step]
+
+
+class JobStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class SearchProgress(ForbidExtraFieldsModel):
+    # Last day searched, out of the countdown.
+    day: NonNegativeInt
+    countdown: NonNegativeInt
+    # Number of states stored by the search.
+    frontier: NonNegativeInt
+    # Cost of the safest path found so far, if any.
+    best_cost: NonNegativeInt | None = None
+
+
+class JobInfo(ForbidExtraFieldsModel):
+    id: StrictStr
+    status: JobStatus
+    # Number of jobs waiting to run, and how many of them are before this one if it is pending.
+    queue_depth: NonNegativeInt = 0
+    queue_position: NonNegativeInt | None = None
+    # Seconds spent running so far, or until done.
+    running_time: StrictFloat | None = None
+    # Seconds before the result of a finished job is dropped.
+    expires_in: StrictFloat | None = None
+    error: StrictStr | None = None
+    # Last progress reported by the search of a running job.
+    progress: SearchProgress | None = None
+
+
+class GraphInfo(ForbidExtraFieldsModel):
+    # Incremented each time the graph is reloaded.
+    generation: NonNegativeInt
+    fingerprint: StrictStr
+    nb_nodes: NonNegativeInt
+    nb_edges: NonNegativeInt
@@ -0,0 +1,420 @@
+import os
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import count
+from logging import getLogger
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock, Thread
+from types import TracebackType
+from typing import TYPE_CHECKING, Self
+
+import numpy as np
+
+from falcon.adapter import Job, PathStats
+from falcon.core import PathService, safest_paths
+from falcon.graph import Graph
+from falcon.metrics import Metrics, registry
+from falcon.models import Communication, SafePath, SearchProgress
+
+if TYPE_CHECKING:
+    from multiprocessing.queues import Queue
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedGraphHandle:
+    """What a process needs to attach to a graph published in shared memory, cheap to pickle."""
+
+    memory_name: str
+    names: tuple[str, ...]
+    nb_edges: int
+
+    def attach(self) -> tuple[Graph, SharedMemory]:
+        """Return the graph with arrays viewing the shared memory, which must be kept open while the graph is used."""
+        memory = SharedMemory(self.memory_name)
+        return Graph(self.names, *_graph_arrays(memory, len(self.names), self.nb_edges)), memory
+
+
+def _graph_arrays(memory: SharedMemory, nb_nodes: int, nb_edges: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (offsets, neighbors, travel_times) arrays laid out one after the other in the shared memory."""
+    offsets = np.ndarray((nb_nodes + 1,), dtype=np.int64, buffer=memory.buf)
+    neighbors = np.ndarray((nb_edges,), dtype=np.int32, buffer=memory.buf, offset=offsets.nbytes)
+    travel_times = np.ndarray((nb_edges,), dtype=np.int32, buffer=memory.buf, offset=offsets.nbytes + neighbors.nbytes)
+    return offsets, neighbors, travel_times
+
+
+@dataclass(frozen=True)
+class GraphUpdate:
+    """Routes changed in the graph shared with worker processes, published again in another memory block.
+
+    Workers on the graph it was changed from carry over what they cached on it, as far as the changes can't affect it.
+    """
+
+    memory_name: str
+    nb_edges: int
+    # Memory block of the graph it was changed from.
+    previous: str
+    routes: tuple[tuple[tuple[int, int], int | None], ...]
+
+    def attach(self, names: Sequence[str]) -> tuple[Graph, SharedMemory]:
+        memory = SharedMemory(self.memory_name)
+        return Graph(names, *_graph_arrays(memory, len(names), self.nb_edges)), memory
+
+
+def share_graph(graph: Graph) -> tuple[SharedGraphHandle, SharedMemory]:
+    """Copy the graph arrays once in a shared memory block, to be released by the caller."""
+    arrays = (graph.offsets, graph.neighbors, graph.travel_times)
+    memory = SharedMemory(create=True, size=max(sum(array.nbytes for array in arrays), 1))
+    for shared, array in zip(_graph_arrays(memory, len(graph), graph.nb_edges), arrays, strict=True):
+        shared[:] = array
+    return SharedGraphHandle(memory.name, tuple(graph.names), graph.nb_edges), memory
+
+
+# (task id, progress or None once the task is done) sent by worker processes, or None to stop forwarding them.
+type ProgressQueue = Queue[tuple[int, SearchProgress | None] | None]
+
+# State of a worker process, set by its initializer then on graph updates.
+_worker: tuple[Job, Graph, type[PathService], SharedMemory, ProgressQueue] | None = None
+# Memory blocks of previous graphs still viewed by what is cached, e.g. checkpoints, closed once they are dropped.
+_previous_memories: list[SharedMemory] = []
+
+
+def _init_worker(
+    job: Job,
+    handle: SharedGraphHandle,
+    engine: type[PathService],
+    progress: ProgressQueue,
+    *,
+    metrics: bool,
+) -> None:
+    global _worker  # noqa: PLW0603
+    graph, memory = handle.attach()
+    _worker = job, graph, engine, memory, progress
+    registry.enabled = metrics
+
+
+def _update_worker(update: GraphUpdate) -> None:
+    global _worker  # noqa: PLW0603
+    if _worker is None:
+        raise ValueError("Worker is not initialized.")
+    job, graph, engine, memory, progress = _worker
+    updated, updated_memory = update.attach(graph.names)
+    if update.previous == memory.name:
+        graph.carry_cache(updated, dict(update.routes))
+    _worker = job, updated, engine, updated_memory, progress
+    del graph
+    _previous_memories.append(memory)
+    for previous in list(_previous_memories):
+        try:
+            previous.close()
+        except BufferError:
+            continue
+        _previous_memories.remove(previous)
+
+
+def _search(
+    communication: Communication,
+    task_id: int | None = None,
+    update: GraphUpdate | None = None,
+    *,
+    resume: bool = False,
+) -> tuple[PathStats, Metrics]:
+    """Return the safest path of a communication with the metrics of its search, on the graph last updated if any.
+
+    The progress of the search is sent to the parent process if the task has an id.
+    """
+    if _worker is None:
+        raise ValueError("Worker is not initialized.")
+    if update is not None and update.memory_name != _worker[3].name:
+        _update_worker(update)
+    job, graph, engine, _, queue = _worker
+    if task_id is None:
+        return _search_on(job, graph, engine, communication, resume=resume), registry.drain()
+    try:
+        result = _search_on(
+            job,
+            graph,
+            engine,
+            communication,
+            lambda progress: queue.put((task_id, progress)),
+            resume=resume,
+        )
+        return result, registry.drain()
+    finally:
+        # Sent after its reports, unlike the result which may come first.
+        queue.put((task_id, None))
+
+
+def _search_on(
+    job: Job,
+    graph: Graph,
+    engine: type[PathService],
+    communication: Communication,
+    progress: Callable[[SearchProgress], None] | None = None,
+    *,
+    resume: bool = False,
+) -> PathStats:
+    return next(safest_paths(job, graph, [communication], engine, progress, resume=resume))
+
+
+def _search_in_thread(
+    job: Job,
+    graph: Graph,
+    engine: type[PathService],
+    communication: Communication,
+    progress: Callable[[SearchProgress], None] | None = None,
+    *,
+    resume: bool = False,
+) -> tuple[PathStats, Metrics]:
+    # Metrics are already recorded in the registry of this process.
+    return _search_on(job, graph, engine, communication, progress, resume=resume), Metrics()
+
+
+def _recorded(result: tuple[PathStats, Metrics]) -> PathStats:
+    stats, metrics = result
+    registry.merge(metrics)
+    return stats
+
+
+class BatchExecutor:
+    """Compute the odds of many communications on a pool of processes, or of threads.
+
+    For processes, the graph is published once in shared memory: tasks only carry a communication and its odds.
+    Each worker keeps what is cached on its graph, such as trimmed graphs, from one task to the next.
+    When routes change, the graph is published again in another block, that workers switch to on their next task.
+    Progress of their searches goes through a queue, forwarded by a thread to the callback given with each task,
+    and their metrics come back with the result of each task, to be recorded in the registry of this process.
+    Threads share the graph as is, but only keep the caller responsive as searches hold the GIL.
+    Workers are spawned again if one died, e.g. killed out of memory, failing the tasks it was running.
+    Searches resume from the checkpoints of previous ones on the same worker if asked, as searches of the app repeat.
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        graph: Graph,
+        engine: type[PathService] = PathService,
+        max_workers: int | None = None,
+        *,
+        processes: bool = True,
+        resume: bool = False,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.job, self.engine, self.resume = job, engine, resume
+        self._memory: SharedMemory | None = None
+        # Last routes update, sent with each task, and blocks of previous graphs left to tasks running on them.
+        self._update: GraphUpdate | None = None
+        self._previous_memories: dict[str, SharedMemory] = {}
+        self._nb_tasks: Counter[str] = Counter()
+        self._lock = Lock()
+        self._task = partial(_search_in_thread, job, graph, engine, resume=resume)
+        # Progress callbacks of the tasks running on processes, by task id.
+        self._callbacks: dict[int, Callable[[SearchProgress], None]] = {}
+        self._task_ids = count()
+        self._progress: ProgressQueue | None = None
+        self._forwarder: Thread | None = None
+        if processes:
+            self.handle, self._memory = share_graph(graph)
+            self._progress = get_context("spawn").Queue()
+            self._forwarder = Thread(target=self._forward_progress, args=(self._progress,), daemon=True)
+            self._forwarder.start()
+            logger.info(f"Graph shared in {self._memory.name} with {self.max_workers} worker processes.")
+        else:
+            logger.info(f"Graph shared with {self.max_workers} worker threads.")
+        self._executor = self._spawn()
+
+    def _spawn(self) -> Executor:
+        if self._memory is None:
+            return ThreadPoolExecutor(self.max_workers)
+        # Spawn workers as forking a multi-threaded app is unsafe.
+        return ProcessPoolExecutor(
+            self.max_workers,
+            mp_context=get_context("spawn"),
+            initializer=partial(_init_worker, metrics=registry.enabled),
+            initargs=(self.job, self.handle, self.engine, self._progress),
+        )
+
+    def update_routes(self, graph: Graph, routes: Mapping[tuple[int, int], int | None]) -> None:
+        """Compute the odds of next tasks on the graph with the routes changed, without spawning workers again.
+
+        The graph must have the same planets. Tasks already submitted keep the previous one.
+        """
+        if self._memory is None:
+            self._task = partial(_search_in_thread, self.job, graph, self.engine, resume=self.resume)
+            return
+        handle, memory = share_graph(graph)
+        with self._lock:
+            previous, self._memory, self.handle = self._memory, memory, handle
+            self._update = GraphUpdate(memory.name, graph.nb_edges, previous.name, tuple(routes.items()))
+            self._previous_memories[previous.name] = previous
+            self._release(previous.name, 0)
+        logger.info(f"Graph shared again in {memory.name} with routes updated.")
+
+    def submit(
+        self,
+        communication: Communication,
+        progress: Callable[[SearchProgress], None] | None = None,
+    ) -> Future[SafePath]:
+        """Schedule the computation of the odds of a communication, reporting the progress of its search if asked."""
+        return self._schedule(communication, progress, Job.odds)
+
+    def search(
+        self,
+        communication: Communication,
+        progress: Callable[[SearchProgress], None] | None = None,
+    ) -> Future[PathStats]:
+        """Schedule the search of the safest path of a communication, reporting its progress if asked."""
+        return self._schedule(communication, progress, lambda stats: stats)
+
+    def _schedule[R](
+        self,
+        communication: Communication,
+        progress: Callable[[SearchProgress], None] | None,
+        convert: Callable[[PathStats], R],
+    ) -> Future[R]:
+        executor = self._executor
+        try:
+            task = self._submit(executor, communication, progress)
+        except BrokenExecutor:
+            self._respawn(executor)
+            task = self._submit(self._executor, communication, progress)
+        result: Future[R] = Future()
+        task.add_done_callback(partial(self._unwrap, result, convert))
+        return result
+
+    def _submit(
+        self,
+        executor: Executor,
+        communication: Communication,
+        progress: Callable[[SearchProgress], None] | None,
+    ) -> Future[tuple[PathStats, Metrics]]:
+        if self._memory is None:
+            return executor.submit(self._task, communication, progress)
+        task_id = None
+        if progress is not None:
+            task_id = next(self._task_ids)
+            self._callbacks[task_id] = progress
+        with self._lock:
+            memory_name, update = self._memory.name, self._update
+            self._nb_tasks[memory_name] += 1
+        try:
+            future = executor.submit(_search, communication, task_id, update, resume=self.resume)
+        except BaseException:
+            if task_id is not None:
+                del self._callbacks[task_id]
+            with self._lock:
+                self._release(memory_name)
+            raise
+        if task_id is not None:
+            future.add_done_callback(partial(self._forget, task_id))
+        future.add_done_callback(lambda _: self._done(memory_name))
+        return future
+
+    @staticmethod
+    def _unwrap[R](
+        result: Future[R],
+        convert: Callable[[PathStats], R],
+        task: Future[tuple[PathStats, Metrics]],
+    ) -> None:
+        if task.cancelled():
+            result.cancel()
+        elif (error := task.exception()) is not None:
+            result.set_exception(error)
+        else:
+            result.set_result(convert(_recorded(task.result())))
+
+    def _forget(self, task_id: int, future: Future[tuple[PathStats, Metrics]]) -> None:
+        # Tasks which never ran, or whose worker died, won't tell they are done.
+        if future.cancelled() or isinstance(future.exception(), BrokenExecutor):
+            self._callbacks.pop(task_id, None)
+
+    def _done(self, memory_name: str, nb_tasks: int = 1) -> None:
+        with self._lock:
+            self._release(memory_name, nb_tasks)
+
+    def _release(self, memory_name: str, nb_tasks: int = 1) -> None:
+        """Count tasks done on the graph of a memory block, unlinking it once no task is left on a previous graph."""
+        self._nb_tasks[memory_name] -= nb_tasks
+        if self._nb_tasks[memory_name] <= 0 and memory_name in self._previous_memories:
+            del self._nb_tasks[memory_name]
+            memory = self._previous_memories.pop(memory_name)
+            memory.close()
+            memory.unlink()
+
+    def _respawn(self, broken: Executor) -> None:
+        with self._lock:
+            # Another caller may have already replaced it.
+            if self._executor is broken:
+                logger.warning("A worker died, spawning the workers again.")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._spawn()
+
+    def _forward_progress(self, queue: ProgressQueue) -> None:
+        while (item := queue.get()) is not None:
+            task_id, progress = item
+            if progress is None:
+                self._callbacks.pop(task_id, None)
+            elif (callback := self._callbacks.get(task_id)) is not None:
+                callback(progress)
+
+    def map(self, communications: Iterable[Communication], chunksize: int = 1) -> Iterator[SafePath]:
+        """Yield the odds of each communication in input order."""
+        communications, task, memory_name = list(communications), self._task, None
+        if self._memory is not None:
+            with self._lock:
+                memory_name, update = self._memory.name, self._update
+                self._nb_tasks[memory_name] += len(communications)
+            task = partial(_search, task_id=None, update=update, resume=self.resume)
+        executor = self._executor
+        try:
+            try:
+                results = executor.map(task, communications, chunksize=chunksize)
+            except BrokenExecutor:
+                self._respawn(executor)
+                results = self._executor.map(task, communications, chunksize=chunksize)
+        except BaseException:
+            if memory_name is not None:
+                self._done(memory_name, len(communications))
+            raise
+        return self._results(results, memory_name, len(communications))
+
+    def _results(
+        self,
+        results: Iterator[tuple[PathStats, Metrics]],
+        memory_name: str | None,
+        nb_tasks: int,
+    ) -> Iterator[SafePath]:
+        try:
+            for result in results:
+                yield Job.odds(_recorded(result))
+        finally:
+            if memory_name is not None:
+                self._done(memory_name, nb_tasks)
+
+    def close(self, *, cancel_futures: bool = True) -> None:
+        """Shut the workers down once their tasks are done, cancelling the pending ones unless told otherwise."""
+        self._executor.shutdown(cancel_futures=cancel_futures)
+        if self._progress is not None and self._forwarder is not None:
+            self._progress.put(None)
+            self._forwarder.join()
+            self._progress.close()
+        for memory in [*self._previous_memories.values(), *filter(None, [self._memory])]:
+            memory.close()
+            memory.unlink()
+        self._previous_memories.clear()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
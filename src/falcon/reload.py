@@ -0,0 +1,97 @@
+import sqlite3
+from collections.abc import Callable, Iterable
+from logging import getLogger
+from threading import Event, Lock, Thread, Timer
+from typing import ClassVar
+
+from falcon.graph import Graph
+from falcon.models import RouteUpdate
+from falcon.parallel import BatchExecutor
+from falcon.store import MemoryStore
+
+logger = getLogger(__name__)
+
+
+class GraphReloader(Thread):
+    """Reload the graph of the store in the background when its routes DB changes, or update some of its routes.
+
+    The new graph is built aside then swapped in the store: searches already running keep the previous one,
+    and the previous executor is only closed after a grace period, once the requests holding it handed it their tasks.
+    Routes updated are kept until the DB changes, as they are not written to it. The executor is kept for them,
+    its workers only switching to the updated graph along with what they cached that the changes can't affect.
+    """
+
+    # Seconds the previous executor is left to the requests holding it, whatever the interval between reloads.
+    GRACE_PERIOD: ClassVar[float] = 30
+
+    def __init__(
+        self,
+        store: MemoryStore,
+        interval: float = 5,
+        make_executor: Callable[[Graph], BatchExecutor] | None = None,
+    ):
+        super().__init__(name="graph-reloader", daemon=True)
+        self.store, self.interval, self.make_executor = store, interval, make_executor
+        self._stopped = Event()
+        self._identity = self._stat()
+        # Reloads and updates are built from the graph of the store, one at a time.
+        self._lock = Lock()
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = self.store.job.routes_db.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.reload_if_changed()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+    def reload_if_changed(self) -> bool:
+        """Reload the graph if the DB changed since last load, returning whether it was reloaded."""
+        # Taken before loading so that a change during the load triggers another one.
+        identity = self._stat()
+        if identity is None or identity == self._identity:
+            return False
+        with self._lock:
+            try:
+                graph = self.store.job.generate_graph()
+            except (sqlite3.Error, OSError, ValueError) as error:
+                # The DB may be being written: try again next time.
+                logger.warning(f"Didn't manage to reload {self.store.job.routes_db}: {error}")
+                return False
+            self._publish(graph)
+            self._identity = identity
+        logger.info(f"Graph reloaded from {self.store.job.routes_db}, generation {self.store.generation}.")
+        return True
+
+    def update_routes(self, routes: Iterable[RouteUpdate]) -> Graph:
+        """Publish the graph with routes added, retimed or removed, raising ValueError if a planet is unknown."""
+        with self._lock:
+            changes = self.store.job.route_changes(self.store.graph, routes)
+            graph = self.store.graph.with_routes(changes)
+            if (executor := self.store.executor) is None:
+                self._publish(graph)
+            else:
+                executor.update_routes(graph, changes)
+                self.store.swap_graph(graph, executor)
+        logger.info(f"Routes of the graph updated, generation {self.store.generation}.")
+        return graph
+
+    def _publish(self, graph: Graph) -> None:
+        executor = self.make_executor(graph) if self.make_executor is not None else None
+        previous = self.store.swap_graph(graph, executor)
+        if previous is not None:
+            grace_period = Timer(
+                max(self.GRACE_PERIOD, self.interval),
+                previous.close,
+                kwargs={"cancel_futures": False},
+            )
+            grace_period.daemon = True
+            grace_period.start()
@@ -0,0 +1,106 @@
+"""Compiled snapshot of the graph of a routes database, to skip parsing the database on startup.
+
+The snapshot is written next to the database, as a header followed by the graph arrays:
+- magic bytes and the length of the header,
+- the JSON header: source database identity, planet names and number of edges,
+- offsets (int64), neighbors (int32) and travel times (int32), starting on a 8 bytes boundary.
+"""
+
+import json
+import tempfile
+from hashlib import file_digest
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from falcon.graph import Graph
+
+logger = getLogger(__name__)
+
+MAGIC = b"FALCONG\x01"
+SUFFIX = ".snapshot"
+
+
+def snapshot_path(routes_db: Path) -> Path:
+    return routes_db.with_name(routes_db.name + SUFFIX)
+
+
+def _identity(routes_db: Path) -> dict[str, Any]:
+    stat = routes_db.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _digest(routes_db: Path) -> str:
+    with routes_db.open("rb") as file:
+        return file_digest(file, "sha256").hexdigest()
+
+
+def save_snapshot(graph: Graph, routes_db: Path) -> Path | None:
+    """Write the snapshot of the graph loaded from the database, returning its path or None if not writable."""
+    path = snapshot_path(routes_db)
+    header = json.dumps(
+        {
+            "source": {**_identity(routes_db), "sha256": _digest(routes_db)},
+            "names": list(graph.names),
+            "nb_edges": graph.nb_edges,
+        },
+    ).encode()
+    start = len(MAGIC) + 8 + len(header)
+    padding = -start % 8
+    tmp_path = None
+    try:
+        # Written aside then moved, so that a snapshot being written is never read.
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, delete=False) as file:
+            tmp_path = Path(file.name)
+            file.write(MAGIC + (len(header) + padding).to_bytes(8, "little") + header + b" " * padding)
+            for array in (graph.offsets, graph.neighbors, graph.travel_times):
+                file.write(array.tobytes())
+        tmp_path.replace(path)
+    except OSError as error:
+        logger.warning(f"Didn't manage to write snapshot {path}: {error}")
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+        return None
+    logger.info(f"Snapshot written to {path}.")
+    return path
+
+
+def load_snapshot(routes_db: Path) -> Graph | None:
+    """Return the graph of the database mapped from its snapshot, or None if missing, corrupt or outdated.
+
+    A snapshot is up to date if the database has the same size and modification time, or else the same content.
+    """
+    path = snapshot_path(routes_db)
+    try:
+        with path.open("rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                logger.warning(f"Unknown snapshot format: {path}.")
+                return None
+            header_size = int.from_bytes(file.read(8), "little")
+            header = json.loads(file.read(header_size))
+        source, names, nb_edges = header["source"], tuple(header["names"]), int(header["nb_edges"])
+        size, mtime_ns, sha256 = source["size"], source["mtime_ns"], source["sha256"]
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError) as error:
+        logger.warning(f"Corrupt snapshot header {path}, ignored: {error!r}")
+        return None
+
+    identity = _identity(routes_db)
+    if identity != {"size": size, "mtime_ns": mtime_ns} and (identity["size"] != size or _digest(routes_db) != sha256):
+        logger.info(f"Snapshot {path} is outdated.")
+        return None
+
+    try:
+        data = np.memmap(path, dtype=np.uint8, mode="r", offset=len(MAGIC) + 8 + header_size)
+        offsets = np.frombuffer(data, dtype=np.int64, count=len(names) + 1)
+        neighbors = np.frombuffer(data, dtype=np.int32, count=nb_edges, offset=offsets.nbytes)
+        travel_times = np.frombuffer(data, dtype=np.int32, count=nb_edges, offset=offsets.nbytes + neighbors.nbytes)
+    except (OSError, ValueError) as error:
+        # E.g. truncated by a full disk or a copy interrupted.
+        logger.warning(f"Corrupt snapshot {path}, ignored: {error!r}")
+        return None
+    logger.info(f"Snapshot loaded from {path}.")
+    return Graph(names, offsets, neighbors, travel_times)
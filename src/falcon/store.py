@@ -1,15 +1,179 @@
-from dataclasses import dataclass
+import json
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+from hashlib import sha256
+from threading import Lock
 
-from falcon.adapter import Costs, Job, Nodes, Weights
+from falcon.adapter import Costs, Job, PathStats
+from falcon.core import PathService
+from falcon.graph import Graph
+from falcon.jobs import JobManager
+from falcon.models import Communication, Step
+from falcon.parallel import BatchExecutor
+
+
+def result_key(graph: Graph, job: Job, costs: Costs, engine: type[PathService]) -> str:
+    """Return a stable digest of everything a search result depends on.
+
+    Searches only run on the part of the graph usable for the job, so results stay valid when the graph changes
+    elsewhere.
+    """
+    content = [
+        job.trim_graph(graph).fingerprint,
+        job.origin,
+        job.destination,
+        job.max_available_weight,
+        job.max_total_weight,
+        engine.__name__,
+        sorted((planet, sorted(days)) for planet, days in costs.items() if days),
+    ]
+    return sha256(json.dumps(content).encode()).hexdigest()
+
+
+class ResultCache:
+    """Search results by key, evicted when least recently used to fit in a byte budget, or once expired.
+
+    Concurrent requests of a result being computed wait for it instead of computing it again.
+    """
+
+    def __init__(self, max_bytes: int = 2**20, ttl: float = 3600):
+        self.max_bytes, self.ttl = max_bytes, ttl
+        self.nb_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        # Result, expiration time and size in bytes, by key from least to most recently used.
+        self._entries: OrderedDict[str, tuple[PathStats, float, int]] = OrderedDict()
+        self._pending: dict[str, Future[PathStats]] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key: str, compute: Callable[[], PathStats]) -> PathStats:
+        """Return the result of the key, computing it only if neither cached nor being computed."""
+        with self._lock:
+            if (cached := self._cached(key)) is not None:
+                self.hits += 1
+                return replace(cached)
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._pending[key] = Future()
+        if pending is not None:
+            return replace(pending.result())
+
+        future = self._pending[key]
+        try:
+            result = compute()
+        except BaseException as error:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            del self._pending[key]
+            self._put(key, result)
+        future.set_result(result)
+        return replace(result)
+
+    def get(self, key: str) -> PathStats | None:
+        """Return the result of the key if cached, without waiting for it if being computed."""
+        with self._lock:
+            if (cached := self._cached(key)) is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return replace(cached)
+
+    def put(self, key: str, result: PathStats) -> None:
+        """Cache the result of the key computed elsewhere, unless already cached or being computed."""
+        with self._lock:
+            if key not in self._entries and key not in self._pending:
+                self._put(key, replace(result))
+
+    def _cached(self, key: str) -> PathStats | None:
+        if (entry := self._entries.get(key)) is not None and entry[1] <= time.monotonic():
+            self._evict(key)
+            entry = None
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key: str, result: PathStats) -> None:
+        size = sys.getsizeof(key) + sys.getsizeof(result)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = result, time.monotonic() + self.ttl, size
+        self.nb_bytes += size
+        while self.nb_bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        self.nb_bytes -= self._entries.pop(key)[2]
+        self.evictions += 1
 
 
 @dataclass
 class MemoryStore:
     # TODO: Could switch to memoryview or redis on bigger environment
     job: Job
-    nodes: Nodes
-    weights: Weights
+    graph: Graph
     costs: Costs
+    engine: type[PathService] = PathService
+    executor: BatchExecutor | None = None
+    jobs: JobManager | None = None
+    cache: ResultCache = field(default_factory=ResultCache)
+    # Incremented each time the graph is reloaded.
+    generation: int = 0
+
+    def swap_graph(self, graph: Graph, executor: BatchExecutor | None = None) -> BatchExecutor | None:
+        """Publish a new graph, along with the executor working on it, and return the previous executor.
+
+        Searches started before keep the graph they were given, so the previous executor must only be closed once
+        they are done.
+        """
+        previous = self.executor
+        self.graph, self.executor = graph, executor
+        if self.jobs is not None and executor is not None:
+            self.jobs.set_executor(executor)
+        self.generation += 1
+        return previous
+
+    def search_path(self, job: Job, costs: Costs) -> tuple[PathStats, int]:
+        """Return the result of the search for the job on the graph, reusing the one of an identical search.
+
+        The days of the search reused from a previous one are returned along with it, all of them if cached.
+        """
+        key = result_key(self.graph, job, costs, self.engine)
+        # The service searching, if not cached.
+        services: list[PathService] = []
+
+        def search() -> PathStats:
+            services.append(self.engine(job, self.graph, costs, resume=True))
+            return services[0].search_path()
+
+        result = self.cache.get_or_compute(key, search)
+        return result, services[0].counters.reused_days if services else job.max_total_weight
+
+    def communication_key(self, communication: Communication) -> str:
+        """Return the key in cache of the result of the search for a communication on the graph."""
+        job, graph = self.job.model_copy(), self.graph
+        costs = job.add_constraints(communication, graph)
+        return result_key(graph, job, costs, self.engine)
+
+    def search_itinerary(self, job: Job, costs: Costs) -> tuple[PathStats, list[Step], int]:
+        """Return the result of the search for the job on the graph along with its steps and days reused, not cached.
+
+        Raise ValueError if the engine doesn't track paths.
+        """
+        service = self.engine(job, self.graph, costs, track_path=True, resume=True)
+        return service.search_path(), service.get_itinerary(), service.counters.reused_days
 
 
 _store: MemoryStore | None = None
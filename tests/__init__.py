@@ -1,8 +1,20 @@
 """Tests suite for `falcon`."""
 
+import atexit
+import shutil
+import tempfile
 from pathlib import Path
 
 TESTS_DIR = Path(__file__).parent
 TMP_DIR = TESTS_DIR / "tmp"
-FIXTURES_DIR = TESTS_DIR / "fixtures"
-EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+# Data is copied aside, as loading a routes database writes its snapshot next to it.
+DATA_DIR = Path(tempfile.mkdtemp(prefix="falcon-tests-"))
+atexit.register(shutil.rmtree, DATA_DIR, ignore_errors=True)
+
+
+def _copy(directory: Path) -> Path:
+    return shutil.copytree(directory, DATA_DIR / directory.name, ignore=shutil.ignore_patterns("*.snapshot"))
+
+
+FIXTURES_DIR = _copy(TESTS_DIR / "fixtures")
+EXAMPLES_DIR = _copy(TESTS_DIR.parent / "examples")
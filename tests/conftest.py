@@ -8,14 +8,21 @@ from _pytest.fixtures import SubRequest
 from fastapi.testclient import TestClient
 
 from falcon.config import init
+from falcon.core import checkpoints
 from falcon.store import MemoryStore, del_store, set_store
 from tests import EXAMPLES_DIR, FIXTURES_DIR
 
 
+@pytest.fixture(autouse=True)
+def clear_checkpoints() -> None:
+    # Checkpoints are kept by graph fingerprint, so searches of other tests on the same examples would be resumed.
+    checkpoints.clear()
+
+
 @pytest.fixture
 def store() -> MemoryStore:
-    job, nodes, weights, costs = init(FIXTURES_DIR / "config.json")
-    return MemoryStore(job, nodes, weights, costs)
+    job, graph, costs = init(FIXTURES_DIR / "config.json")
+    return MemoryStore(job, graph, costs)
 
 
 @pytest.fixture
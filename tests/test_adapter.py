@@ -1,29 +1,150 @@
+import pickle
 from unittest.mock import Mock, patch
 
+import numpy as np
 import pytest
 
-from falcon.adapter import Job
-from falcon.models import Falcon
+from falcon.adapter import Costs, Job
+from falcon.config import init
+from falcon.core import PathService
+from falcon.graph import Graph
+from falcon.models import BountyHunter, Communication, Falcon, RouteUpdate
+from tests import EXAMPLES_DIR
 
 
-def test_from_config_set_too_big_autonomy() -> None:
-    with pytest.raises(ValueError, match=r"autonomy=\d+ must be less then \d+."):
-        Job.from_config(
-            Falcon(
-                autonomy=2**30,
-            ),
-        )
+def test_estimate_memory() -> None:
+    job = Job.from_config(Falcon(autonomy=2**30))
+    # Only the longest route spans days, whatever the autonomy.
+    assert job.estimate_memory(100, 1000, 9) == 8 * 101 + 8 * 1000 + 128 * 100 + 8 * 10 * 100 + 80 * 1000
+    assert job.estimate_memory(100, 1000, 2**20) > Job.MAX_MEMORY // 2**10
 
 
+@patch("falcon.adapter.save_snapshot")
+@patch("falcon.adapter.load_snapshot", return_value=None)
 @patch("falcon.adapter.DbService")
-def test_generate_graph_load_too_many_nodes(mock_db: Mock) -> None:
+def test_generate_graph_load_too_many_nodes(mock_db: Mock, *_: Mock) -> None:
     mock_db.return_value = Mock()
-    mock_db.return_value.get_nodes.return_value = 2**15 * [""]
+    mock_db.return_value.get_routes.return_value = 2**15 * [""], np.array([]), np.array([]), np.array([])
 
-    with pytest.raises(ValueError, match=r"number_of_nodes=\d+ must be less than \d+."):
+    # Beyond the soft limit, the graph is loaded as long as it fits in memory.
+    assert len(Job.from_config(Falcon()).generate_graph()) == 2**15
+    with (
+        patch.object(Job, "MAX_MEMORY", 2**20),
+        pytest.raises(ValueError, match=r"number_of_nodes=\d+ with autonomy=\d+ needs about \d+ MiB"),
+    ):
         Job.from_config(Falcon()).generate_graph()
 
 
+@patch("falcon.adapter.load_snapshot")
+def test_generate_graph_snapshot_too_big(mock_snapshot: Mock) -> None:
+    mock_snapshot.return_value = Graph.from_edges(["Endor", "Hoth"], np.array([0]), np.array([1]), np.array([5]), 1)
+
+    assert len(Job.from_config(Falcon(autonomy=2**30)).generate_graph()) == 2
+    with (
+        patch.multiple(Job, MAX_NB_NODES=2, MAX_MEMORY=0),
+        pytest.raises(ValueError, match="more than MAX_MEMORY=0 MiB"),
+    ):
+        Job.from_config(Falcon()).generate_graph()
+
+
+@patch("falcon.adapter.save_snapshot")
+@patch("falcon.adapter.load_snapshot", return_value=None)
+@patch("falcon.adapter.DbService")
+def test_generate_graph_filters_too_long_routes(mock_db: Mock, *_: Mock) -> None:
+    mock_db.return_value = Mock()
+    mock_db.return_value.get_routes.return_value = (
+        ["Endor", "Tatooine"],
+        np.array([1, 1, 0]),
+        np.array([0, 0, 0]),
+        np.array([1, 2, 3]),
+    )
+
+    graph = Job.from_config(Falcon(autonomy=2)).generate_graph()
+    assert graph.names == ("Endor", "Tatooine")
+    assert graph.travel_times.tolist() == [1, 1, 1, 1]
+
+
+def test_trim_graph() -> None:
+    graph = Graph.from_edges(["Endor", "Hoth", "Tatooine"], np.array([2, 1]), np.array([0, 2]), np.array([1, 1]), 1)
+    job = Job.from_config(Falcon())
+    job.add_constraints(Communication(countdown=1))
+
+    assert job.trim_graph(graph).names == ("Endor", "Tatooine")
+    job.origin = "Dagobah"
+    assert job.trim_graph(graph) is graph
+
+
+def test_update_graph() -> None:
+    graph = Graph.from_edges(["Endor", "Hoth", "Tatooine"], np.array([2, 1]), np.array([0, 2]), np.array([1, 1]), 1)
+    job = Job.from_config(Falcon(autonomy=3))
+
+    updated = job.update_graph(
+        graph,
+        [
+            RouteUpdate(origin="Endor", destination="Hoth", travel_time=2),
+            # Too long to be crossed, as if removed.
+            RouteUpdate(origin="Hoth", destination="Tatooine", travel_time=4),
+        ],
+    )
+    assert updated.travel_time(graph.index("Endor"), graph.index("Hoth")) == 2
+    assert updated.travel_time(graph.index("Hoth"), graph.index("Tatooine")) == np.inf
+    assert updated.travel_time(graph.index("Endor"), graph.index("Tatooine")) == 1
+
+    with pytest.raises(ValueError, match="planet='Yavin' is not in the graph"):
+        job.update_graph(graph, [RouteUpdate(origin="Endor", destination="Yavin")])
+
+
 def test_get_odds_without_running_search_path() -> None:
     with pytest.raises(ValueError, match="Result is null, please run path search."):
         Job.from_config(Falcon()).get_odds()
+
+
+def test_hunter_index() -> None:
+    graph = Graph.from_edges(["a", "b", "c"], np.array([0]), np.array([1]), np.array([1]), 1)
+    costs = Costs({"a": {0, 3}, "c": {3}, "unknown": {1}})
+    index = costs.index(graph)
+
+    assert index is costs.index(graph)
+    assert len(index) == 3
+    assert index.days == [0, 3]
+    assert index.encounter(0, 3) == index.encounter(2, 3) == 1
+    assert index.encounter(1, 3) == index.encounter(0, 1) == 0
+    assert index.nodes(3).tolist() == [0, 2]
+    assert index.nodes(2).tolist() == []
+
+
+def test_hunter_index_follows_changes() -> None:
+    graph = Graph.from_edges(["a", "b", "c"], np.array([0]), np.array([1]), np.array([1]), 1)
+    costs = Costs({"a": {0}})
+    index = costs.index(graph)
+
+    costs["c"].add(3)
+    assert costs.index(graph) is not index
+    assert costs.index(graph).encounter(2, 3) == 1
+    costs["a"].discard(0)
+    assert costs.index(graph).encounter(0, 0) == 0
+
+
+def test_search_after_adding_hunters() -> None:
+    example = EXAMPLES_DIR / "example2"
+    job, graph, costs = init(example / "millennium-falcon.json", example / "empire.json")
+    first = PathService(job, graph, costs).search_path()
+
+    # Hunters waiting at departure are met whatever the path.
+    costs["Tatooine"].add(0)
+    result = PathService(job, graph, costs).search_path()
+    assert result.cost == first.cost + 1
+    assert result == PathService(job, graph, Costs(costs), resume=False).search_path()
+
+
+def test_add_constraints_indexes_hunters() -> None:
+    graph = Graph.from_edges(["Tatooine"], np.array([0]), np.array([0]), np.array([1]), 1)
+    job = Job.from_config(Falcon())
+    communication = Communication(countdown=4, bounty_hunters=[BountyHunter(planet="Tatooine", day=2)])
+
+    costs = job.add_constraints(communication, graph)
+    assert job.max_total_weight == 4
+    assert costs == {"Tatooine": {2}}
+    assert costs._index is not None
+    assert costs._index.nodes(2).tolist() == [0]
+    assert pickle.loads(pickle.dumps(costs)) == costs  # noqa: S301
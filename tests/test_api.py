@@ -1,14 +1,19 @@
 import json
 import os
 from collections import defaultdict
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 
 import pytest
 from fastapi.testclient import TestClient
 
 from falcon.adapter import PathStats
 from falcon.api import HOME_RESPONSE_FMT, app
-from falcon.models import SafePath
+from falcon.core import ENGINES
+from falcon.jobs import JobManager
+from falcon.metrics import SearchCounters
+from falcon.models import Communication, JobInfo, JobStatus, RouteUpdate, SafePath, SafeSearch, SearchProgress
+from falcon.parallel import BatchExecutor
+from falcon.reload import GraphReloader
 from falcon.store import MemoryStore, get_store
 from tests import FIXTURES_DIR
 
@@ -22,9 +27,13 @@ def test_lifespan() -> None:
         store = get_store()
         assert store is not None
         assert store.job is not None
-        assert store.nodes is not None
-        assert store.weights is not None
+        assert store.graph is not None
         assert store.costs == defaultdict(set)
+        assert app.state.reloader.store is store
+        # Searches of the GUI and jobs run on a process by default, not to hold the event loop.
+        assert store.executor is not None
+        assert store.executor.max_workers == 1
+        assert store.executor._memory is not None
     with pytest.raises(ValueError, match="Set store before accessing it."):
         get_store()
 
@@ -45,11 +54,193 @@ def test_upload_communication(store: MemoryStore, client: TestClient) -> None:
     assert response.json() == json_input
 
 
-@patch("falcon.api.PathService")
-def test_compute_odds(mock_path_service: Mock, client: TestClient) -> None:
+def test_compute_odds(store: MemoryStore, client: TestClient) -> None:
+    store.engine = mock_path_service = Mock(__name__="MockPathService")
     mock_path_service.return_value.search_path.return_value = PathStats(cost=1, total_weight=0, available_weight=0)
+    mock_path_service.return_value.counters = SearchCounters(reused_days=3)
 
     response = client.post("/compute_odds")
     mock_path_service.return_value.search_path.assert_called_once()
     assert response.status_code == 200
-    assert response.json() == SafePath(odds=0.9).model_dump()
+    assert response.json() == SafeSearch(odds=0.9, days_reused=3).model_dump()
+
+
+def test_compute_odds_reports_days_reused(client: TestClient) -> None:
+    communication = {"countdown": 8, "bounty_hunters": [{"planet": "Hoth", "day": 6}]}
+    client.post("/communication", json=communication)
+    assert client.post("/compute_odds").json() == SafeSearch(odds=0.9, days_reused=0).model_dump()
+    # Cached, nothing is searched again.
+    assert client.post("/compute_odds").json()["days_reused"] == 8
+
+    # A bounty hunter moved to the last day only invalidates the days after it was last saved.
+    communication["bounty_hunters"] = [{"planet": "Hoth", "day": 6}, {"planet": "Endor", "day": 8}]
+    client.post("/communication", json=communication)
+    assert 0 < client.post("/compute_odds").json()["days_reused"] < 8
+
+
+def test_compute_odds_itinerary(store: MemoryStore, client: TestClient) -> None:
+    client.post("/communication", json={"countdown": 8, "bounty_hunters": [{"planet": "Hoth", "day": 6}]})
+
+    response = client.post("/compute_odds", params={"itinerary": True})
+    assert response.status_code == 200
+    assert response.json() == {
+        "odds": 0.9,
+        "days_reused": 0,
+        "itinerary": [
+            {"day": 0, "planet": "Tatooine", "action": "depart", "hunted": False},
+            {"day": 6, "planet": "Hoth", "action": "travel", "hunted": True},
+            {"day": 7, "planet": "Hoth", "action": "wait", "hunted": False},
+            {"day": 8, "planet": "Endor", "action": "travel", "hunted": False},
+        ],
+    }
+    # Resumed from the search of the itinerary.
+    assert client.post("/compute_odds").json() == SafeSearch(odds=0.9, days_reused=8).model_dump()
+
+    store.engine = ENGINES["dijkstra"]
+    response = client.post("/compute_odds", params={"itinerary": True})
+    assert response.status_code == 422
+    assert "Path is not tracked" in response.json()["detail"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        json.dumps([{"countdown": 7}, {"countdown": 8, "bounty_hunters": [{"planet": "Hoth", "day": 6}]}]),
+        '{"countdown": 7}\n{"countdown": 8, "bounty_hunters": [{"planet": "Hoth", "day": 6}]}\n',
+    ],
+    ids=["json_array", "json_lines"],
+)
+def test_compute_odds_batch(store: MemoryStore, client: TestClient, content: str) -> None:
+    costs = store.costs
+    response = client.post("/compute_odds/batch", content=content)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"odds": 0.0}, {"odds": 0.9}]
+    # Communications of the batch are not stored.
+    assert store.costs is costs
+    assert store.job.result is None
+
+
+def test_compute_odds_batch_invalid(client: TestClient) -> None:
+    response = client.post("/compute_odds/batch", content='{"countdown": -1}')
+    assert response.status_code == 422
+
+
+def test_compute_odds_batch_with_executor(store: MemoryStore, client: TestClient) -> None:
+    store.executor = Mock(max_workers=2)
+    store.executor.map.return_value = iter([SafePath(odds=0.5)])
+
+    response = client.post("/compute_odds/batch", content='{"countdown": 7}')
+    store.executor.map.assert_called_once_with([Communication(countdown=7)], 1)
+    assert response.text == '{"odds":0.5}\n'
+
+
+def test_jobs(store: MemoryStore, client: TestClient) -> None:
+    store.executor = BatchExecutor(store.job, store.graph, processes=False)
+    store.jobs = JobManager(store.executor)
+
+    response = client.post("/job/start", json={"countdown": 8, "bounty_hunters": [{"planet": "Hoth", "day": 6}]})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    store.executor.close()
+    assert client.get(f"/job/status/{job_id}").json()["status"] == "done"
+    assert client.get(f"/job/result/{job_id}").json() == {"odds": 0.9}
+
+    assert client.get("/job/status/unknown").status_code == 404
+    assert client.get("/job/result/unknown").status_code == 404
+
+
+def test_job_progress(store: MemoryStore, client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("falcon.api.PROGRESS_INTERVAL", 0)
+    progress = [SearchProgress(day=day, countdown=8, frontier=2) for day in (1, 5)]
+    store.jobs = Mock()
+    store.jobs.status.side_effect = [
+        JobInfo(id="id", status=JobStatus.PENDING),
+        JobInfo(id="id", status=JobStatus.PENDING),
+        JobInfo(id="id", status=JobStatus.RUNNING, progress=progress[0]),
+        JobInfo(id="id", status=JobStatus.RUNNING, progress=progress[0]),
+        JobInfo(id="id", status=JobStatus.RUNNING, progress=progress[1]),
+        JobInfo(id="id", status=JobStatus.DONE, progress=progress[1]),
+    ]
+
+    response = client.get("/job/progress/id")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [JobInfo.model_validate_json(line.removeprefix("data: ")) for line in response.text.split("\n\n") if line]
+    assert [(event.status, event.progress) for event in events] == [
+        (JobStatus.PENDING, None),
+        (JobStatus.RUNNING, progress[0]),
+        (JobStatus.RUNNING, progress[1]),
+        (JobStatus.DONE, progress[1]),
+    ]
+
+
+def test_job_progress_of_search(store: MemoryStore, client: TestClient) -> None:
+    store.executor = BatchExecutor(store.job, store.graph, processes=False)
+    store.jobs = JobManager(store.executor)
+
+    job_id = client.post("/job/start", json={"countdown": 8, "bounty_hunters": [{"planet": "Hoth", "day": 6}]}).json()[
+        "id"
+    ]
+    store.executor.close()
+    info = JobInfo.model_validate_json(client.get(f"/job/progress/{job_id}").text.removeprefix("data: "))
+    assert info.status == JobStatus.DONE
+    assert info.progress == SearchProgress(day=8, countdown=8, frontier=0, best_cost=1)
+
+    assert client.get("/job/progress/unknown").status_code == 404
+
+
+def test_job_result_not_ready(store: MemoryStore, client: TestClient) -> None:
+    store.jobs = Mock()
+    store.jobs.status.return_value = JobInfo(id="id", status=JobStatus.RUNNING)
+    store.jobs.result.return_value = None
+
+    response = client.get("/job/result/id")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Job id is running: no result yet."
+
+
+def test_jobs_not_enabled(client: TestClient) -> None:
+    assert client.post("/job/start", json={}).status_code == 503
+
+
+def test_graph_info(store: MemoryStore, client: TestClient) -> None:
+    response = client.get("/graph")
+    assert response.json() == {
+        "generation": 0,
+        "fingerprint": store.graph.fingerprint,
+        "nb_nodes": len(store.graph),
+        "nb_edges": store.graph.nb_edges,
+    }
+
+
+def test_update_routes(store: MemoryStore, client: TestClient) -> None:
+    route = {"origin": "Endor", "destination": "Tatooine", "travel_time": 1}
+    assert client.post("/graph/routes", json=[route]).status_code == 503
+
+    app.state.reloader = GraphReloader(store, interval=0)
+    try:
+        response = client.post("/graph/routes", json=[route, {"origin": "Hoth", "destination": "Dagobah"}])
+        assert response.status_code == 200
+        assert response.json()["generation"] == 1
+        assert response.json()["nb_edges"] == store.graph.nb_edges
+        store.job.max_total_weight = 1
+        assert client.post("/compute_odds").json()["odds"] == 1
+
+        response = client.post("/graph/routes", json=[RouteUpdate(origin="Yavin", destination="Endor").model_dump()])
+        assert response.status_code == 422
+        assert "planet='Yavin'" in response.json()["detail"]
+    finally:
+        del app.state.reloader
+
+
+def test_metrics(client: TestClient) -> None:
+    client.post("/compute_odds")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE falcon_http_request_duration_seconds histogram" in response.text
+    assert (
+        'falcon_http_request_duration_seconds_count{method="POST",route="/compute_odds",status="200"}' in response.text
+    )
+    assert 'falcon_phase_duration_seconds_count{phase="search_path"}' in response.text
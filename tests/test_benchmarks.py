@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks import galaxy
+from benchmarks.suite import Scenario, compare, main, run
+from benchmarks.universe import generate_universe
+from falcon.adapter import Job
+from falcon.config import init
+from falcon.core import PathService
+
+
+def test_generate_universe(tmp_path: Path) -> None:
+    config, communication = generate_universe(tmp_path, nb_nodes=32, degree=4, autonomy=4, countdown=16, seed=1)
+
+    job, graph, costs = init(tmp_path / "millennium-falcon.json", tmp_path / "empire.json")
+    assert job == Job.from_config(config).model_copy(update={"max_total_weight": 16})
+    assert len(graph) == 32
+    assert costs == Job.from_config(config).add_constraints(communication)
+    assert PathService(job, graph, costs).search_path()
+    # Same seed, same universe.
+    assert generate_universe(tmp_path, nb_nodes=32, degree=4, autonomy=4, countdown=16, seed=1) == (
+        config,
+        communication,
+    )
+
+
+def test_generate_local_universe(tmp_path: Path) -> None:
+    config, _ = generate_universe(tmp_path, nb_nodes=64, degree=2, autonomy=4, countdown=16, local=True)
+
+    graph = Job.from_config(config).generate_graph()
+    assert len(graph) == 64
+    # Routes only link planets close on the ring.
+    for node in range(len(graph)):
+        for neighbor in graph.edges(node)[0].tolist():
+            gap = abs(int(graph.name(node)[1:]) - int(graph.name(neighbor)[1:]))
+            assert min(gap, 64 - gap) <= 8
+
+
+def test_compare() -> None:
+    baseline = {
+        "results": {"a/python": {"duration": 1.0}, "b/python": {"duration": 1.0}, "c/python": {"duration": 0.001}},
+    }
+    report = {
+        "results": {
+            "a/python": {"duration": 1.2},
+            "b/python": {"duration": 1.5},
+            "c/python": {"duration": 0.003},
+            "d/python": {"duration": 10.0},
+        },
+    }
+
+    assert compare(report, baseline) == ["b/python: 1.000s -> 1.500s (+50%)"]
+    assert compare(report, baseline, threshold=0.1) == [
+        "a/python: 1.000s -> 1.200s (+20%)",
+        "b/python: 1.000s -> 1.500s (+50%)",
+    ]
+
+
+def test_run() -> None:
+    report = run([Scenario("test", 16, 2, 4, 8)], ["python", "numpy"], repeat=1)
+
+    assert report["scenarios"]["test"]["nb_nodes"] == 16
+    assert set(report["results"]) == {"test/python", "test/numpy"}
+    assert all(result["duration"] > 0 and result["peak_memory"] > 0 for result in report["results"].values())
+
+
+def test_galaxy(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert galaxy.main(["--nodes", "512", "--routes", "2048"]) == 0
+    monkeypatch.setitem(galaxy.BUDGET, "search", 0)
+    assert galaxy.main(["--nodes", "512", "--routes", "2048", "--engine", "numpy"]) == 1
+
+
+def test_main_regression(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    output = tmp_path / "results.json"
+    args = ["--scenario", "tiny", "--engine", "numpy", "--repeat", "1"]
+    assert main([*args, "--output", str(output)]) == 0
+    assert main([*args, "--baseline", str(output), "--threshold", "100"]) == 0
+
+    monkeypatch.setattr("benchmarks.suite.NOISE", 0)
+    output.write_text('{"results": {"tiny/numpy": {"duration": 1e-9}}}')
+    assert main([*args, "--baseline", str(output)]) == 1
@@ -0,0 +1,35 @@
+import numpy as np
+
+from falcon.cache import LruCache, nbytes
+
+
+def test_nbytes() -> None:
+    array = np.zeros(100)
+    assert nbytes(array) == 800
+    assert nbytes((1, array)) > 800
+    layer = {1: (2, 3)}
+    assert nbytes([layer, layer]) < nbytes([layer, dict(layer)])
+
+
+def test_evicts_least_recently_used() -> None:
+    cache = LruCache(max_bytes=2000)
+    cache["a"], cache["b"] = np.zeros(100), np.zeros(100)
+    assert cache.get("a") is not None
+    cache["c"] = np.zeros(100)
+
+    assert [key for key, _ in cache.items()] == ["a", "c"]
+    assert "b" not in cache
+    assert cache.nb_bytes == 1600
+    assert cache.evictions == 1
+
+
+def test_replaces_and_skips_values_too_big() -> None:
+    cache = LruCache(max_bytes=1000)
+    cache["a"] = np.zeros(100)
+    cache["a"] = np.zeros(10)
+    assert cache.nb_bytes == 80
+
+    cache["b"] = np.zeros(1000)
+    assert "b" not in cache
+    assert cache.get("b", 0) == 0
+    assert len(cache) == 1
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import json
+import pstats
+from typing import TYPE_CHECKING
 from unittest.mock import Mock, patch
 
 import pytest
 
 from falcon import cli, debug
 from falcon.debug import _interpreter_name_version, get_version
-from tests import FIXTURES_DIR
+from tests import EXAMPLES_DIR, FIXTURES_DIR
+
+if TYPE_CHECKING:
+    from pathlib import Path
 
 
 def test_main(capsys: pytest.CaptureFixture) -> None:
@@ -22,6 +28,89 @@ def test_main(capsys: pytest.CaptureFixture) -> None:
     assert "0.0" in captured.out
 
 
+def test_main_batch(capsys: pytest.CaptureFixture, tmp_path: Path) -> None:
+    """Batch CLI test.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+        tmp_path: Pytest fixture for a temporary directory.
+    """
+    input_file = tmp_path / "communications.jsonl"
+    input_file.write_text('{"countdown": 7}\n{"countdown": 8}\n')
+    assert cli.main(["--batch", str(FIXTURES_DIR / "config.json"), str(input_file)]) == 0
+    assert capsys.readouterr().out.split() == ["0.0", "1.0"]
+
+    assert cli.main(["--batch", str(FIXTURES_DIR / "config.json"), str(tmp_path / "not_found.jsonl")]) == 1
+
+
+def test_main_stats(capsys: pytest.CaptureFixture) -> None:
+    """Search statistics as JSON.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+    """
+    assert cli.main(["--stats", "json", str(FIXTURES_DIR / "config.json"), str(FIXTURES_DIR / "empire.json")]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats["odds"] == 0.0
+    assert stats["engine"] == "PathService"
+    assert stats["nodes_after_pruning"] <= stats["nodes"]
+    assert stats["edges_after_pruning"] <= stats["edges"]
+    assert set(stats["phases"]) == {"parse_config", "generate_graph", "add_constraints", "search_path"}
+    assert stats["back_pointers_bytes"] == 0
+
+    with pytest.raises(SystemExit):
+        cli.main(["--batch", "--stats", "json", str(FIXTURES_DIR / "config.json"), str(FIXTURES_DIR / "empire.json")])
+
+
+def test_main_itinerary(capsys: pytest.CaptureFixture) -> None:
+    """Itinerary as JSON.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+    """
+    example = [
+        str(EXAMPLES_DIR / "example2" / "millennium-falcon.json"),
+        str(EXAMPLES_DIR / "example2" / "empire.json"),
+    ]
+    assert cli.main(["--itinerary", "--engine", "numpy", *example]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output["odds"] == 0.81
+    assert [(step["planet"], step["action"], step["hunted"]) for step in output["itinerary"]] == [
+        ("Tatooine", "depart", False),
+        ("Hoth", "travel", True),
+        ("Hoth", "wait", True),
+        ("Endor", "travel", False),
+    ]
+
+    assert cli.main(["--itinerary", "--stats", "json", *example]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert len(output["itinerary"]) == 4
+    assert output["back_pointers_bytes"] > 0
+
+    for args in (["--batch"], ["--engine", "dijkstra"]):
+        with pytest.raises(SystemExit):
+            cli.main(["--itinerary", *args, *example])
+
+
+@pytest.mark.parametrize("batch", [[], ["--batch"]])
+def test_main_profile(capsys: pytest.CaptureFixture, tmp_path: Path, batch: list[str]) -> None:
+    """Profile a run.
+
+    Parameters:
+        capsys: Pytest fixture to capture output.
+        tmp_path: Pytest fixture for a temporary directory.
+        batch: Extra arguments of the CLI.
+    """
+    profile, input_file = tmp_path / "falcon.prof", tmp_path / "communications.jsonl"
+    input_file.write_text('{"countdown": 7}\n')
+    args = ["--profile", str(profile), *batch, str(FIXTURES_DIR / "config.json"), str(input_file)]
+    assert cli.main(args) == 0
+    captured = capsys.readouterr()
+    assert captured.out.split() == ["0.0"]
+    assert "search_path" in captured.err
+    assert "search_path" in pstats.Stats(str(profile)).get_stats_profile().func_profiles
+
+
 def test_show_help(capsys: pytest.CaptureFixture) -> None:
     """Show help.
 
@@ -5,7 +5,7 @@ import pytest
 from pydantic import Json, ValidationError
 
 from falcon import DB_PLACEHOLDER
-from falcon.config import M, init, init_config, parse_file, search_file
+from falcon.config import M, init, init_config, parse_communications, parse_file, search_file
 from falcon.models import BountyHunter, Communication, Falcon, Route, SafePath
 from tests import FIXTURES_DIR, TMP_DIR
 
@@ -89,21 +89,39 @@ def test_init_config(file: str, expected_routes_db: Path, expected_autonomy: int
 @patch("falcon.config.Job")
 def test_init_input_file_ko(mock_job: Mock, filepath: Path) -> None:
     job = mock_job.from_config.return_value
-    job.generate_graph.return_value = (None, None)
 
     init(FIXTURES_DIR / "config.json", filepath)
 
     job.generate_graph.assert_called_once()
-    job.add_constraints.assert_not_called()
+    job.set_constraints.assert_not_called()
 
 
 @patch("falcon.config.Job")
 def test_init_with_input_file(mock_job: Mock) -> None:
     job = mock_job.from_config.return_value
-    job.generate_graph.return_value = (None, None)
-    argument = Communication(countdown=0, bounty_hunters=[BountyHunter(planet="Tatooine", day=0)])
-
     init(FIXTURES_DIR / "config.json", FIXTURES_DIR / "empire.json")
 
     job.generate_graph.assert_called_once()
-    job.add_constraints.assert_called_once_with(argument)
+    job.set_constraints.assert_called_once_with(0, {"Tatooine": {0}}, job.generate_graph.return_value)
+
+
+@pytest.mark.parametrize(
+    "lines",
+    [
+        ['[{"countdown": 1},\n', '{"countdown": 2, "bounty_hunters": [{"planet": "a", "day": 1}]}]\n'],
+        ['{"countdown": 1}\n', "\n", '{"countdown": 2, "bounty_hunters": [{"planet": "a", "day": 1}]}\n'],
+    ],
+    ids=["json_array", "json_lines"],
+)
+def test_parse_communications(lines: list[str]) -> None:
+    assert list(parse_communications(lines)) == [
+        Communication(countdown=1),
+        Communication(countdown=2, bounty_hunters=[BountyHunter(planet="a", day=1)]),
+    ]
+
+
+def test_parse_communications_with_error() -> None:
+    communications = parse_communications(['{"countdown": 1}\n', '{"countdown": -1}\n'])
+    assert next(communications) == Communication(countdown=1)
+    with pytest.raises(ValidationError):
+        next(communications)
@@ -1,13 +1,29 @@
 import dataclasses
 import random
-from collections import defaultdict
+import re
+from math import inf
+from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pytest
 
-from falcon.adapter import Job, PathStats
-from falcon.core import PathService
-from falcon.models import Falcon
+from falcon.adapter import Costs, Job, PathStats
+from falcon.config import init
+from falcon.core import (
+    ENGINES,
+    BackPointers,
+    DayLayers,
+    LabelSettingPathService,
+    ParetoPathService,
+    PathService,
+    SparsePathService,
+    VectorizedPathService,
+    checkpoints,
+)
+from falcon.graph import Graph
+from falcon.models import Falcon, SearchProgress, Step, StepAction
+from tests import EXAMPLES_DIR, FIXTURES_DIR
 
 
 def test_path_stats_order() -> None:
@@ -48,6 +64,232 @@ def test_path_stats_order() -> None:
 )
 def test_validate_graph(overrides_job: dict[str, Any], match: str) -> None:
     job = Job.from_config(Falcon.model_validate({"departure": "a", "arrival": "b"} | overrides_job))
-    service = PathService(job, {"a", "b"}, defaultdict(dict), defaultdict(set))
+    graph = Graph.from_edges(["a", "b"], np.array([0]), np.array([1]), np.array([1]), Job.WAITING_ACTION_WEIGHT)
+    service = PathService(job, graph, Costs())
     with pytest.raises(ValueError, match=match):
         service.search_path()
+
+
+@pytest.mark.parametrize("engine", ENGINES.values(), ids=ENGINES)
+def test_engines_on_examples(examples: tuple[Path, Path, Path], engine: type[PathService]) -> None:
+    config, input_, _ = examples
+    expected = PathService(*init(config, input_)).search_path()
+    assert engine(*init(config, input_)).search_path() == expected
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_engines_on_random_graphs(seed: int) -> None:
+    rng = random.Random(seed)
+    nodes = [f"n{i}" for i in range(rng.randint(2, 8))]
+    routes = np.array([[*rng.sample(range(len(nodes)), 2), rng.randint(1, 8)] for _ in range(rng.randint(1, 16))])
+    graph = Graph.from_edges(nodes, routes[:, 0], routes[:, 1], routes[:, 2], Job.WAITING_ACTION_WEIGHT)
+    costs = Costs()
+    for _ in range(rng.randint(0, 32)):
+        costs[rng.choice(nodes)].add(rng.randint(0, 12))
+    config = Falcon(autonomy=rng.randint(1, 6), departure=rng.choice(nodes), arrival=rng.choice(nodes))
+
+    results = {}
+    for name, engine in ENGINES.items():
+        job = Job.from_config(config)
+        job.max_total_weight = 12
+        results[name] = engine(job, graph, costs).search_path()
+    # Single label engines agree together, exact ones too and may only find safer paths.
+    assert results["numpy"] == results["sparse"] == results["python"]
+    assert results["pareto"] == results["dijkstra"]
+    assert not results["python"] < results["dijkstra"]
+
+
+@pytest.mark.parametrize("engine", [LabelSettingPathService, ParetoPathService])
+def test_exact_engines_keep_states_with_more_available_weight(engine: type[PathService]) -> None:
+    # Reaching "x" on day 3 directly leaves no fuel for the last jump, while going through a guarded planet does.
+    routes = np.array([[0, 1, 3], [0, 2, 1], [2, 1, 1], [1, 3, 2]])
+    graph = Graph.from_edges(["o", "x", "y", "d"], routes[:, 0], routes[:, 1], routes[:, 2], 1)
+    costs = Costs({"y": {1}})
+    config = Falcon(autonomy=3, departure="o", arrival="d")
+
+    results = []
+    for engine_ in (PathService, engine):
+        job = Job.from_config(config)
+        job.max_total_weight = 5
+        results.append(engine_(job, graph, costs).search_path())
+    assert results == [PathStats(), PathStats(cost=1, total_weight=5, available_weight=0)]
+
+
+@pytest.mark.parametrize("engine", [PathService, VectorizedPathService, SparsePathService])
+@pytest.mark.parametrize("seed", range(20))
+def test_search_resumes_from_checkpoint(seed: int, engine: type[PathService]) -> None:
+    rng = random.Random(seed)
+    nodes = [f"n{i}" for i in range(rng.randint(2, 12))]
+    routes = np.array([[*rng.sample(range(len(nodes)), 2), rng.randint(1, 6)] for _ in range(rng.randint(1, 32))])
+    graph = Graph.from_edges(nodes, routes[:, 0], routes[:, 1], routes[:, 2], Job.WAITING_ACTION_WEIGHT)
+    config = Falcon(autonomy=rng.randint(1, 6), departure=rng.choice(nodes), arrival=rng.choice(nodes))
+    job = Job.from_config(config).model_copy(update={"max_total_weight": 48})
+    costs = Costs()
+    for _ in range(rng.randint(0, 64)):
+        costs[rng.choice(nodes)].add(rng.randint(0, 48))
+    engine(job, graph, costs, resume=True).search_path()
+
+    # One bounty hunter moves, as an analyst would do.
+    edited = Costs(costs)
+    if planets := [planet for planet, days in edited.items() if days]:
+        edited[rng.choice(planets)].pop()
+    edited[rng.choice(nodes)].add(rng.randint(0, 48))
+    service = engine(job, graph, edited, track_path=True, resume=True)
+    copy = Graph.from_edges(nodes, routes[:, 0], routes[:, 1], routes[:, 2], Job.WAITING_ACTION_WEIGHT)
+    fresh = engine(job, copy, edited, track_path=True, resume=False)
+    assert service.search_path() == fresh.search_path()
+    if engine is not VectorizedPathService:
+        assert service.get_itinerary() == fresh.get_itinerary()
+    assert fresh.counters.reused_days == 0
+
+
+@pytest.mark.parametrize("engine", [PathService, VectorizedPathService, SparsePathService])
+def test_search_reuses_days_before_changes(engine: type[PathService]) -> None:
+    example = EXAMPLES_DIR / "example3"
+    job, graph, costs = init(example / "millennium-falcon.json", example / "empire.json")
+    expected = engine(job, graph, costs, resume=True).search_path()
+
+    # Nothing changed: the whole search is reused.
+    service = engine(job, graph, Costs(costs), resume=True)
+    assert service.search_path() == expected
+    assert service.counters.reused_days == job.max_total_weight
+    assert service.counters.days == 0
+
+    # A bounty hunter on the last day only invalidates it.
+    edited = Costs({**costs, "Hoth": costs["Hoth"] | {job.max_total_weight}})
+    service = engine(job, graph, edited, resume=True)
+    fresh_job, fresh_graph, _ = init(example / "millennium-falcon.json")
+    fresh_job.max_total_weight = job.max_total_weight
+    assert service.search_path() == engine(fresh_job, fresh_graph, edited).search_path()
+    assert service.counters.reused_days == job.max_total_weight - 1
+    assert service.counters.days == 1
+
+    # A bounty hunter on day 0 invalidates everything, as well as another countdown.
+    service = engine(job, graph, Costs({**costs, job.origin: {0}}), resume=True)
+    service.search_path()
+    assert service.counters.reused_days == 0
+    service = engine(job.model_copy(update={"max_total_weight": 8}), graph, costs, resume=True)
+    service.search_path()
+    assert service.counters.reused_days == 0
+
+
+@pytest.mark.parametrize("engine", [PathService, VectorizedPathService, SparsePathService])
+def test_search_without_resume_keeps_no_checkpoint(engine: type[PathService]) -> None:
+    example = EXAMPLES_DIR / "example3"
+    job, graph, costs = init(example / "millennium-falcon.json", example / "empire.json")
+    job = job.model_copy(update={"max_total_weight": 11})
+    service = engine(job, graph, costs)
+    service.search_path()
+    assert service._checkpoint_key() not in checkpoints
+
+    service = engine(job, graph, costs, resume=True)
+    service.search_path()
+    checkpoint = checkpoints.get(service._checkpoint_key())
+    assert checkpoint.states
+    assert checkpoints.nb_bytes >= checkpoint.nbytes > 0
+
+
+def test_vectorized_checkpoint_only_keeps_states() -> None:
+    example = EXAMPLES_DIR / "example3"
+    job, graph, costs = init(example / "millennium-falcon.json", example / "empire.json")
+    job = job.model_copy(update={"max_total_weight": 12})
+    service = VectorizedPathService(job, graph, costs, resume=True)
+    service.search_path()
+    for _, (cells, keys, *_) in checkpoints.get(service._checkpoint_key()).states:
+        assert len(cells) == len(keys) < len(service.graph) * service.least_expensive_destinations.depth
+        assert (keys != VectorizedPathService.UNREACHED).all()
+
+
+def test_day_layers_keep_last_days() -> None:
+    layers = DayLayers(depth=2)
+    for day in range(5):
+        layers.append({day: PathStats(total_weight=day)})
+    assert len(layers) == 5
+    assert layers[4] == {4: PathStats(total_weight=4)}
+    assert layers[3] == {3: PathStats(total_weight=3)}
+    assert layers[2] == layers[-1] == layers[5] == {}
+
+
+@pytest.mark.parametrize("engine", [PathService, VectorizedPathService, SparsePathService])
+def test_itinerary(examples: tuple[Path, Path, Path], engine: type[PathService]) -> None:
+    config, input_, _ = examples
+    job, graph, costs = init(config, input_)
+    service = engine(job, graph, costs, track_path=True)
+    result = service.search_path()
+    itinerary = service.get_itinerary()
+    assert result == PathService(job, graph, costs).search_path()
+    if result.cost == inf:
+        assert itinerary == []
+    else:
+        assert (itinerary[0].day, itinerary[0].planet, itinerary[0].action) == (0, job.origin, StepAction.DEPART)
+        assert (itinerary[-1].day, itinerary[-1].planet) == (result.total_weight, job.destination)
+        assert sum(step.hunted for step in itinerary) == result.cost
+        assert all(step.hunted == (step.day in costs[step.planet]) for step in itinerary)
+        assert len(service.least_expensive_destinations._layers) == job.max_available_weight + 1
+
+
+def test_itinerary_with_waits() -> None:
+    example = EXAMPLES_DIR / "example4"
+    job, graph, costs = init(example / "millennium-falcon.json", example / "empire.json")
+    service = VectorizedPathService(job, graph, costs, track_path=True)
+    service.search_path()
+
+    assert service.get_itinerary() == [
+        Step(day=0, planet="Tatooine", action=StepAction.DEPART),
+        Step(day=6, planet="Dagobah", action=StepAction.TRAVEL),
+        Step(day=7, planet="Dagobah", action=StepAction.WAIT),
+        Step(day=8, planet="Dagobah", action=StepAction.WAIT),
+        Step(day=9, planet="Hoth", action=StepAction.TRAVEL),
+        Step(day=10, planet="Endor", action=StepAction.TRAVEL),
+    ]
+    # Only the states kept are pointed to, in 12 bytes each.
+    assert service.predecessors is not None
+    assert service.predecessors.nbytes <= 12 * len(graph) * job.max_total_weight
+
+
+def test_back_pointers() -> None:
+    pointers = BackPointers()
+    pointers.add(1, [3, 0], [0, 0], [0, 0])
+    pointers.add(2, [], [], [])
+    pointers.add(3, [1], [3], [1])
+
+    assert pointers.get(1, 3) == (0, 0)
+    assert pointers.get(3, 1) == (3, 1)
+    assert pointers.nbytes == 3 * 3 * 4
+    with pytest.raises(KeyError):
+        pointers.get(1, 1)
+    with pytest.raises(KeyError):
+        pointers.until(2).get(3, 1)
+
+
+@pytest.mark.parametrize("engine", [LabelSettingPathService, ParetoPathService])
+def test_exact_engines_dont_track_path(engine: type[PathService]) -> None:
+    with pytest.raises(ValueError, match=f"Path is not tracked by {engine.__name__}"):
+        engine(*init(FIXTURES_DIR / "config.json"), track_path=True)
+
+
+@pytest.mark.parametrize("engine", ENGINES.values(), ids=ENGINES)
+def test_search_progress(examples: tuple[Path, Path, Path], engine: type[PathService]) -> None:
+    config, input_, _ = examples
+    job, graph, costs = init(config, input_)
+    reports: list[SearchProgress] = []
+
+    result = engine(job, graph, costs, progress=reports.append, resume=False).search_path()
+
+    assert result == engine(job, graph, costs, resume=False).search_path()
+    # Reported once at start, then throttled, and once done.
+    assert len(reports) >= 2
+    assert all(report.countdown == job.max_total_weight for report in reports)
+    best_cost = None if result.cost == inf else int(result.cost)
+    assert reports[-1] == SearchProgress(
+        day=job.max_total_weight,
+        countdown=job.max_total_weight,
+        frontier=0,
+        best_cost=best_cost,
+    )
+
+
+def test_itinerary_not_tracked() -> None:
+    service = PathService(*init(FIXTURES_DIR / "config.json"))
+    with pytest.raises(ValueError, match=re.escape("Path is not tracked, please enable track_path.")):
+        service.get_itinerary()
@@ -0,0 +1,72 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from falcon.db import DbService
+from tests import FIXTURES_DIR
+
+
+@pytest.fixture
+def routes_db(tmp_path: Path) -> Path:
+    return Path(shutil.copy(FIXTURES_DIR / "universe.db", tmp_path / "universe.db"))
+
+
+def test_get_routes(routes_db: Path) -> None:
+    db_service = DbService(routes_db)
+    names, origins, destinations, travel_times = db_service.get_routes()
+
+    assert names == sorted(db_service.get_nodes())
+    routes = {(route.origin, route.destination, route.travel_time) for route in db_service.get_edges()}
+    origin_names, destination_names = ([names[i] for i in ends.tolist()] for ends in (origins, destinations))
+    assert set(zip(origin_names, destination_names, travel_times.tolist(), strict=True)) == routes
+
+
+def test_get_routes_in_chunks(routes_db: Path) -> None:
+    db_service = DbService(routes_db)
+    db_service.CHUNK_SIZE = 1
+    assert db_service.get_routes()[0] == DbService(routes_db).get_routes()[0]
+
+
+@pytest.mark.parametrize(
+    ("route", "error"),
+    [
+        (("", "Endor", 1), "Routes with empty planet."),
+        (("Hoth", None, 1), "Routes with empty planet."),
+        (("Hoth", "Endor", 0), "Routes with non positive integer travel time."),
+        (("Hoth", "Endor", 1.5), "Routes with non positive integer travel time."),
+        (("Hoth", "Endor", "one"), "Routes with non numeric travel time."),
+        (("Hoth", "Endor", None), "Routes with non positive integer travel time."),
+    ],
+    ids=[
+        "empty_origin",
+        "null_destination",
+        "zero_travel_time",
+        "real_travel_time",
+        "text_travel_time",
+        "null_travel_time",
+    ],
+)
+def test_get_routes_invalid(routes_db: Path, route: tuple, error: str) -> None:
+    with sqlite3.connect(routes_db) as conn:
+        conn.execute("INSERT INTO routes VALUES (?, ?, ?)", route)
+    conn.close()
+
+    with pytest.raises(ValueError, match=error):
+        DbService(routes_db).get_routes()
+
+
+def test_get_routes_empty(routes_db: Path) -> None:
+    with sqlite3.connect(routes_db) as conn:
+        conn.execute("DELETE FROM routes")
+    conn.close()
+
+    names, origins, _, _ = DbService(routes_db).get_routes()
+    assert names == []
+    assert origins.tolist() == []
+
+
+def test_db_is_read_only(routes_db: Path) -> None:
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        DbService(routes_db).connection.execute("DELETE FROM routes")
@@ -0,0 +1,26 @@
+import pytest
+
+from falcon.frontend import job_text
+from falcon.models import JobInfo, JobStatus, SafePath, SearchProgress
+
+
+@pytest.mark.parametrize(
+    ("info", "result", "expected"),
+    [
+        (
+            JobInfo(id="a", status=JobStatus.PENDING, queue_depth=3, queue_position=2),
+            None,
+            "Waiting, 2 searches ahead...",
+        ),
+        (JobInfo(id="a", status=JobStatus.RUNNING), None, "Searching..."),
+        (
+            JobInfo(id="a", status=JobStatus.RUNNING, progress=SearchProgress(day=3, countdown=10, frontier=5)),
+            None,
+            "Searching, day 3/10...",
+        ),
+        (JobInfo(id="a", status=JobStatus.DONE), SafePath(odds=0.81), "81.0%"),
+        (JobInfo(id="a", status=JobStatus.FAILED, error="Job cancelled."), None, "Search failed: Job cancelled."),
+    ],
+)
+def test_job_text(info: JobInfo, result: SafePath | None, expected: str) -> None:
+    assert job_text(info, result) == expected
@@ -4,19 +4,23 @@ from pathlib import Path
 import pytest
 
 from falcon import cli
+from falcon.core import ENGINES
 
 
+@pytest.mark.parametrize("engine", ENGINES)
 def test_search_path_on_examples(
     examples: tuple[Path, Path, Path],
+    engine: str,
     capsys: pytest.CaptureFixture,
 ) -> None:
     """Output result for safest path search on examples.
 
     Parameters:
+        engine: Name of the path finding engine.
         capsys: Pytest fixture to capture output.
     """
     config, input_, answer = examples
-    cli.main([str(config), str(input_)])
+    cli.main(["--engine", engine, str(config), str(input_)])
     captured = capsys.readouterr()
     with answer.open() as f:
         odds = json.load(f).get("odds")
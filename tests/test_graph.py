@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from falcon.graph import Graph
+
+
+@pytest.fixture
+def graph() -> Graph:
+    # Routes: a-b (2 days), b-c (3 days), then a-b redeclared with 4 days.
+    return Graph.from_edges(["a", "b", "c"], np.array([0, 1, 1]), np.array([1, 2, 0]), np.array([2, 3, 4]), 1)
+
+
+def test_name_translation(graph: Graph) -> None:
+    assert len(graph) == 3
+    assert "b" in graph
+    assert "z" not in graph
+    assert graph.index("c") == 2
+    assert graph.name(graph.index("a")) == "a"
+
+
+def test_compressed_sparse_rows(graph: Graph) -> None:
+    assert graph.offsets.tolist() == [0, 2, 5, 7]
+    assert graph.nb_edges == 7
+    assert graph.sources().tolist() == [0, 0, 1, 1, 1, 2, 2]
+    neighbors, travel_times = graph.edges(graph.index("b"))
+    # Waiting edge, then routes in both directions, keeping the shortest one declared.
+    assert dict(zip(neighbors.tolist(), travel_times.tolist(), strict=True)) == {0: 2, 1: 1, 2: 3}
+
+
+def test_shortest_route_to_itself_overrides_waiting_edge() -> None:
+    graph = Graph.from_edges(["a"], np.array([0, 0]), np.array([0, 0]), np.array([5, 1]), 2)
+    assert graph.travel_times.tolist() == [1]
+    graph = Graph.from_edges(["a"], np.array([0]), np.array([0]), np.array([5]), 2)
+    assert graph.travel_times.tolist() == [2]
+
+
+def test_arrays_are_read_only(graph: Graph) -> None:
+    with pytest.raises(ValueError, match="read-only"):
+        graph.travel_times[0] = 0
+
+
+def test_travel_days_to(graph: Graph) -> None:
+    assert graph.travel_days_to(graph.index("a"), 3).tolist() == [0, 2, 5]
+    # Routes longer than the autonomy can't be crossed.
+    assert graph.travel_days_to(graph.index("a"), 2).tolist() == [0, 2, np.inf]
+    assert graph.travel_days_to(graph.index("a"), 3) is graph.travel_days_to(graph.index("a"), 3)
+
+
+def test_travel_days_to_reuses_larger_bound(graph: Graph) -> None:
+    bounded = graph.travel_days_to(graph.index("a"), 3, within=2)
+    assert bounded.tolist() == [0, 2, np.inf]
+    # Distances of a larger bound replace it, and are reused for smaller ones.
+    distances = graph.travel_days_to(graph.index("a"), 3, within=10)
+    assert distances.tolist() == [0, 2, 5]
+    assert graph.travel_days_to(graph.index("a"), 3, within=2) is distances
+    keys = [key for key, _ in graph.cache.items() if isinstance(key, tuple)]
+    assert len([key for key in keys if key[0] == "travel_days"]) == 1
+
+
+def test_cache_is_bounded(graph: Graph) -> None:
+    graph.cache.max_bytes = 3 * graph.trim(0, 2, 4, 0).nbytes
+    for countdown in range(100):
+        graph.trim(0, 2, 4, countdown)
+    assert graph.cache.nb_bytes <= graph.cache.max_bytes
+    assert graph.cache.evictions > 0
+
+
+def test_trim() -> None:
+    # Routes: a-b (1 day), b-d (1 day), a-d (5 days), b-c (2 days), c-e (1 day).
+    graph = Graph.from_edges(
+        ["a", "b", "c", "d", "e"],
+        np.array([0, 1, 0, 1, 2]),
+        np.array([1, 3, 3, 2, 4]),
+        np.array([1, 1, 5, 2, 1]),
+        1,
+    )
+    trimmed = graph.trim(graph.index("a"), graph.index("d"), 4, 6)
+    # c is reachable in time, unlike e, and the a-d route is too long.
+    assert trimmed.names == ("a", "b", "c", "d")
+    assert trimmed.offsets.tolist() == [0, 2, 6, 8, 10]
+    assert trimmed.neighbors.tolist() == [0, 1, 0, 1, 2, 3, 1, 2, 1, 3]
+    assert trimmed.travel_times.tolist() == [1, 1, 1, 1, 2, 1, 2, 1, 1, 1]
+    assert trimmed is graph.trim(graph.index("a"), graph.index("d"), 4, 6)
+    # Origin and destination are kept even when not linked.
+    assert graph.trim(graph.index("a"), graph.index("e"), 4, 1).names == ("a", "e")
+
+
+def test_fingerprint(graph: Graph) -> None:
+    same = Graph.from_edges(["a", "b", "c"], np.array([0, 1, 1]), np.array([1, 2, 0]), np.array([2, 3, 4]), 1)
+    other = Graph.from_edges(["a", "b", "c"], np.array([0, 1]), np.array([1, 2]), np.array([2, 4]), 1)
+    assert graph.fingerprint == same.fingerprint
+    assert graph.fingerprint != other.fingerprint
+
+
+def test_with_routes(graph: Graph) -> None:
+    # Retime a-b, remove b-c and add a-c.
+    updated = graph.with_routes({(1, 0): 1, (1, 2): None, (0, 2): 5})
+    expected = Graph.from_edges(["a", "b", "c"], np.array([0, 0]), np.array([1, 2]), np.array([1, 5]), 1)
+    for name in ("offsets", "neighbors", "travel_times"):
+        assert getattr(updated, name).tolist() == getattr(expected, name).tolist()
+    assert updated.fingerprint == expected.fingerprint
+    assert updated.travel_time(0, 1) == 1
+    assert updated.travel_time(1, 2) == np.inf
+    # The graph itself is left untouched.
+    assert graph.travel_time(1, 2) == 3
+
+
+def test_with_routes_carries_unaffected_caches() -> None:
+    # Routes: a-b (1 day), b-c (1 day), c-d (1 day), d-e (1 day).
+    graph = Graph.from_edges(list("abcde"), np.arange(4), np.arange(1, 5), np.ones(4, dtype=np.int64), 1)
+    distances, trimmed = graph.travel_days_to(0, 2), graph.trim(0, 1, 2, 2)
+
+    # A longer route between far planets changes neither distances to a nor the planets around a-b.
+    updated = graph.with_routes({(2, 4): 3})
+    assert updated.travel_days_to(0, 2) is distances
+    assert updated.trim(0, 1, 2, 2) is trimmed
+    # A route too long for the autonomy is never crossed.
+    assert graph.with_routes({(0, 4): 3}).travel_days_to(0, 2) is distances
+
+    # A shortcut changes distances, hence the subgraphs built from them.
+    updated = graph.with_routes({(0, 4): 1})
+    assert updated.travel_days_to(0, 2).tolist() == [0, 1, 2, 2, 1]
+    assert updated.trim(0, 1, 2, 2) is not trimmed
+    # So does a route removed from shortest paths.
+    assert graph.with_routes({(0, 1): None}).travel_days_to(0, 2).tolist() == [0] + [np.inf] * 4
+
+
+def test_with_routes_to_itself(graph: Graph) -> None:
+    with pytest.raises(ValueError, match="to itself"):
+        graph.with_routes({(1, 1): 1})
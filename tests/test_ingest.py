@@ -0,0 +1,124 @@
+import gzip
+import io
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from falcon.adapter import Costs, Job
+from falcon.ingest import CommunicationReader, ingest_communication, open_text
+from falcon.models import BountyHunter, Communication, Falcon
+from tests import EXAMPLES_DIR
+
+COMMUNICATION = {
+    "countdown": 10,
+    "bounty_hunters": [
+        {"planet": "Hoth", "day": 6},
+        {"planet": "Hoth", "day": 7},
+        {"planet": "Dagobah", "day": 12345678},
+    ],
+}
+
+
+def read(text: str, chunk_size: int = 2**16) -> tuple[list[BountyHunter], int]:
+    reader = CommunicationReader(io.StringIO(text), chunk_size)
+    hunters = list(reader)
+    return hunters, reader.countdown
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 2**16])
+def test_reader_matches_model(chunk_size: int) -> None:
+    text = json.dumps(COMMUNICATION, indent=2)
+    expected = Communication.model_validate_json(text)
+
+    hunters, countdown = read(text, chunk_size)
+
+    assert hunters == expected.bounty_hunters
+    assert countdown == expected.countdown
+
+
+def test_reader_countdown_after_hunters() -> None:
+    hunters, countdown = read('{"BOUNTY_HUNTERS": [{"Planet": "Hoth", "DAY": 6}], "Countdown": 7}', chunk_size=4)
+
+    assert hunters == [BountyHunter(planet="Hoth", day=6)]
+    assert countdown == 7
+
+
+@pytest.mark.parametrize("text", ["{}", '{"bounty_hunters": []}', ' {\n"countdown" : 3 }\n'])
+def test_reader_without_hunters(text: str) -> None:
+    hunters, countdown = read(text)
+
+    assert hunters == []
+    assert countdown == Communication.model_validate_json(text).countdown
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "[]",
+        '{"countdown": 1, "extra": 0}',
+        '{"bounty_hunters": [{"planet": "Hoth", "day": 6}}',
+        '{"countdown": 1 "bounty_hunters": []}',
+        '{"countdown": 1} {}',
+        '{"countdown": 1',
+        '{"countdown": tru}',
+    ],
+)
+def test_reader_invalid(text: str) -> None:
+    with pytest.raises(ValueError, match=r"Expect|Unexpected"):
+        read(text, chunk_size=2)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"countdown": -1}',
+        '{"bounty_hunters": [{"planet": "Hoth", "day": "tomorrow"}]}',
+        '{"bounty_hunters": [{"planet": "Hoth", "day": 6, "extra": 0}]}',
+        '{"bounty_hunters": [{"planet": "Hoth"}]}',
+    ],
+)
+def test_reader_validation_error(text: str) -> None:
+    with pytest.raises(ValidationError):
+        read(text)
+
+
+@pytest.mark.parametrize("suffix", [".json", ".json.gz", ".json.zip"])
+def test_open_text(tmp_path: Path, suffix: str) -> None:
+    text, path = json.dumps(COMMUNICATION), tmp_path / f"empire{suffix}"
+    if suffix.endswith(".gz"):
+        path.write_bytes(gzip.compress(text.encode()))
+    elif suffix.endswith(".zip"):
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("folder/", "")
+            archive.writestr("folder/empire.json", text)
+    else:
+        path.write_text(text)
+
+    with open_text(path) as file:
+        assert file.read() == text
+
+
+def test_open_text_zip_of_many_files(tmp_path: Path) -> None:
+    path = tmp_path / "empire.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("a.json", "{}")
+        archive.writestr("b.json", "{}")
+
+    with pytest.raises(ValueError, match="Expected one file"), open_text(path):
+        pass
+
+
+@pytest.mark.parametrize("file_name", ["empire.json", "empire.json.zip"])
+def test_ingest_communication(file_name: str) -> None:
+    job = Job.from_config(Falcon(autonomy=6, departure="Tatooine", arrival="Endor"))
+    expected = Communication.model_validate_json((EXAMPLES_DIR / "example4" / "empire.json").read_text())
+
+    costs = ingest_communication(EXAMPLES_DIR / "example4" / file_name, job)
+
+    assert costs == job.add_constraints(expected)
+    assert costs == Costs({"Hoth": {6, 7, 8}})
+    assert job.max_total_weight == 10
@@ -0,0 +1,128 @@
+from collections.abc import Callable
+from concurrent.futures import Future
+from unittest.mock import Mock, patch
+
+import pytest
+
+from falcon.adapter import PathStats
+from falcon.jobs import JobManager
+from falcon.models import Communication, JobStatus, SafePath, SearchProgress
+from falcon.store import ResultCache
+
+
+@pytest.fixture
+def futures() -> list[Future]:
+    return []
+
+
+@pytest.fixture
+def reporters() -> list[Callable[[SearchProgress], None]]:
+    return []
+
+
+@pytest.fixture
+def jobs(futures: list[Future], reporters: list[Callable[[SearchProgress], None]]) -> JobManager:
+    def search(_: Communication, progress: Callable[[SearchProgress], None]) -> Future:
+        futures.append(Future())
+        futures[-1].set_running_or_notify_cancel()
+        reporters.append(progress)
+        return futures[-1]
+
+    return JobManager(Mock(max_workers=1, search=search), ttl=10)
+
+
+@pytest.fixture
+def cached_jobs(jobs: JobManager) -> JobManager:
+    jobs.cache, jobs.key = ResultCache(), lambda communication: str(communication.countdown)
+    return jobs
+
+
+def test_jobs_are_queued_until_a_worker_is_free(jobs: JobManager, futures: list[Future]) -> None:
+    first, second = jobs.start(Communication(countdown=1)), jobs.start(Communication(countdown=2))
+    assert first.status == JobStatus.RUNNING
+    assert second.status == JobStatus.PENDING
+    assert len(futures) == 1
+    assert jobs.status(second.id).queue_position == 0
+    assert jobs.status(second.id).queue_depth == 1
+    assert jobs.result(first.id) is None
+
+    futures[0].set_result(PathStats(cost=1))
+    assert len(futures) == 2
+    assert jobs.status(first.id).status == JobStatus.DONE
+    assert jobs.status(first.id).running_time is not None
+    assert jobs.result(first.id) == SafePath(odds=0.9)
+    assert jobs.status(second.id).status == JobStatus.RUNNING
+
+    futures[1].set_exception(ValueError("boom"))
+    assert jobs.status(second.id).status == JobStatus.FAILED
+    assert jobs.status(second.id).error == "ValueError: boom"
+
+
+def test_results_expire(jobs: JobManager, futures: list[Future]) -> None:
+    with patch("falcon.jobs.time.monotonic", return_value=0):
+        job = jobs.start(Communication())
+        futures[0].set_result(PathStats(cost=0))
+        assert jobs.status(job.id).expires_in == 10
+    with patch("falcon.jobs.time.monotonic", return_value=10), pytest.raises(KeyError):
+        jobs.status(job.id)
+
+
+def test_close_cancels_pending_jobs(jobs: JobManager) -> None:
+    jobs.start(Communication())
+    job = jobs.start(Communication())
+    jobs.close()
+    assert jobs.status(job.id).status == JobStatus.FAILED
+    assert jobs.queue_depth == 0
+
+
+def test_progress(jobs: JobManager, reporters: list[Callable[[SearchProgress], None]]) -> None:
+    job = jobs.start(Communication(countdown=10))
+    assert jobs.status(job.id).progress is None
+
+    reporters[0](SearchProgress(day=4, countdown=10, frontier=3))
+    assert jobs.status(job.id).progress == SearchProgress(day=4, countdown=10, frontier=3)
+
+
+def test_failing_submit_frees_the_worker(jobs: JobManager, futures: list[Future]) -> None:
+    with patch.object(jobs.executor, "search", Mock(side_effect=RuntimeError("broken"))):
+        job = jobs.start(Communication())
+    assert jobs.status(job.id).status == JobStatus.FAILED
+    assert jobs.status(job.id).error == "RuntimeError: broken"
+
+    assert jobs.start(Communication()).status == JobStatus.RUNNING
+    assert len(futures) == 1
+
+
+def test_cached_results_are_reused(cached_jobs: JobManager, futures: list[Future]) -> None:
+    first = cached_jobs.start(Communication(countdown=1))
+    futures[0].set_result(PathStats(cost=1))
+
+    second = cached_jobs.start(Communication(countdown=1))
+    assert len(futures) == 1
+    assert second.status == JobStatus.DONE
+    assert cached_jobs.result(second.id) == cached_jobs.result(first.id) == SafePath(odds=0.9)
+
+
+def test_jobs_follow_identical_searches(cached_jobs: JobManager, futures: list[Future]) -> None:
+    cached_jobs.start(Communication(countdown=1))
+    leader = cached_jobs.start(Communication(countdown=2))
+    follower = cached_jobs.start(Communication(countdown=2))
+    assert follower.status == JobStatus.PENDING
+    assert follower.queue_position == 0
+    assert cached_jobs.queue_depth == 1
+
+    futures[0].set_result(PathStats(cost=0))
+    assert cached_jobs.status(follower.id).status == JobStatus.RUNNING
+    futures[1].set_result(PathStats(cost=1))
+    assert len(futures) == 2
+    assert cached_jobs.status(follower.id).status == JobStatus.DONE
+    assert cached_jobs.result(follower.id) == cached_jobs.result(leader.id) == SafePath(odds=0.9)
+
+
+def test_results_are_not_cached_across_executors(cached_jobs: JobManager, futures: list[Future]) -> None:
+    cached_jobs.start(Communication(countdown=1))
+    cached_jobs.set_executor(cached_jobs.executor)
+    futures[0].set_result(PathStats(cost=1))
+
+    assert cached_jobs.start(Communication(countdown=1)).status == JobStatus.RUNNING
+    assert len(futures) == 2
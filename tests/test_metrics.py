@@ -0,0 +1,113 @@
+from math import inf
+from unittest.mock import patch
+
+import pytest
+
+from falcon.config import init
+from falcon.core import ENGINES, PathService
+from falcon.metrics import BUCKETS, MetricsRegistry, ProgressReporter, SearchCounters, registry
+from falcon.models import Communication, SearchProgress
+from tests import FIXTURES_DIR
+
+
+def test_render() -> None:
+    metrics = MetricsRegistry()
+    metrics.inc("falcon_search_days_total", 3, engine="PathService")
+    metrics.inc("falcon_search_days_total", 4, engine="PathService")
+    metrics.set_max("falcon_search_peak_states", 5, engine="PathService")
+    metrics.set_max("falcon_search_peak_states", 2, engine="PathService")
+    metrics.observe("falcon_phase_duration_seconds", 0.002, phase="search_path")
+    metrics.observe("falcon_phase_duration_seconds", 100, phase="search_path")
+    metrics.inc("custom", label='a "quoted"\nlabel')
+
+    lines = metrics.render().splitlines()
+
+    assert "# TYPE falcon_search_days_total counter" in lines
+    assert 'falcon_search_days_total{engine="PathService"} 7' in lines
+    assert "# TYPE falcon_search_peak_states gauge" in lines
+    assert 'falcon_search_peak_states{engine="PathService"} 5' in lines
+    assert "# TYPE falcon_phase_duration_seconds histogram" in lines
+    assert 'falcon_phase_duration_seconds_bucket{phase="search_path",le="0.001"} 0' in lines
+    assert 'falcon_phase_duration_seconds_bucket{phase="search_path",le="0.005"} 1' in lines
+    assert f'falcon_phase_duration_seconds_bucket{{phase="search_path",le="{BUCKETS[-1]}"}} 1' in lines
+    assert 'falcon_phase_duration_seconds_bucket{phase="search_path",le="+Inf"} 2' in lines
+    assert 'falcon_phase_duration_seconds_count{phase="search_path"} 2' in lines
+    assert 'custom{label="a \\"quoted\\"\\nlabel"} 1' in lines
+
+
+def test_timer_records_failures() -> None:
+    metrics = MetricsRegistry()
+
+    @metrics.timed("failing")
+    def fail() -> None:
+        raise ValueError
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        fail()
+    assert 'falcon_phase_duration_seconds_count{phase="failing"} 1' in metrics.render()
+
+
+def test_disabled() -> None:
+    metrics = MetricsRegistry(enabled=False)
+    with metrics.timer("phase"):
+        metrics.inc("counter")
+        metrics.set_max("gauge", 1)
+        metrics.record_search("engine", SearchCounters(1, 1, 1, 1))
+    assert metrics.render() == ""
+
+
+def test_drain_and_merge() -> None:
+    worker = MetricsRegistry()
+    worker.inc("falcon_search_days_total", 3, engine="PathService")
+    worker.set_max("falcon_search_peak_states", 5, engine="PathService")
+    worker.observe("falcon_phase_duration_seconds", 0.002, phase="search_path")
+    metrics = MetricsRegistry()
+    metrics.inc("falcon_search_days_total", 4, engine="PathService")
+    metrics.set_max("falcon_search_peak_states", 7, engine="PathService")
+
+    metrics.merge(worker.drain())
+    assert worker.render() == ""
+    lines = metrics.render().splitlines()
+    assert 'falcon_search_days_total{engine="PathService"} 7' in lines
+    assert 'falcon_search_peak_states{engine="PathService"} 7' in lines
+    assert 'falcon_phase_duration_seconds_bucket{phase="search_path",le="0.005"} 1' in lines
+    assert 'falcon_phase_duration_seconds_count{phase="search_path"} 1' in lines
+
+
+@pytest.mark.parametrize("engine", ENGINES.values())
+def test_search_recorded(engine: type[PathService]) -> None:
+    registry.reset()
+    job, graph, _ = init(FIXTURES_DIR / "config.json")
+    costs = job.add_constraints(Communication(countdown=10), graph)
+
+    engine(job, graph, costs).search_path()
+
+    samples = dict(line.rsplit(" ", 1) for line in registry.render().splitlines() if not line.startswith("#"))
+    for phase in ("parse_config", "generate_graph", "add_constraints", "search_path"):
+        assert samples[f'falcon_phase_duration_seconds_count{{phase="{phase}"}}'] == "1"
+    label = f'{{engine="{engine.__name__}"}}'
+    expanded = int(samples[f"falcon_search_states_expanded_total{label}"])
+    pruned = int(samples[f"falcon_search_states_pruned_total{label}"])
+    assert 0 <= pruned < expanded
+    assert 0 < int(samples[f"falcon_search_days_total{label}"]) <= 10
+    assert int(samples[f"falcon_search_peak_states{label}"]) > 0
+
+
+def test_progress_reporter() -> None:
+    reports: list[SearchProgress] = []
+    reporter = ProgressReporter(reports.append, countdown=10, interval=1)
+
+    with patch("falcon.metrics.time.monotonic", return_value=5):
+        assert reporter.due()
+        reporter.report(2, 7, inf)
+        assert not reporter.due()
+    with patch("falcon.metrics.time.monotonic", return_value=6):
+        assert reporter.due()
+        reporter.report(4, 3, 2)
+    reporter.done(1)
+
+    assert reports == [
+        SearchProgress(day=2, countdown=10, frontier=7),
+        SearchProgress(day=4, countdown=10, frontier=3, best_cost=2),
+        SearchProgress(day=10, countdown=10, frontier=0, best_cost=1),
+    ]
@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+import pytest
+
+from falcon.config import init
+from falcon.core import checkpoints, odds_of_communications
+from falcon.graph import Graph
+from falcon.metrics import registry
+from falcon.models import BountyHunter, Communication, SafePath, SearchProgress
+from falcon.parallel import BatchExecutor, share_graph
+from tests import FIXTURES_DIR
+
+
+def test_share_graph() -> None:
+    graph = Graph.from_edges(["a", "b", "c"], np.array([0, 1]), np.array([1, 2]), np.array([2, 3]), 1)
+    handle, memory = share_graph(graph)
+    try:
+        shared, view = handle.attach()
+        assert shared.names == graph.names
+        for array, shared_array in zip(
+            (graph.offsets, graph.neighbors, graph.travel_times),
+            (shared.offsets, shared.neighbors, shared.travel_times),
+            strict=True,
+        ):
+            assert shared_array.dtype == array.dtype
+            assert shared_array.tolist() == array.tolist()
+            assert not shared_array.flags.writeable
+        del shared
+        view.close()
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def test_batch_executor() -> None:
+    job, graph, _ = init(FIXTURES_DIR / "config.json")
+    communications = [
+        Communication(countdown=countdown, bounty_hunters=[BountyHunter(planet="Hoth", day=6)])
+        for countdown in range(6, 10)
+    ]
+
+    with BatchExecutor(job, graph, max_workers=2) as executor:
+        assert list(executor.map(communications)) == list(odds_of_communications(job, graph, communications))
+
+
+@pytest.mark.parametrize("processes", [True, False])
+def test_batch_executor_progress(*, processes: bool) -> None:
+    job, graph, _ = init(FIXTURES_DIR / "config.json")
+    communication = Communication(countdown=8, bounty_hunters=[BountyHunter(planet="Hoth", day=6)])
+    reports: list[SearchProgress] = []
+
+    with BatchExecutor(job, graph, max_workers=1, processes=processes) as executor:
+        assert executor.submit(communication, reports.append).result() == SafePath(odds=0.9)
+    # Reports of worker processes are all forwarded once closed.
+    assert reports[-1] == SearchProgress(day=8, countdown=8, frontier=0, best_cost=1)
+
+
+@pytest.mark.parametrize("resume", [True, False])
+def test_batch_executor_resumes_if_asked(*, resume: bool) -> None:
+    job, graph, _ = init(FIXTURES_DIR / "config.json")
+    communication = Communication(countdown=8, bounty_hunters=[BountyHunter(planet="Hoth", day=6)])
+
+    with BatchExecutor(job, graph, max_workers=1, processes=False, resume=resume) as executor:
+        assert executor.submit(communication).result() == SafePath(odds=0.9)
+    assert (len(checkpoints) > 0) is resume
+
+
+def test_batch_executor_respawns_dead_workers() -> None:
+    job, graph, _ = init(FIXTURES_DIR / "config.json")
+    communication = Communication(countdown=8, bounty_hunters=[BountyHunter(planet="Hoth", day=6)])
+
+    with BatchExecutor(job, graph, max_workers=1) as executor:
+        assert executor.submit(communication).result() == SafePath(odds=0.9)
+        # As if killed out of memory.
+        for process in executor._executor._processes.values():  # type: ignore[attr-defined]
+            process.kill()
+        for _ in range(500):
+            if executor._executor._broken:  # type: ignore[attr-defined]
+                break
+            time.sleep(0.01)
+        assert executor.submit(communication, lambda _: None).result() == SafePath(odds=0.9)
+    assert not executor._callbacks
+
+
+@pytest.mark.parametrize("processes", [True, False])
+def test_batch_executor_records_metrics(*, processes: bool) -> None:
+    job, graph, _ = init(FIXTURES_DIR / "config.json")
+    communication = Communication(countdown=8, bounty_hunters=[BountyHunter(planet="Hoth", day=6)])
+    registry.reset()
+
+    with BatchExecutor(job, graph, max_workers=1, processes=processes) as executor:
+        executor.submit(communication).result()
+        list(executor.map([communication]))
+    phases = registry.phase_durations()
+    assert phases["search_path"][0] == phases["add_constraints"][0] == 2
+    assert 'falcon_search_days_total{engine="PathService"}' in registry.render()
+
+
+@pytest.mark.parametrize("processes", [True, False])
+def test_batch_executor_update_routes(*, processes: bool) -> None:
+    job, graph, _ = init(FIXTURES_DIR / "config.json")
+    communication = Communication(countdown=8, bounty_hunters=[BountyHunter(planet="Hoth", day=6)])
+    changes = {(graph.index("Dagobah"), graph.index("Endor")): 1}
+    updated = graph.with_routes(changes)
+
+    with BatchExecutor(job, graph, max_workers=1, processes=processes) as executor:
+        assert executor.submit(communication).result() == SafePath(odds=0.9)
+        executor.update_routes(updated, changes)
+        assert executor.submit(communication).result() == SafePath(odds=1.0)
+        assert list(executor.map([communication])) == [SafePath(odds=1.0)]
+        # Blocks of previous graphs are released once no task is left on them.
+        assert not executor._previous_memories
@@ -0,0 +1,114 @@
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from falcon.adapter import Costs, Job
+from falcon.models import Falcon, RouteUpdate
+from falcon.reload import GraphReloader
+from falcon.store import MemoryStore
+from tests import FIXTURES_DIR
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> MemoryStore:
+    routes_db = Path(shutil.copy(FIXTURES_DIR / "universe.db", tmp_path / "universe.db"))
+    job = Job.from_config(Falcon(autonomy=6, routes_db=routes_db))
+    return MemoryStore(job, job.generate_graph(), Costs())
+
+
+def add_route(routes_db: Path) -> None:
+    with sqlite3.connect(routes_db) as conn:
+        conn.execute("INSERT INTO routes VALUES ('Endor', 'Yavin', 1)")
+    conn.close()
+    # Make sure the modification time changes even on coarse file systems.
+    stat = routes_db.stat()
+    os.utime(routes_db, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_reload_if_changed(store: MemoryStore) -> None:
+    reloader = GraphReloader(store, interval=0.01)
+    previous = store.graph
+    assert not reloader.reload_if_changed()
+
+    add_route(store.job.routes_db)
+    assert reloader.reload_if_changed()
+    assert store.generation == 1
+    assert "Yavin" in store.graph
+    assert "Yavin" not in previous
+    assert not reloader.reload_if_changed()
+
+
+def test_reload_swaps_executor(store: MemoryStore) -> None:
+    store.executor = previous = Mock()
+    store.jobs = Mock()
+    make_executor = Mock()
+    reloader = GraphReloader(store, interval=0.01, make_executor=make_executor)
+
+    add_route(store.job.routes_db)
+    with patch("falcon.reload.Timer") as mock_timer:
+        assert reloader.reload_if_changed()
+    make_executor.assert_called_once_with(store.graph)
+    assert store.executor is make_executor.return_value
+    store.jobs.set_executor.assert_called_once_with(make_executor.return_value)
+    # The previous executor is closed after a grace period.
+    mock_timer.assert_called_once_with(GraphReloader.GRACE_PERIOD, previous.close, kwargs={"cancel_futures": False})
+    mock_timer.return_value.start.assert_called_once()
+
+
+def test_update_routes(store: MemoryStore) -> None:
+    make_executor = Mock()
+    reloader = GraphReloader(store, interval=0.01, make_executor=make_executor)
+    previous = store.graph
+
+    with patch("falcon.reload.Timer"):
+        graph = reloader.update_routes([RouteUpdate(origin="Endor", destination="Tatooine", travel_time=1)])
+    assert store.graph is graph
+    assert store.generation == 1
+    assert graph.travel_time(graph.index("Endor"), graph.index("Tatooine")) == 1
+    assert previous.travel_time(graph.index("Endor"), graph.index("Tatooine")) == float("inf")
+    make_executor.assert_called_once_with(graph)
+    # Updates are kept until the DB changes.
+    assert not reloader.reload_if_changed()
+    assert store.graph is graph
+
+    with pytest.raises(ValueError, match="not in the graph"):
+        reloader.update_routes([RouteUpdate(origin="Endor", destination="Yavin")])
+    assert store.generation == 1
+
+
+def test_update_routes_keeps_executor(store: MemoryStore) -> None:
+    store.executor = executor = Mock()
+    make_executor = Mock()
+    reloader = GraphReloader(store, interval=0, make_executor=make_executor)
+
+    with patch("falcon.reload.Timer") as mock_timer:
+        graph = reloader.update_routes([RouteUpdate(origin="Endor", destination="Tatooine", travel_time=1)])
+    executor.update_routes.assert_called_once_with(graph, {(graph.index("Endor"), graph.index("Tatooine")): 1})
+    assert store.executor is executor
+    make_executor.assert_not_called()
+    mock_timer.assert_not_called()
+
+
+def test_reload_retries_on_error(store: MemoryStore) -> None:
+    reloader = GraphReloader(store, interval=0.01)
+    add_route(store.job.routes_db)
+    with patch.object(Job, "generate_graph", side_effect=sqlite3.OperationalError("database is locked")):
+        assert not reloader.reload_if_changed()
+    assert store.generation == 0
+    assert reloader.reload_if_changed()
+
+
+def test_reloader_thread(store: MemoryStore) -> None:
+    reloader = GraphReloader(store, interval=0.01)
+    reloader.start()
+    add_route(store.job.routes_db)
+    for _ in range(500):
+        if store.generation:
+            break
+        reloader._stopped.wait(0.01)
+    reloader.stop()
+    assert store.generation == 1
@@ -0,0 +1,81 @@
+import json
+import shutil
+from collections.abc import Callable
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from falcon.adapter import Job
+from falcon.models import Falcon
+from falcon.snapshot import MAGIC, load_snapshot, save_snapshot, snapshot_path
+from tests import FIXTURES_DIR
+
+
+@pytest.fixture
+def routes_db(tmp_path: Path) -> Path:
+    return Path(shutil.copy(FIXTURES_DIR / "universe.db", tmp_path / "universe.db"))
+
+
+def test_snapshot_roundtrip(routes_db: Path) -> None:
+    job = Job.from_config(Falcon(autonomy=6, routes_db=routes_db))
+    assert load_snapshot(routes_db) is None
+
+    graph = job.generate_graph()
+    assert snapshot_path(routes_db).read_bytes().startswith(MAGIC)
+    with patch("falcon.adapter.DbService") as mock_db:
+        loaded = job.generate_graph()
+        mock_db.assert_not_called()
+    assert loaded.names == graph.names
+    assert loaded.fingerprint == graph.fingerprint
+    assert isinstance(loaded.offsets.base, np.memmap)
+
+
+def test_snapshot_filters_too_long_routes(routes_db: Path) -> None:
+    Job.from_config(Falcon(autonomy=6, routes_db=routes_db)).generate_graph()
+    graph = Job.from_config(Falcon(autonomy=1, routes_db=routes_db)).generate_graph()
+    assert graph.travel_times.max() == 1
+
+
+def test_snapshot_invalidated_by_db_change(routes_db: Path) -> None:
+    graph = Job.from_config(Falcon(autonomy=6, routes_db=routes_db)).generate_graph()
+    save_snapshot(graph, routes_db)
+
+    # Same content: the snapshot is still used.
+    routes_db.touch()
+    assert load_snapshot(routes_db) is not None
+
+    with routes_db.open("ab") as file:
+        file.write(b"\0")
+    assert load_snapshot(routes_db) is None
+
+
+def test_snapshot_not_writable(routes_db: Path) -> None:
+    graph = Job.from_config(Falcon(autonomy=6, routes_db=routes_db)).generate_graph()
+    with patch("falcon.snapshot.tempfile.NamedTemporaryFile", side_effect=PermissionError):
+        assert save_snapshot(graph, routes_db) is None
+
+
+def _without_size(data: bytes) -> bytes:
+    header_size = int.from_bytes(data[len(MAGIC) : len(MAGIC) + 8], "little")
+    header = json.loads(data[len(MAGIC) + 8 : len(MAGIC) + 8 + header_size])
+    del header["source"]["size"]
+    # Padded to keep the arrays where the header says.
+    content = json.dumps(header).encode().ljust(header_size)
+    return data[: len(MAGIC) + 8] + content + data[len(MAGIC) + 8 + header_size :]
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [lambda data: data[:-3], lambda data: data[: len(MAGIC) + 12], _without_size],
+)
+def test_corrupt_snapshot_is_written_again(routes_db: Path, corrupt: Callable[[bytes], bytes]) -> None:
+    job = Job.from_config(Falcon(autonomy=6, routes_db=routes_db))
+    graph = job.generate_graph()
+    path = snapshot_path(routes_db)
+    path.write_bytes(corrupt(path.read_bytes()))
+    assert load_snapshot(routes_db) is None
+
+    assert job.generate_graph().fingerprint == graph.fingerprint
+    assert load_snapshot(routes_db) is not None
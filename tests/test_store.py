@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from unittest.mock import Mock, patch
+
+import pytest
+
+from falcon.adapter import Costs, PathStats
+from falcon.core import ENGINES, PathService
+from falcon.models import BountyHunter, Communication, RouteUpdate
+from falcon.store import MemoryStore, ResultCache, result_key
+
+
+def test_result_key(store: MemoryStore) -> None:
+    key = result_key(store.graph, store.job, Costs({"Hoth": {6, 7}, "Endor": set()}), PathService)
+    assert key == result_key(store.graph, store.job.model_copy(), Costs({"Hoth": {7, 6}}), PathService)
+    assert key != result_key(store.graph, store.job, Costs({"Hoth": {6}}), PathService)
+    assert key != result_key(store.graph, store.job, Costs({"Hoth": {6, 7}}), ENGINES["numpy"])
+    store.job.max_total_weight += 1
+    assert key != result_key(store.graph, store.job, Costs({"Hoth": {6, 7}}), PathService)
+
+
+def test_result_key_after_route_update(store: MemoryStore) -> None:
+    costs = Costs({"Hoth": {6, 7}})
+    updated = store.job.update_graph(store.graph, [RouteUpdate(origin="Dagobah", destination="Endor", travel_time=6)])
+    # Searches only depend on the planets reachable in time.
+    store.job.max_total_weight = 1
+    assert result_key(updated, store.job, costs, PathService) == result_key(store.graph, store.job, costs, PathService)
+    store.job.max_total_weight = 10
+    assert result_key(updated, store.job, costs, PathService) != result_key(store.graph, store.job, costs, PathService)
+
+
+def test_cache_hits_and_misses() -> None:
+    cache, compute = ResultCache(), Mock(return_value=PathStats(cost=1))
+    assert cache.get_or_compute("key", compute) == PathStats(cost=1)
+    assert cache.get_or_compute("key", compute) == PathStats(cost=1)
+    compute.assert_called_once()
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 0)
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = ResultCache()
+    cache.get_or_compute("a", PathStats)
+    cache.max_bytes = cache.nb_bytes * 2
+    cache.get_or_compute("b", PathStats)
+    cache.get_or_compute("a", PathStats)
+    cache.get_or_compute("c", PathStats)
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.evictions == 1
+    assert cache.nb_bytes <= cache.max_bytes
+
+
+def test_cache_evicts_expired() -> None:
+    cache = ResultCache(ttl=10)
+    with patch("falcon.store.time.monotonic", return_value=0):
+        cache.get_or_compute("a", PathStats)
+    with patch("falcon.store.time.monotonic", return_value=10):
+        cache.get_or_compute("a", PathStats)
+    assert (cache.hits, cache.misses, cache.evictions) == (0, 2, 1)
+
+
+def test_cache_deduplicates_pending_computations() -> None:
+    cache, started, release = ResultCache(), Event(), Event()
+
+    def compute() -> PathStats:
+        started.set()
+        release.wait()
+        return PathStats(cost=2)
+
+    with ThreadPoolExecutor(2) as executor:
+        first = executor.submit(cache.get_or_compute, "key", compute)
+        started.wait()
+        second = executor.submit(cache.get_or_compute, "key", Mock(side_effect=AssertionError))
+        while cache.hits == 0:
+            pass
+        release.set()
+        assert first.result() == second.result() == PathStats(cost=2)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_does_not_keep_errors() -> None:
+    cache = ResultCache()
+    with pytest.raises(ValueError, match="boom"):
+        cache.get_or_compute("key", Mock(side_effect=ValueError("boom")))
+    assert cache.get_or_compute("key", PathStats) == PathStats()
+    assert cache.misses == 2
+
+
+def test_store_search_path(store: MemoryStore) -> None:
+    store.job.max_total_weight = 8
+    expected = PathService(store.job, store.graph, Costs()).search_path()
+    assert store.search_path(store.job, Costs()) == (expected, 0)
+    # Cached, all its days are reused.
+    assert store.search_path(store.job, Costs()) == (expected, 8)
+    assert store.cache.hits == 1
+
+
+def test_cache_get_and_put() -> None:
+    cache = ResultCache()
+    assert cache.get("key") is None
+    cache.put("key", PathStats(cost=1))
+    cache.put("key", PathStats(cost=2))
+    assert cache.get("key") == PathStats(cost=1)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_store_communication_key(store: MemoryStore) -> None:
+    communication = Communication(countdown=7, bounty_hunters=[BountyHunter(planet="Hoth", day=6)])
+    job = store.job.model_copy()
+    costs = job.add_constraints(communication, store.graph)
+    assert store.communication_key(communication) == result_key(store.graph, job, costs, store.engine)